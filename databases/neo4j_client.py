@@ -1,68 +1,329 @@
 from __future__ import annotations
+import asyncio
 import os
+import random
+import threading
 import time
 from contextlib import contextmanager
-from dataclasses import dataclass
-from typing import Any, Dict, Iterable, List, Optional
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 
 
-from neo4j import GraphDatabase, basic_auth
+from neo4j import AsyncGraphDatabase, GraphDatabase, basic_auth
 from neo4j.exceptions import ServiceUnavailable, TransientError
-
-
+from neo4j.graph import Node, Relationship
 
 
 DEFAULT_DB = os.getenv("NEO4J_DATABASE", "neo4j")
 
+CONSTRAINTS = (
+    "CREATE CONSTRAINT chunk_id IF NOT EXISTS FOR (c:Chunk) REQUIRE c.id IS UNIQUE",
+    "CREATE CONSTRAINT entity_id IF NOT EXISTS FOR (e:Entity) REQUIRE e.id IS UNIQUE",
+)
 
 
+def _vector_index_cypher(name: str, label: str, prop: str) -> str:
+    return (
+        f"CREATE VECTOR INDEX {name} IF NOT EXISTS FOR (n:{label}) ON (n.{prop}) "
+        "OPTIONS {indexConfig: {`vector.dimensions`: $dim, `vector.similarity_function`: $sim}}"
+    )
+
 
 def _to_dict(record) -> Dict[str, Any]:
-# Flatten a neo4j.Record into a regular dict
-d = {}
-for k in record.keys():
-v = record[k]
-try:
-d[k] = dict(v)
-except Exception:
-d[k] = v
-return d
+    # Flatten a neo4j.Record into a regular dict; nodes and relationships
+    # become their property dicts, everything else (lists included) is kept.
+    d = {}
+    for k in record.keys():
+        v = record[k]
+        d[k] = dict(v) if isinstance(v, (Node, Relationship)) else v
+    return d
+
 
+@dataclass
+class Neo4jConfig:
+    uri: str
+    user: str
+    password: str
+    database: str = DEFAULT_DB
+    max_retries: int = 4
+    retry_backoff: float = 0.5
+    # Connection pool tuning (passed straight to GraphDatabase.driver)
+    max_connection_pool_size: int = 100
+    connection_acquisition_timeout: float = 60.0
+    connection_timeout: float = 30.0
+    max_connection_lifetime: float = 3600.0
 
+    @staticmethod
+    def from_env(prefix: str = "NEO4J_") -> "Neo4jConfig":
+        uri = os.getenv(f"{prefix}URI") or os.getenv(f"{prefix}URL")
+        if not uri:
+            # support Aura style bolt+s routing
+            uri = "bolt://localhost:7687"
+        return Neo4jConfig(
+            uri=uri,
+            user=os.getenv(f"{prefix}USER", "neo4j"),
+            password=os.getenv(f"{prefix}PASSWORD", "password"),
+            database=os.getenv(f"{prefix}DATABASE", DEFAULT_DB),
+            max_connection_pool_size=int(os.getenv(f"{prefix}POOL_SIZE", "100")),
+            connection_acquisition_timeout=float(os.getenv(f"{prefix}ACQUISITION_TIMEOUT", "60")),
+        )
 
 
 @dataclass
-class Neo4jConfig:
-uri: str
-user: str
-password: str
-database: str = DEFAULT_DB
-max_retries: int = 4
-retry_backoff: float = 0.5
-
-
-@staticmethod
-def from_env(prefix: str = "NEO4J_") -> "Neo4jConfig":
-uri = os.getenv(f"{prefix}URI") or os.getenv(f"{prefix}URL")
-if not uri:
-# support Aura style bolt+s routing
-uri = "bolt://localhost:7687"
-return Neo4jConfig(
-uri=uri,
-user=os.getenv(f"{prefix}USER", "neo4j"),
-password=os.getenv(f"{prefix}PASSWORD", "password"),
-database=os.getenv(f"{prefix}DATABASE", DEFAULT_DB),
-)
+class ClientMetrics:
+    reads: int = 0
+    transactions: int = 0
+    rows_written: int = 0
+    retries: int = 0
+    failures: int = 0
+    # Time from asking for a transaction until its function starts running:
+    # pool acquisition plus BEGIN, i.e. what callers wait before doing work.
+    pool_wait_s: float = 0.0
+    pool_wait_max_s: float = 0.0
+    tx_s: float = 0.0
+    tx_max_s: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def observe_tx(self, wait_s: float, total_s: float, rows: int = 0) -> None:
+        with self._lock:
+            self.transactions += 1
+            self.rows_written += rows
+            self.pool_wait_s += wait_s
+            self.pool_wait_max_s = max(self.pool_wait_max_s, wait_s)
+            self.tx_s += total_s
+            self.tx_max_s = max(self.tx_max_s, total_s)
 
+    def add(self, **counts: int) -> None:
+        with self._lock:
+            for k, v in counts.items():
+                setattr(self, k, getattr(self, k) + v)
 
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            d = {f.name: getattr(self, f.name) for f in fields(self) if not f.name.startswith("_")}
+        n = d["transactions"] or 1
+        d["pool_wait_avg_s"] = d["pool_wait_s"] / n
+        d["tx_avg_s"] = d["tx_s"] / n
+        return d
+
+
+def _batched(rows: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch: List[Dict[str, Any]] = []
+    for r in rows:
+        batch.append(r)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
 
 
 class Neo4jClient:
-def __init__(self, cfg: Neo4jConfig):
-self.cfg = cfg
-self._driver = GraphDatabase.driver(cfg.uri, auth=basic_auth(cfg.user, cfg.password))
+    """
+    Thin wrapper over the sync driver.
+
+    - `run` reuses one session per thread for read-heavy paths
+    - `write` / `write_batches` use managed write transactions and retry
+      TransientError / ServiceUnavailable with jittered exponential backoff
+    - `metrics` tracks pool wait, transaction latency, retries and rows
+    Pass `driver=` to inject a fake (see databases/neo4j_fakes.py).
+    """
+
+    def __init__(self, cfg: Neo4jConfig, driver=None):
+        self.cfg = cfg
+        self._driver = driver or GraphDatabase.driver(
+            cfg.uri,
+            auth=basic_auth(cfg.user, cfg.password),
+            max_connection_pool_size=cfg.max_connection_pool_size,
+            connection_acquisition_timeout=cfg.connection_acquisition_timeout,
+            connection_timeout=cfg.connection_timeout,
+            max_connection_lifetime=cfg.max_connection_lifetime,
+        )
+        self.metrics = ClientMetrics()
+        self._local = threading.local()
+        self._sessions: List[Any] = []
+        self._sessions_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, prefix: str = "NEO4J_") -> "Neo4jClient":
+        return cls(Neo4jConfig.from_env(prefix))
+
+    def close(self) -> None:
+        with self._sessions_lock:
+            for s in self._sessions:
+                s.close()
+            self._sessions.clear()
+        self._driver.close()
+
+    @contextmanager
+    def session(self):
+        s = self._driver.session(database=self.cfg.database)
+        try:
+            yield s
+        finally:
+            s.close()
+
+    def _reader(self):
+        # Sessions are not thread-safe, so reuse one per thread.
+        s = getattr(self._local, "session", None)
+        if s is None:
+            s = self._driver.session(database=self.cfg.database)
+            self._local.session = s
+            with self._sessions_lock:
+                self._sessions.append(s)
+        return s
+
+    def _drop_reader(self) -> None:
+        s = getattr(self._local, "session", None)
+        self._local.session = None
+        if s is not None:
+            with self._sessions_lock:
+                if s in self._sessions:
+                    self._sessions.remove(s)
+            s.close()
+
+    def run(self, cypher: str, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        try:
+            rows = [_to_dict(r) for r in self._reader().run(cypher, params or {})]
+        except Exception:
+            self._drop_reader()  # never reuse a session in an unknown state
+            raise
+        self.metrics.add(reads=1)
+        return rows
+
+    def _execute_write(self, session, cypher: str, params: Dict[str, Any], rows: int = 0) -> List[Dict[str, Any]]:
+        attempt = 0
+        while True:
+            t0 = time.perf_counter()
+            started: List[float] = []
+
+            def _tx(tx):
+                if not started:
+                    started.append(time.perf_counter())
+                return [_to_dict(r) for r in tx.run(cypher, params)]
+
+            try:
+                out = session.execute_write(_tx)
+            except (TransientError, ServiceUnavailable):
+                if attempt >= self.cfg.max_retries:
+                    self.metrics.add(failures=1)
+                    raise
+                delay = self.cfg.retry_backoff * (2 ** attempt)
+                time.sleep(random.uniform(0.5 * delay, 1.5 * delay))  # jitter
+                attempt += 1
+                self.metrics.add(retries=1)
+                continue
+            end = time.perf_counter()
+            self.metrics.observe_tx((started[0] if started else end) - t0, end - t0, rows)
+            return out
+
+    def write(self, cypher: str, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        with self.session() as s:
+            return self._execute_write(s, cypher, params or {})
+
+    def write_batches(
+        self, cypher: str, rows_iter: Iterable[Dict[str, Any]], batch_size: int = 1000, param: str = "rows"
+    ) -> int:
+        """Write `rows_iter` as `$rows` batches, one retried transaction each; returns rows written."""
+        written = 0
+        with self.session() as s:
+            for batch in _batched(rows_iter, batch_size):
+                self._execute_write(s, cypher, {param: batch}, rows=len(batch))
+                written += len(batch)
+        return written
+
+    def ensure_constraints(self) -> None:
+        for cypher in CONSTRAINTS:
+            self.write(cypher)
+
+    def create_vector_index(
+        self, name: str, dim: int, label: str = "Chunk", prop: str = "embedding", similarity: str = "cosine"
+    ) -> None:
+        self.write(_vector_index_cypher(name, label, prop), {"dim": dim, "sim": similarity})
+
+
+class AsyncNeo4jClient:
+    """
+    asyncio counterpart of Neo4jClient on the neo4j async driver.
+
+    Same `run` / `write` / `write_batches` / `ensure_constraints` /
+    `create_vector_index` surface, awaitable. Each call takes its own session
+    (async sessions must not be shared between concurrent tasks); connections
+    still come from the driver's pool, sized by the same Neo4jConfig fields.
+    """
+
+    def __init__(self, cfg: Neo4jConfig, driver=None):
+        self.cfg = cfg
+        self._driver = driver or AsyncGraphDatabase.driver(
+            cfg.uri,
+            auth=basic_auth(cfg.user, cfg.password),
+            max_connection_pool_size=cfg.max_connection_pool_size,
+            connection_acquisition_timeout=cfg.connection_acquisition_timeout,
+            connection_timeout=cfg.connection_timeout,
+            max_connection_lifetime=cfg.max_connection_lifetime,
+        )
+        self.metrics = ClientMetrics()
+
+    @classmethod
+    def from_env(cls, prefix: str = "NEO4J_") -> "AsyncNeo4jClient":
+        return cls(Neo4jConfig.from_env(prefix))
+
+    async def close(self) -> None:
+        await self._driver.close()
+
+    async def run(self, cypher: str, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        async with self._driver.session(database=self.cfg.database) as s:
+            result = await s.run(cypher, params or {})
+            rows = [_to_dict(r) async for r in result]
+        self.metrics.add(reads=1)
+        return rows
+
+    async def _execute_write(self, session, cypher: str, params: Dict[str, Any], rows: int = 0) -> List[Dict[str, Any]]:
+        attempt = 0
+        while True:
+            t0 = time.perf_counter()
+            started: List[float] = []
+
+            async def _tx(tx):
+                if not started:
+                    started.append(time.perf_counter())
+                result = await tx.run(cypher, params)
+                return [_to_dict(r) async for r in result]
+
+            try:
+                out = await session.execute_write(_tx)
+            except (TransientError, ServiceUnavailable):
+                if attempt >= self.cfg.max_retries:
+                    self.metrics.add(failures=1)
+                    raise
+                delay = self.cfg.retry_backoff * (2 ** attempt)
+                await asyncio.sleep(random.uniform(0.5 * delay, 1.5 * delay))
+                attempt += 1
+                self.metrics.add(retries=1)
+                continue
+            end = time.perf_counter()
+            self.metrics.observe_tx((started[0] if started else end) - t0, end - t0, rows)
+            return out
+
+    async def write(self, cypher: str, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        async with self._driver.session(database=self.cfg.database) as s:
+            return await self._execute_write(s, cypher, params or {})
+
+    async def write_batches(
+        self, cypher: str, rows_iter: Iterable[Dict[str, Any]], batch_size: int = 1000, param: str = "rows"
+    ) -> int:
+        written = 0
+        async with self._driver.session(database=self.cfg.database) as s:
+            for batch in _batched(rows_iter, batch_size):
+                await self._execute_write(s, cypher, {param: batch}, rows=len(batch))
+                written += len(batch)
+        return written
 
+    async def ensure_constraints(self) -> None:
+        for cypher in CONSTRAINTS:
+            await self.write(cypher)
 
-@classmethod
-def from_env(cls, prefix: str = "NEO4J_") -> "Neo4jClient":
-pass
+    async def create_vector_index(
+        self, name: str, dim: int, label: str = "Chunk", prop: str = "embedding", similarity: str = "cosine"
+    ) -> None:
+        await self.write(_vector_index_cypher(name, label, prop), {"dim": dim, "sim": similarity})
@@ -0,0 +1,178 @@
+"""
+In-process stand-ins for the neo4j driver, for exercising Neo4jClient
+without a server:
+
+    drv = FakeDriver(handler=lambda cypher, params: [{"n": 1}], fail_first=2)
+    client = Neo4jClient(Neo4jConfig("bolt://fake", "u", "p", retry_backoff=0.0), driver=drv)
+
+FakeAsyncDriver does the same for AsyncNeo4jClient.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from neo4j.exceptions import TransientError
+
+
+Handler = Callable[[str, Dict[str, Any]], List[Dict[str, Any]]]
+
+
+class FakeRecord(dict):
+    """dict that also offers neo4j.Record's keys()/[] access used by _to_dict."""
+
+
+class FakeTx:
+    def __init__(self, driver: "FakeDriver"):
+        self.driver = driver
+
+    def run(self, cypher: str, params: Optional[Dict[str, Any]] = None, **kw):
+        return self.driver._run(cypher, {**(params or {}), **kw})
+
+
+class FakeSession:
+    def __init__(self, driver: "FakeDriver", database: Optional[str] = None):
+        self.driver = driver
+        self.database = database
+        self.closed = False
+
+    def run(self, cypher: str, params: Optional[Dict[str, Any]] = None, **kw):
+        return self.driver._run(cypher, {**(params or {}), **kw})
+
+    def execute_write(self, fn, *args, **kwargs):
+        return self._execute(fn, *args, **kwargs)
+
+    def execute_read(self, fn, *args, **kwargs):
+        return self._execute(fn, *args, **kwargs)
+
+    def _execute(self, fn, *args, **kwargs):
+        d = self.driver
+        time.sleep(d.acquire_latency)
+        with d._lock:
+            d.transactions += 1
+            fail = d.fail_first > 0
+            if fail:
+                d.fail_first -= 1
+        if fail:
+            raise TransientError("fake transient failure")
+        return fn(FakeTx(d), *args, **kwargs)
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class FakeDriver:
+    """
+    Records every query; `handler(cypher, params)` supplies result rows.
+
+    - `fail_first` transactions raise TransientError (to exercise retries)
+    - `acquire_latency` / `query_latency` simulate pool wait and server time
+    """
+
+    def __init__(
+        self,
+        handler: Optional[Handler] = None,
+        fail_first: int = 0,
+        acquire_latency: float = 0.0,
+        query_latency: float = 0.0,
+    ):
+        self.handler = handler or (lambda cypher, params: [])
+        self.fail_first = fail_first
+        self.acquire_latency = acquire_latency
+        self.query_latency = query_latency
+        self.queries: List[Tuple[str, Dict[str, Any]]] = []
+        self.sessions: List[FakeSession] = []
+        self.transactions = 0
+        self.closed = False
+        self._lock = threading.Lock()
+
+    def session(self, database: Optional[str] = None, **_) -> FakeSession:
+        s = FakeSession(self, database)
+        with self._lock:
+            self.sessions.append(s)
+        return s
+
+    def _run(self, cypher: str, params: Dict[str, Any]) -> List[FakeRecord]:
+        time.sleep(self.query_latency)
+        with self._lock:
+            self.queries.append((cypher, params))
+        return [FakeRecord(r) for r in self.handler(cypher, params)]
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class _FakeAsyncResult:
+    def __init__(self, records: List[FakeRecord]):
+        self._records = records
+
+    def __aiter__(self):
+        self._it = iter(self._records)
+        return self
+
+    async def __anext__(self) -> FakeRecord:
+        try:
+            return next(self._it)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeAsyncTx:
+    def __init__(self, driver: "FakeAsyncDriver"):
+        self.driver = driver
+
+    async def run(self, cypher: str, params: Optional[Dict[str, Any]] = None, **kw):
+        return await self.driver._arun(cypher, {**(params or {}), **kw})
+
+
+class FakeAsyncSession:
+    def __init__(self, driver: "FakeAsyncDriver", database: Optional[str] = None):
+        self.driver = driver
+        self.database = database
+
+    async def __aenter__(self) -> "FakeAsyncSession":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+    async def run(self, cypher: str, params: Optional[Dict[str, Any]] = None, **kw):
+        return await self.driver._arun(cypher, {**(params or {}), **kw})
+
+    async def execute_write(self, fn, *args, **kwargs):
+        d = self.driver
+        await asyncio.sleep(d.acquire_latency)
+        d.transactions += 1
+        if d.fail_first > 0:
+            d.fail_first -= 1
+            raise TransientError("fake transient failure")
+        return await fn(FakeAsyncTx(d), *args, **kwargs)
+
+    execute_read = execute_write
+
+
+class FakeAsyncDriver(FakeDriver):
+    """Async twin of FakeDriver; latencies are awaited, so concurrency is observable."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def session(self, database: Optional[str] = None, **_) -> FakeAsyncSession:
+        return FakeAsyncSession(self, database)
+
+    async def _arun(self, cypher: str, params: Dict[str, Any]) -> _FakeAsyncResult:
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.query_latency)
+            self.queries.append((cypher, params))
+            return _FakeAsyncResult([FakeRecord(r) for r in self.handler(cypher, params)])
+        finally:
+            self.in_flight -= 1
+
+    async def close(self) -> None:
+        self.closed = True
@@ -0,0 +1,93 @@
+"""
+StreamingChunker (mmap, lazy spans) vs. `simple_chunk` on a large synthetic
+text file: MB/s and peak Python heap while chunking.
+
+`simple_chunk` needs the whole file as one str plus its word list; the
+streaming chunker only holds one scan block and the current chunk.
+
+Run from the repository root:
+    python -m llm.rag.graphrag.benchmarks.chunker_bench --mb 200 --size 800 --overlap 120
+"""
+from __future__ import annotations
+
+import argparse
+import mmap
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Iterable, Tuple
+
+from ..ingestion.chunker import StreamingChunker
+from ..ingestion.document_loader import simple_chunk
+
+
+def write_corpus(path: str, mb: int, seed: int = 0) -> None:
+    rnd = random.Random(seed)
+    vocab = [f"w{i}" for i in range(20_000)] + ["naïve", "über", "東京", "données"]
+    target = mb << 20
+    with open(path, "w", encoding="utf-8") as f:
+        written = 0
+        while written < target:
+            para = []
+            for _ in range(rnd.randint(2, 8)):
+                para.append(" ".join(rnd.choices(vocab, k=rnd.randint(5, 40))) + rnd.choice(".?!"))
+            block = " ".join(para) + "\n\n"
+            f.write(block)
+            written += len(block.encode("utf-8"))
+
+
+def run(fn: Callable[[], Iterable], trace: bool) -> Tuple[float, int, int]:
+    if trace:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    n = 0
+    for _ in fn():
+        n += 1
+    seconds = time.perf_counter() - t0
+    peak = 0
+    if trace:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return seconds, n, peak
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--mb", type=int, default=200, help="synthetic corpus size")
+    p.add_argument("--size", type=int, default=800)
+    p.add_argument("--overlap", type=int, default=120)
+    p.add_argument("--path", default=None, help="chunk this file instead of a synthetic one")
+    args = p.parse_args()
+
+    path = args.path
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(prefix="chunkbench-"), "corpus.txt")
+        write_corpus(path, args.mb)
+    mb = os.path.getsize(path) / (1 << 20)
+    chunker = StreamingChunker(args.size, args.overlap)
+
+    def simple():
+        with open(path, "r", encoding="utf-8") as f:
+            return simple_chunk(f.read(), args.size, args.overlap)
+
+    def streaming_spans():
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            yield from chunker.spans(buf)
+
+    cases = {
+        "simple_chunk": simple,
+        "streaming (spans)": streaming_spans,
+        "streaming (text)": lambda: chunker.file_chunks(path),
+    }
+    print(f"corpus: {mb:.0f} MB")
+    print(f"{'chunker':<20} {'chunks':>8} {'seconds':>8} {'MB/s':>7} {'peak heap MB':>13}")
+    for name, fn in cases.items():
+        seconds, n, _ = run(fn, trace=False)
+        _, _, peak = run(fn, trace=True)
+        print(f"{name:<20} {n:>8} {seconds:>8.2f} {mb / seconds:>7.1f} {peak / (1 << 20):>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+k-hop expansion: in-process `AdjacencySnapshot` vs. the Cypher traversal.
+
+Synthetic mode (default) builds a graph with Zipf-distributed entity
+popularity, so a few hub entities are mentioned and related everywhere, and
+compares the snapshot against an uncapped set-based BFS with the same
+semantics as `[:RELATES*0..hops]` (a lower bound on what Cypher does).
+`--live` instead times `GraphRetriever._expand_candidates` on the database
+from NEO4J_* env vars, with and without the snapshot.
+
+Run from the repository root:
+    python -m llm.rag.graphrag.benchmarks.expansion_bench --chunks 50000 --entities 20000 --hops 1 2 3
+    python -m llm.rag.graphrag.benchmarks.expansion_bench --live --hops 2
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from collections import defaultdict
+from typing import Dict, List, Set
+
+import numpy as np
+
+from databases.neo4j_client import Neo4jClient, Neo4jConfig
+from databases.neo4j_fakes import FakeDriver
+from ..retrievers.adjacency import CHUNK_MENTIONS_CYPHER, RELATES_CYPHER, AdjacencySnapshot
+from ..retrievers.graph_walk import GraphRetriever
+
+
+def synthetic_graph(n_chunks: int, n_entities: int, mentions: int, relations: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    pop = 1.0 / np.arange(1, n_entities + 1) ** 1.1
+    pop /= pop.sum()
+    chunk_rows = [
+        {"chunk": f"c{i}", "entities": [f"e{e}" for e in set(rng.choice(n_entities, mentions, p=pop))], "ts": 1}
+        for i in range(n_chunks)
+    ]
+    src = rng.choice(n_entities, relations, p=pop)
+    dst = rng.choice(n_entities, relations, p=pop)
+    rel_rows = [{"a": f"e{a}", "b": f"e{b}", "ts": 1} for a, b in zip(src, dst) if a != b]
+    return chunk_rows, rel_rows
+
+
+def _fake_client(chunk_rows: List[Dict], rel_rows: List[Dict]) -> Neo4jClient:
+    def handler(cypher, params):
+        if cypher == CHUNK_MENTIONS_CYPHER:
+            return chunk_rows if params["wm"] < 0 else []
+        if cypher == RELATES_CYPHER:
+            return rel_rows if params["wm"] < 0 else []
+        return []
+
+    return Neo4jClient(Neo4jConfig("bolt://fake", "u", "p"), driver=FakeDriver(handler))
+
+
+def reference_expand(chunk_rows: List[Dict], rel_rows: List[Dict]):
+    c2e: Dict[str, List[str]] = {r["chunk"]: r["entities"] for r in chunk_rows}
+    e2c: Dict[str, List[str]] = defaultdict(list)
+    for r in chunk_rows:
+        for e in r["entities"]:
+            e2c[e].append(r["chunk"])
+    nbrs: Dict[str, Set[str]] = defaultdict(set)
+    for r in rel_rows:
+        nbrs[r["a"]].add(r["b"])
+        nbrs[r["b"]].add(r["a"])
+
+    def expand(seed_ids: List[str], hops: int, limit: int) -> List[str]:
+        seen = {e for c in seed_ids for e in c2e.get(c, ())}
+        frontier = set(seen)
+        for _ in range(hops):
+            frontier = {n for e in frontier for n in nbrs[e]} - seen
+            seen |= frontier
+        seeds = set(seed_ids)
+        out: List[str] = []
+        for e in seen:
+            for c in e2c[e]:
+                if c not in seeds:
+                    out.append(c)
+        # DISTINCT ... LIMIT k still has to materialise the whole frontier.
+        return list(dict.fromkeys(out))[:limit]
+
+    return expand
+
+
+def _time_per_call(fn, seeds: List[List[str]]) -> float:
+    t0 = time.perf_counter()
+    for s in seeds:
+        fn(s)
+    return (time.perf_counter() - t0) / len(seeds)
+
+
+def run_synthetic(args) -> None:
+    chunk_rows, rel_rows = synthetic_graph(args.chunks, args.entities, args.mentions, args.relations)
+    t0 = time.perf_counter()
+    snap = AdjacencySnapshot(_fake_client(chunk_rows, rel_rows), max_fanout=args.fanout, max_degree=args.max_degree).load()
+    load_s = time.perf_counter() - t0
+    mem = snap.memory()
+    print(
+        f"snapshot: {mem['chunks']} chunks, {mem['entities']} entities, {mem['mentions']} mentions, "
+        f"{mem['relations']} relations; load {load_s:.2f}s; "
+        f"csr {mem['csr_bytes'] / 2**20:.1f} MiB, total {mem['total_bytes'] / 2**20:.1f} MiB"
+    )
+    ref = reference_expand(chunk_rows, rel_rows)
+    rnd = random.Random(0)
+    seeds = [[f"c{rnd.randrange(args.chunks)}" for _ in range(args.seeds)] for _ in range(args.queries)]
+
+    print(f"{'hops':>4} {'reference ms':>13} {'snapshot ms':>12} {'speedup':>8}")
+    for h in args.hops:
+        ref_s = _time_per_call(lambda s: ref(s, h, args.k), seeds)
+        snap_s = _time_per_call(lambda s: snap.expand(s, h, args.k), seeds)
+        print(f"{h:>4} {ref_s * 1e3:>13.2f} {snap_s * 1e3:>12.3f} {ref_s / snap_s:>7.1f}x")
+
+
+def run_live(args) -> None:
+    neo = Neo4jClient.from_env()
+    t0 = time.perf_counter()
+    snap = AdjacencySnapshot(neo, max_fanout=args.fanout, max_degree=args.max_degree).load()
+    mem = snap.memory()
+    print(f"snapshot load {time.perf_counter() - t0:.2f}s, {mem['total_bytes'] / 2**20:.1f} MiB: {mem}")
+    ids = [r["id"] for r in neo.run("MATCH (c:Chunk) RETURN c.id AS id LIMIT 10000")]
+    rnd = random.Random(0)
+    seeds = [rnd.sample(ids, min(args.seeds, len(ids))) for _ in range(args.queries)]
+
+    print(f"{'hops':>4} {'cypher ms':>10} {'snapshot ms':>12} {'speedup':>8}")
+    for h in args.hops:
+        cypher = GraphRetriever(neo, None, top_k=args.k, expand_hops=h)
+        local = GraphRetriever(neo, None, top_k=args.k, expand_hops=h, adjacency=snap)
+        cy_s = _time_per_call(cypher._expand_candidates, seeds)
+        lo_s = _time_per_call(local._expand_candidates, seeds)
+        print(f"{h:>4} {cy_s * 1e3:>10.2f} {lo_s * 1e3:>12.2f} {cy_s / lo_s:>7.1f}x")
+    neo.close()
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--live", action="store_true", help="benchmark against NEO4J_URI instead of a synthetic graph")
+    p.add_argument("--chunks", type=int, default=50_000)
+    p.add_argument("--entities", type=int, default=20_000)
+    p.add_argument("--mentions", type=int, default=6, help="entity mentions sampled per chunk")
+    p.add_argument("--relations", type=int, default=100_000)
+    p.add_argument("--hops", type=int, nargs="+", default=[1, 2, 3])
+    p.add_argument("--seeds", type=int, default=24, help="seed chunks per query")
+    p.add_argument("--queries", type=int, default=50)
+    p.add_argument("--k", type=int, default=12)
+    p.add_argument("--fanout", type=int, default=32)
+    p.add_argument("--max-degree", type=int, default=1000)
+    args = p.parse_args()
+    if args.live:
+        run_live(args)
+    else:
+        run_synthetic(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Texts/sec of the in-process embedding providers on CPU, next to
+SentenceTransformer (the path databases/vector_dbs/qdrant/qdrant.py uses).
+
+Export the model once on a connected machine:
+    python -c "from llm.rag.graphrag.utils.local_embeddings import OnnxEmbedder; \
+OnnxEmbedder.export_onnx('sentence-transformers/all-MiniLM-L6-v2', 'models/minilm')"
+
+Run from the repository root:
+    python -m llm.rag.graphrag.benchmarks.local_embed_bench --model-dir models/minilm --threads 1 4
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from typing import Callable, List, Sequence
+
+import numpy as np
+
+from ..utils.local_embeddings import HashingEmbedder, OnnxEmbedder
+
+
+def synthetic_texts(n: int, seed: int = 0) -> List[str]:
+    rnd = random.Random(seed)
+    vocab = [f"w{i}" for i in range(5000)]
+    # Skewed lengths, like real chunks: many short, a few near the limit.
+    return [" ".join(rnd.choices(vocab, k=min(int(rnd.paretovariate(1.2) * 20), 250))) for _ in range(n)]
+
+
+def timed(embed: Callable[[Sequence[str]], List[List[float]]], texts: List[str]):
+    embed(texts[:32])  # warm-up
+    t0 = time.perf_counter()
+    vecs = np.asarray(embed(texts), dtype=np.float32)
+    return time.perf_counter() - t0, vecs
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--model-dir", default=None, help="directory from OnnxEmbedder.export_onnx()")
+    p.add_argument("--st-model", default="all-MiniLM-L6-v2", help="SentenceTransformer baseline ('' to skip)")
+    p.add_argument("--texts", type=int, default=2000)
+    p.add_argument("--batch-size", type=int, default=64)
+    p.add_argument("--threads", type=int, nargs="+", default=[1, 4])
+    args = p.parse_args()
+
+    texts = synthetic_texts(args.texts)
+    print(f"{'provider':<28} {'seconds':>8} {'texts/sec':>10} {'cos vs ref':>11}")
+
+    def report(name: str, seconds: float, vecs: np.ndarray, ref) -> None:
+        agree = f"{float(np.mean(np.sum(vecs * ref, axis=1))):>11.4f}" if ref is not None else f"{'-':>11}"
+        print(f"{name:<28} {seconds:>8.2f} {len(texts) / seconds:>10.0f} {agree}")
+
+    ref = None
+    if args.st_model:
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            print("sentence-transformers not installed; skipping baseline")
+        else:
+            st = SentenceTransformer(args.st_model, device="cpu")
+            seconds, ref = timed(
+                lambda xs: st.encode(list(xs), batch_size=args.batch_size, normalize_embeddings=True), texts
+            )
+            report("SentenceTransformer", seconds, ref, None)
+
+    if args.model_dir:
+        for quantize in (False, True):
+            for threads in args.threads:
+                emb = OnnxEmbedder(args.model_dir, batch_size=args.batch_size, threads=threads, quantize=quantize)
+                seconds, vecs = timed(emb.embed, texts)
+                report(f"onnx {'int8' if quantize else 'fp32'} threads={threads}", seconds, vecs, ref)
+
+    seconds, vecs = timed(HashingEmbedder(384).embed, texts)
+    report("hashing dim=384", seconds, vecs, None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Bulk QA scoring vs. the per-pair `exact_match` / `f1` loop on synthetic
+generated answers with 1-3 gold answers per question.
+
+Cases: the Python loop, `bulk_scores` once per run (gold answers encoded
+on every call), and one BulkScorer reused across `--runs` model runs (gold
+answers encoded once), serial and with a worker pool kept across runs.
+Also times bootstrap confidence intervals.
+
+Run from the repository root:
+    python -m llm.rag.graphrag.benchmarks.qa_eval_bench --questions 300000 --runs 10 --workers 8
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+from ..eval.qa_eval import BulkScorer, bootstrap_ci, bulk_scores, exact_match, f1
+
+
+def synthetic(n: int, max_tokens: int, runs: int, seed: int = 0) -> Tuple[List[List[str]], List[List[str]]]:
+    rnd = random.Random(seed)
+    vocab = [f"t{i}" for i in range(20_000)] + ["The", "the", "a", "of"]
+
+    def text() -> str:
+        return " ".join(rnd.choices(vocab, k=rnd.randint(1, max_tokens)))
+
+    golds = [[text() for _ in range(rnd.randint(1, 3))] for _ in range(n)]
+    preds = []
+    for _ in range(runs):
+        # Roughly a third exact, a third partial overlap, a third unrelated.
+        run = []
+        for gs in golds:
+            r = rnd.random()
+            g = rnd.choice(gs)
+            run.append(g.upper() if r < 0.33 else " ".join(g.split()[:2]) + " " + text() if r < 0.66 else text())
+        preds.append(run)
+    return preds, golds
+
+
+def loop_scores(preds: List[str], golds: List[List[str]]) -> Tuple[np.ndarray, np.ndarray]:
+    em = [max(exact_match(p, g) for g in gs) for p, gs in zip(preds, golds)]
+    f = [max(f1(p.lower().split(), g.lower().split()) for g in gs) for p, gs in zip(preds, golds)]
+    return np.array(em), np.array(f)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--questions", type=int, default=300_000)
+    p.add_argument("--max-tokens", type=int, default=20, help="longest synthetic answer")
+    p.add_argument("--runs", type=int, default=10, help="model runs scored against the same gold set")
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    p.add_argument("--chunk-size", type=int, default=50_000)
+    p.add_argument("--boot", type=int, default=2000)
+    args = p.parse_args()
+
+    runs, golds = synthetic(args.questions, args.max_tokens, args.runs)
+    print(f"{args.questions} questions, {args.runs} runs")
+
+    t0 = time.perf_counter()
+    ref = [loop_scores(r, golds) for r in runs]
+    loop_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    one_off = [bulk_scores(r, golds, args.chunk_size) for r in runs]
+    bulk_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    reused = [scorer.score(r) for scorer in [BulkScorer(golds, args.chunk_size)] for r in runs]
+    reuse_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    with BulkScorer(golds, args.chunk_size, workers=args.workers) as scorer:
+        pooled = [scorer.score(r) for r in runs]
+    pool_s = time.perf_counter() - t0
+
+    for (em, f), *others in zip(ref, one_off, pooled, reused):
+        assert all(np.allclose(o.em, em) and np.allclose(o.f1, f) for o in others)
+
+    print(f"{'scorer':<28} {'seconds':>8} {'answers/s':>11} {'speedup':>8}")
+    total = args.questions * args.runs
+    for name, s in (
+        ("per-pair loop", loop_s),
+        ("bulk_scores per run", bulk_s),
+        ("BulkScorer reused", reuse_s),
+        (f"BulkScorer ({args.workers} workers)", pool_s),
+    ):
+        print(f"{name:<28} {s:>8.2f} {total / s:>11.0f} {loop_s / s:>7.1f}x")
+
+    t0 = time.perf_counter()
+    for r in reused:
+        bootstrap_ci(r.f1, args.boot)
+    print(f"bootstrap CI ({args.boot} replicates): {(time.perf_counter() - t0) / len(reused) * 1e3:.1f} ms per run")
+
+
+if __name__ == "__main__":
+    main()
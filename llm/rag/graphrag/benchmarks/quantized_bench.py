@@ -0,0 +1,122 @@
+"""
+Quantized candidate scoring vs. the float path: recall@k and Bolt bytes per query.
+
+Runs GraphRetriever's real cosine paths against a FakeDriver holding a
+synthetic clustered corpus. The handler tallies the PackStream size of every
+result it returns, so bytes/query reflect what would cross the wire.
+
+Run from the repository root:
+    python -m llm.rag.graphrag.benchmarks.quantized_bench --dim 768 --candidates 60 --rescore 0 10 20
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+from typing import Any, Dict, List
+
+import numpy as np
+
+from databases.neo4j_client import Neo4jClient, Neo4jConfig
+from databases.neo4j_fakes import FakeDriver
+from ..retrievers.graph_walk import EMBEDDINGS_CYPHER, GraphRetriever
+from ..retrievers.quantized import MmapQuantizedStore, NodeQuantizedStore, quantize
+
+
+def packstream_size(v: Any) -> int:
+    """Approximate PackStream encoding size of a result value."""
+    if v is None or isinstance(v, bool):
+        return 1
+    if isinstance(v, int):
+        return 1 if -16 <= v < 128 else 9
+    if isinstance(v, float):
+        return 9
+    if isinstance(v, str):
+        n = len(v.encode("utf-8"))
+        return n + (1 if n < 16 else 2 if n < 256 else 3)
+    if isinstance(v, (bytes, bytearray)):
+        return len(v) + (2 if len(v) < 256 else 3 if len(v) < 65536 else 5)
+    if isinstance(v, (list, tuple)):
+        return (1 if len(v) < 16 else 3) + sum(packstream_size(x) for x in v)
+    if isinstance(v, dict):
+        return 1 + sum(packstream_size(k) + packstream_size(x) for k, x in v.items())
+    raise TypeError(type(v))
+
+
+def synthetic_corpus(n: int, dim: int, clusters: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    x = centers[rng.integers(0, clusters, n)] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+    return x
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--dim", type=int, default=768)
+    p.add_argument("--corpus", type=int, default=20_000)
+    p.add_argument("--clusters", type=int, default=200)
+    p.add_argument("--candidates", type=int, default=60, help="fused candidates reranked per query")
+    p.add_argument("--queries", type=int, default=200)
+    p.add_argument("--k", type=int, default=12)
+    p.add_argument("--rescore", type=int, nargs="+", default=[0, 10, 20, 40])
+    args = p.parse_args()
+
+    x = synthetic_corpus(args.corpus, args.dim, args.clusters)
+    ids = [f"c{i}" for i in range(args.corpus)]
+    by_id = dict(zip(ids, range(args.corpus)))
+    floats = x.tolist()
+    codes = {kind: quantize(x, kind)[0] for kind in ("int8", "binary")}
+    wire = {"bytes": 0}
+
+    def handler(cypher: str, params: Dict) -> List[Dict]:
+        rows = []
+        if cypher == EMBEDDINGS_CYPHER:
+            rows = [{"id": i, "emb": floats[by_id[i]]} for i in params["ids"]]
+        elif cypher == NodeQuantizedStore.CYPHER:
+            kind = handler.kind
+            rows = [{"id": i, "q": codes[kind][by_id[i]].tobytes()} for i in params["ids"]]
+        wire["bytes"] += sum(packstream_size(r) for r in rows)
+        return rows
+
+    neo = Neo4jClient(Neo4jConfig("bolt://fake", "u", "p"), driver=FakeDriver(handler))
+    side_dir = tempfile.mkdtemp(prefix="qbench-")
+    side = MmapQuantizedStore(side_dir, args.dim, "int8")
+    side.put(ids, x)
+
+    rng = np.random.default_rng(1)
+    queries = []
+    for _ in range(args.queries):
+        q = x[rng.integers(args.corpus)] + 0.3 * rng.standard_normal(args.dim).astype(np.float32)
+        cand = [ids[i] for i in rng.choice(args.corpus, args.candidates, replace=False)]
+        queries.append((q.tolist(), cand))
+
+    def top_k(cos: Dict[str, float]) -> List[str]:
+        return sorted(cos, key=cos.get, reverse=True)[: args.k]
+
+    base = GraphRetriever(neo, None)
+    wire["bytes"] = 0
+    reference = [top_k(base._batch_cosines([q], [c])[0]) for q, c in queries]
+    float_bytes = wire["bytes"] / len(queries)
+    print(f"{'mode':<14} {'rescore':>7} {f'recall@{args.k}':>10} {'bytes/query':>12} {'vs float':>9}")
+    print(f"{'float':<14} {'-':>7} {1.0:>10.3f} {float_bytes:>12.0f} {1.0:>8.2f}x")
+
+    stores = {
+        "int8 (node)": NodeQuantizedStore(neo, args.dim, "int8"),
+        "binary (node)": NodeQuantizedStore(neo, args.dim, "binary"),
+        "int8 (mmap)": side,
+    }
+    for name, store in stores.items():
+        handler.kind = store.kind
+        for n in args.rescore:
+            r = GraphRetriever(neo, None, quantized=store, rescore_n=n)
+            wire["bytes"] = 0
+            recall = 0.0
+            for (q, cand), ref in zip(queries, reference):
+                recall += len(set(top_k(r._quantized_cosines(q, cand))) & set(ref)) / args.k
+            b = wire["bytes"] / len(queries)
+            ratio = f"{float_bytes / b:>8.1f}x" if b else f"{'local':>9}"
+            print(f"{name:<14} {n:>7} {recall / len(queries):>10.3f} {b:>12.0f} {ratio}")
+    side.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Micro-benchmark: per-pair `_cosine` vs. `EmbeddingMatrix` reranking.
+
+Run from the repository root:
+    python -m llm.rag.graphrag.benchmarks.rerank_bench --dim 1536 --candidates 100 300 1000
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Callable
+
+import numpy as np
+
+from ..retrievers.graph_walk import _cosine
+from ..retrievers.rerank import EmbeddingMatrix
+
+
+def _best_of(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def run(dim: int, n_candidates: int, n_queries: int, repeat: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    ids = [f"c{i}" for i in range(n_candidates)]
+    # Embeddings come back from Bolt as Python lists, so benchmark on lists.
+    cands = {cid: rng.standard_normal(dim).tolist() for cid in ids}
+    queries = [rng.standard_normal(dim).tolist() for _ in range(n_queries)]
+    q = queries[0]
+
+    loop = _best_of(lambda: {cid: _cosine(q, v) for cid, v in cands.items()}, repeat)
+    single = _best_of(lambda: EmbeddingMatrix.from_mapping(cands).score(q), repeat)
+    matrix = EmbeddingMatrix.from_mapping(cands)
+    score_only = _best_of(lambda: matrix.score(q), repeat)
+    batch = _best_of(lambda: EmbeddingMatrix.from_mapping(cands).score_many(queries), repeat)
+
+    # Sanity check: both paths agree.
+    ref = np.array([_cosine(q, cands[cid]) for cid in ids])
+    max_err = float(np.max(np.abs(ref - matrix.score(q))))
+
+    return {
+        "dim": dim,
+        "candidates": n_candidates,
+        "queries": n_queries,
+        "loop_ms": loop * 1e3,
+        "matrix_ms": single * 1e3,
+        "matrix_score_only_ms": score_only * 1e3,
+        "batch_ms_per_query": batch * 1e3 / n_queries,
+        "speedup": loop / single if single else float("inf"),
+        "max_abs_err": max_err,
+    }
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--dim", type=int, default=1536)
+    p.add_argument("--candidates", type=int, nargs="+", default=[100, 300, 1000])
+    p.add_argument("--queries", type=int, default=32, help="batch size for score_many")
+    p.add_argument("--repeat", type=int, default=5)
+    args = p.parse_args()
+
+    header = f"{'dim':>5} {'N':>6} {'loop ms':>9} {'matrix ms':>10} {'score ms':>9} {'batch ms/q':>11} {'speedup':>8} {'max err':>9}"
+    print(header)
+    for n in args.candidates:
+        r = run(args.dim, n, args.queries, args.repeat)
+        print(
+            f"{r['dim']:>5} {r['candidates']:>6} {r['loop_ms']:>9.2f} {r['matrix_ms']:>10.2f} "
+            f"{r['matrix_score_only_ms']:>9.3f} {r['batch_ms_per_query']:>11.3f} {r['speedup']:>7.1f}x {r['max_abs_err']:>9.1e}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Cascade size vs. latency for `Reranker`: sweeps `top_n` and reports p50 /
+p95 stage latencies plus how much of the full-rerank top-k each cascade keeps.
+
+Uses FakeCrossEncoder (cost ~ padded tokens) unless a real model is given.
+
+Run from the repository root:
+    python -m llm.rag.graphrag.benchmarks.rerank_cascade_bench --top-n 10 25 50 100
+    python -m llm.rag.graphrag.benchmarks.rerank_cascade_bench --onnx ce-int8.onnx --budget-ms 80
+"""
+from __future__ import annotations
+
+import argparse
+import random
+from typing import Dict, List
+
+from ..retrievers.ranker import HFCrossEncoder, OnnxCrossEncoder, Reranker
+from ..utils.fakes import FakeCrossEncoder
+
+
+def synthetic_queries(n_queries: int, n_candidates: int, seed: int = 0):
+    rnd = random.Random(seed)
+    vocab = [f"t{i}" for i in range(2000)]
+    out = []
+    for _ in range(n_queries):
+        query = " ".join(rnd.sample(vocab, 4))
+        hits = [
+            {
+                "id": f"c{i}",
+                "text": " ".join(rnd.choice(vocab) for _ in range(rnd.randint(20, 400))) + " " + query.split()[i % 4],
+                "score": 1.0 - i / n_candidates,
+            }
+            for i in range(n_candidates)
+        ]
+        out.append((query, hits))
+    return out
+
+
+def overlap_at_k(a: List[Dict], b: List[Dict], k: int) -> float:
+    return len({h["id"] for h in a[:k]} & {h["id"] for h in b[:k]}) / k
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--top-n", type=int, nargs="+", default=[10, 25, 50, 100])
+    p.add_argument("--candidates", type=int, default=100)
+    p.add_argument("--queries", type=int, default=50)
+    p.add_argument("--k", type=int, default=12)
+    p.add_argument("--batch-size", type=int, default=16)
+    p.add_argument("--budget-ms", type=float, default=None)
+    p.add_argument("--hf", default=None, help="Hugging Face cross-encoder name")
+    p.add_argument("--onnx", default=None, help="path to an exported (optionally int8) ONNX cross-encoder")
+    args = p.parse_args()
+
+    if args.onnx:
+        ce = OnnxCrossEncoder(args.onnx, batch_size=args.batch_size)
+    elif args.hf:
+        ce = HFCrossEncoder(args.hf, batch_size=args.batch_size)
+    else:
+        ce = FakeCrossEncoder(batch_size=args.batch_size)
+    data = synthetic_queries(args.queries, args.candidates)
+    full = Reranker(ce, top_n=args.candidates)
+    reference = [full.rerank(q, hits) for q, hits in data]
+
+    print(f"{'top_n':>6} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'truncated':>10} {f'overlap@{args.k}':>11}")
+    for n in args.top_n:
+        r = Reranker(ce, top_n=n, budget_ms=args.budget_ms)
+        overlap = 0.0
+        truncated = 0
+        for (q, hits), ref in zip(data, reference):
+            ranked, stats = r.rerank_with_stats(q, hits)
+            overlap += overlap_at_k(ranked, ref, args.k)
+            truncated += int(stats["truncated"])
+        t = r.timings.summary()["total"]
+        print(
+            f"{n:>6} {t['p50_ms']:>8.1f} {t['p95_ms']:>8.1f} {t['max_ms']:>8.1f} "
+            f"{truncated:>10} {overlap / len(data):>11.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,263 @@
 from __future__ import annotations
-from typing import List, Dict
-
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from operator import itemgetter
+from typing import List, Dict, NamedTuple, Optional, Sequence, Tuple, Union
 
+import numpy as np
 
 
 def exact_match(pred: str, gold: str) -> float:
-return float(pred.strip().lower() == gold.strip().lower())
+    return float(pred.strip().lower() == gold.strip().lower())
 
 
+def f1(pred_tokens: List[str], gold_tokens: List[str]) -> float:
+    ps, gs = set(pred_tokens), set(gold_tokens)
+    if not ps or not gs:
+        return 0.0
+    p = len(ps & gs) / len(ps)
+    r = len(ps & gs) / len(gs)
+    if p + r == 0:
+        return 0.0
+    return 2 * p * r / (p + r)
 
 
-def f1(pred_tokens: List[str], gold_tokens: List[str]) -> float:
-ps, gs = set(pred_tokens), set(gold_tokens)
-if not ps or not gs:
-return 0.0
-p = len(ps & gs) / len(ps)
-r = len(ps & gs) / len(gs)
-if p + r == 0:
-return 0.0
-return 2 * p * r / (p + r)
+def recall_at_k(retrieved: Sequence[str], relevant: Sequence[str], k: int) -> float:
+    if not relevant:
+        return 0.0
+    return len(set(retrieved[:k]) & set(relevant)) / len(set(relevant))
+
+
+def reciprocal_rank(retrieved: Sequence[str], relevant: Sequence[str]) -> float:
+    rel = set(relevant)
+    for rank, cid in enumerate(retrieved, start=1):
+        if cid in rel:
+            return 1.0 / rank
+    return 0.0
+
+
+# ---- Bulk scoring ----
+
+_SEP = "\x00sep\x00"  # text separator token, id 0 in every vocabulary
+
+
+class BulkScores(NamedTuple):
+    """Per-question EM and F1 (best over each question's gold answers)."""
+
+    em: np.ndarray
+    f1: np.ndarray
+
+    def summary(self, n_boot: int = 1000, confidence: float = 0.95, seed: int = 0) -> Dict[str, float]:
+        out: Dict[str, float] = {"n": int(self.em.size)}
+        for name, scores in (("em", self.em), ("f1", self.f1)):
+            mean, lo, hi = bootstrap_ci(scores, n_boot, confidence, seed)
+            out.update({name: mean, f"{name}_lo": lo, f"{name}_hi": hi})
+        return out
+
+
+def _vocab(base: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+    # Interning dict: one C-level lookup per token, unseen tokens get the
+    # current size as their id.
+    vocab: Dict[str, int] = defaultdict(None, base or {_SEP: 0})
+    vocab.default_factory = vocab.__len__
+    return vocab
+
+
+def _normalised(texts: Sequence[str]) -> List[str]:
+    # exact_match's normalisation, without a Python-level loop.
+    return list(map(str.lower, map(str.strip, texts)))
+
+
+def _lookup(mapping: Dict[str, int], items: List[str]) -> np.ndarray:
+    # itemgetter does every lookup inside one C call, well ahead of
+    # map/fromiter at millions of tokens.
+    if len(items) < 2:
+        return np.array([mapping[t] for t in items], dtype=np.int64)
+    return np.array(itemgetter(*items)(mapping), dtype=np.int64)
+
+
+def _encode(texts: Sequence[str], vocab: Dict[str, int]) -> Tuple[np.ndarray, np.ndarray]:
+    # Sorted unique token ids of every text, concatenated, plus per-text
+    # counts. One join + split keeps all tokens in a single list instead of
+    # one list per text, which also keeps the cyclic GC out of the way.
+    tokens = f" {_SEP} ".join(texts).lower().split()
+    ids = _lookup(vocab, tokens)
+    v = len(vocab)
+    sep = ids == 0
+    keys = np.sort((np.cumsum(sep) * v + ids)[~sep])
+    if keys.size:
+        keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
+    return keys % v, np.bincount(keys // v, minlength=len(texts))
+
+
+def _segments(lengths: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    # Flat positions of the segments `rows` in an array cut into `lengths`.
+    starts = np.cumsum(lengths) - lengths
+    take = lengths[rows]
+    total = int(take.sum())
+    return np.repeat(starts[rows] - (np.cumsum(take) - take), take) + np.arange(total)
+
+
+class _GoldChunk:
+    # Encoded gold answers of one chunk of questions, scored with array ops.
+
+    def __init__(self, golds: Sequence[Union[str, Sequence[str]]]):
+        golds = [[g] if isinstance(g, str) else list(g) for g in golds]
+        flat = [g for gs in golds for g in gs]
+        self.n = len(golds)
+        self._owner = np.repeat(np.arange(self.n), [len(gs) for gs in golds])
+        self._vocab = _vocab()
+        self._g_ids, self._g_len = _encode(flat, self._vocab)
+        self._g_pairs = np.repeat(np.arange(len(flat)), self._g_len)
+        self._names = _vocab()
+        self._g_norm = _lookup(self._names, _normalised(flat))
+        self._has = np.flatnonzero(np.bincount(self._owner, minlength=self.n))
+        self._starts = np.searchsorted(self._owner, self._has)
+
+    def score(self, preds: Sequence[str]) -> BulkScores:
+        owner = self._owner
+        p_norm = np.array(list(map(self._names.get, _normalised(preds), repeat(-1))), dtype=np.int64)
+        em_pair = (p_norm[owner] == self._g_norm).astype(np.float64)
+
+        vocab = _vocab(self._vocab)  # prediction-only tokens stay out of the shared vocabulary
+        p_ids, p_len = _encode(preds, vocab)
+        v = len(vocab)
+        # Key tokens by pair index; keys present on both sides form the
+        # intersection. Both key arrays are sorted, so membership is a
+        # binary search.
+        keys_p = np.repeat(np.arange(owner.size), p_len[owner]) * v + p_ids[_segments(p_len, owner)]
+        keys_g = self._g_pairs * v + self._g_ids
+        if keys_g.size:
+            pos = np.minimum(np.searchsorted(keys_g, keys_p), keys_g.size - 1)
+            common = np.bincount(keys_p[keys_g[pos] == keys_p] // v, minlength=owner.size)
+        else:
+            common = np.zeros(owner.size, dtype=np.int64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            f1_pair = np.where(common > 0, 2.0 * common / (p_len[owner] + self._g_len), 0.0)
+
+        em = np.zeros(self.n)
+        f1s = np.zeros(self.n)
+        if self._has.size:
+            em[self._has] = np.maximum.reduceat(em_pair, self._starts)
+            f1s[self._has] = np.maximum.reduceat(f1_pair, self._starts)
+        return BulkScores(em, f1s)
+
+
+# Worker-process state of a BulkScorer pool: the gold set arrives once per
+# process, and each chunk is encoded the first time that process scores it.
+_worker_golds: List = []
+_worker_chunks: Dict[int, _GoldChunk] = {}
+
+
+def _init_worker(golds: List, chunk_size: int) -> None:
+    global _worker_golds
+    _worker_golds = [golds[s:s + chunk_size] for s in range(0, len(golds), chunk_size)]
+    _worker_chunks.clear()
+
+
+def _score_in_worker(index: int, preds: Sequence[str]) -> BulkScores:
+    chunk = _worker_chunks.get(index)
+    if chunk is None:
+        chunk = _worker_chunks[index] = _GoldChunk(_worker_golds[index])
+    return chunk.score(preds)
+
+
+class BulkScorer:
+    """
+    EM/F1 of whole prediction arrays against a fixed gold set.
+
+    - Same definitions as `exact_match` and `f1` on lower-cased whitespace
+      tokens; with several gold answers per question the best one counts,
+      and a question without gold answers scores 0
+    - Gold answers are normalised and tokenised into integer ids once, so
+      scoring each model run only encodes its predictions
+    - Token-set overlaps of all (prediction, gold) pairs are counted with
+      sorted-key binary searches, EM compares interned normalised strings
+    - Questions are handled `chunk_size` at a time to bound memory. With
+      `workers` > 0 the chunks are scored in a process pool that lives as
+      long as the scorer (`close()` or a `with` block ends it); each worker
+      receives the gold set once and encodes a chunk once
+    """
+
+    def __init__(
+        self, golds: Sequence[Union[str, Sequence[str]]], chunk_size: int = 100_000, workers: int = 0
+    ):
+        golds = list(golds)
+        self.n = len(golds)
+        self.chunk_size = chunk_size
+        self._spans = range(0, self.n, chunk_size)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._chunks: List[_GoldChunk] = []
+        if workers > 0 and len(self._spans) > 1:
+            self._pool = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(golds, chunk_size))
+        else:
+            self._chunks = [_GoldChunk(golds[s:s + chunk_size]) for s in self._spans]
+
+    def score(self, preds: Sequence[str]) -> BulkScores:
+        if len(preds) != self.n:
+            raise ValueError(f"{len(preds)} predictions for {self.n} gold entries")
+        parts = [preds[s:s + self.chunk_size] for s in self._spans]
+        if self._pool is not None:
+            scored = list(self._pool.map(_score_in_worker, range(len(parts)), parts))
+        else:
+            scored = [c.score(p) for c, p in zip(self._chunks, parts)]
+        if not scored:
+            return BulkScores(np.zeros(0), np.zeros(0))
+        return BulkScores(np.concatenate([p.em for p in scored]), np.concatenate([p.f1 for p in scored]))
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self) -> "BulkScorer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def bulk_scores(
+    preds: Sequence[str],
+    golds: Sequence[Union[str, Sequence[str]]],
+    chunk_size: int = 100_000,
+    workers: int = 0,
+) -> BulkScores:
+    """
+    EM/F1 of one run; see BulkScorer. To score several runs against the
+    same gold set, build one BulkScorer and call `score()` per run, so the
+    gold answers are encoded once.
+    """
+    if len(preds) != len(golds):
+        raise ValueError(f"{len(preds)} predictions for {len(golds)} gold entries")
+    with BulkScorer(golds, chunk_size, workers) as scorer:
+        return scorer.score(preds)
+
+
+def bootstrap_ci(
+    scores: Sequence[float], n_boot: int = 1000, confidence: float = 0.95, seed: int = 0,
+    max_cells: int = 20_000_000,
+) -> Tuple[float, float, float]:
+    """
+    (mean, low, high) percentile-bootstrap interval of the mean of `scores`.
+
+    Resampling n items with replacement only matters through how often each
+    distinct score value is drawn, so each replicate is one multinomial
+    draw over the distinct values: the cost scales with n_boot times the
+    number of distinct scores (few for EM/F1), not with n. For a paired
+    comparison of two runs, pass the per-question differences.
+    """
+    a = np.asarray(scores, dtype=np.float64)
+    if a.size == 0:
+        return 0.0, 0.0, 0.0
+    vals, counts = np.unique(a, return_counts=True)
+    rng = np.random.default_rng(seed)
+    block = max(1, max_cells // vals.size)
+    means = np.concatenate([
+        rng.multinomial(a.size, counts / a.size, size=min(block, n_boot - s)) @ vals / a.size
+        for s in range(0, n_boot, block)
+    ])
+    tail = (1.0 - confidence) / 2.0 * 100.0
+    lo, hi = np.percentile(means, [tail, 100.0 - tail])
+    return float(a.mean()), float(lo), float(hi)
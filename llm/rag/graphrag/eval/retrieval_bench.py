@@ -0,0 +1,377 @@
+"""
+Retrieval benchmark: recall@k, MRR and per-stage latency of GraphRetriever
+over a gold relevance set, for a grid of top_k / expand_hops / alpha / fusion.
+
+Gold sets are JSONL, one query per line:
+    {"query": "...", "relevant": ["chunk-id", ...], "answer": "optional"}
+
+By default everything runs in process against a FakeGraphStore (no Neo4j):
+either a synthetic corpus with generated queries, or `--corpus` JSONL rows
+{"id", "text", "entities": [...], "relations": [[a, b], ...]} embedded with
+the hashing embedder. `--config` runs the same grid against the database
+and embedding provider of a pipeline config instead.
+
+Each query is timed end to end and per stage (embed, hybrid / vector /
+fulltext / expand / fetch round trips, finish = rerank + text fill; fusion is
+the remainder spent scoring candidates in process). Results are written as
+JSON; `--baseline` compares against an earlier result file and exits
+non-zero when recall/MRR drop or latency grows past the tolerances.
+
+Run from the repository root:
+    python -m llm.rag.graphrag.eval.retrieval_bench --chunks 5000 --clients 8 --top-k 5 12 --hops 0 2 --out run.json
+    python -m llm.rag.graphrag.eval.retrieval_bench --gold gold.jsonl --corpus corpus.jsonl --baseline run.json
+    python -m llm.rag.graphrag.eval.retrieval_bench --gold gold.jsonl --config configs/config.yaml --no-single-round-trip
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..retrievers.graph_walk import GraphRetriever
+from ..utils.embeddings import Embeddings
+from ..utils.fakes import FakeGraphStore
+from .qa_eval import recall_at_k, reciprocal_rank
+
+
+STAGES = ("embed", "hybrid", "vector", "fulltext", "expand", "fetch", "version", "finish", "fusion", "total")
+QUALITY_KEYS = ("recall@", "hit@", "mrr")
+
+
+class GoldItem(NamedTuple):
+    query: str
+    relevant: List[str]
+    answer: Optional[str] = None
+
+
+def load_gold(path: str) -> List[GoldItem]:
+    items = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                items.append(GoldItem(row["query"], list(row["relevant"]), row.get("answer")))
+    return items
+
+
+def save_gold(path: str, items: Sequence[GoldItem]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        for it in items:
+            f.write(json.dumps(it._asdict()) + "\n")
+
+
+# ---- Fake graph ----
+
+def load_store(path: str, embed: Embeddings, batch_size: int = 256) -> FakeGraphStore:
+    with open(path, "r", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    store = FakeGraphStore()
+    for s in range(0, len(rows), batch_size):
+        batch = rows[s:s + batch_size]
+        for row, emb in zip(batch, embed.embed([r["text"] for r in batch])):
+            store.add_chunk(row["id"], row["text"], emb, row.get("entities", ()))
+            for a, b in row.get("relations", ()):
+                store.add_relation(a, b)
+    return store
+
+
+def synthetic_store(
+    embed: Embeddings, n_chunks: int, n_queries: int, n_entities: int = 0, vocab_size: int = 1000, seed: int = 0
+) -> Tuple[FakeGraphStore, List[GoldItem]]:
+    """
+    Random corpus with Zipf-popular entities and RELATES edges; each query
+    paraphrases one chunk (a few of its entities and words, plus noise) and
+    that chunk is its only relevant id.
+    """
+    rnd = random.Random(seed)
+    rng = np.random.default_rng(seed)
+    vocab = [f"w{i}" for i in range(vocab_size)]
+    n_entities = n_entities or max(50, n_chunks // 4)
+    entities = [f"entity{i}" for i in range(n_entities)]
+    pop = 1.0 / np.arange(1, n_entities + 1) ** 1.1
+    pop /= pop.sum()
+
+    docs: List[Tuple[str, str, List[str]]] = []
+    for i in range(n_chunks):
+        ents = [entities[e] for e in dict.fromkeys(rng.choice(n_entities, 3, p=pop))]
+        words = rnd.choices(vocab, k=40) + ents
+        rnd.shuffle(words)
+        docs.append((f"c{i}", " ".join(words), ents))
+
+    store = FakeGraphStore()
+    for s in range(0, n_chunks, 256):
+        batch = docs[s:s + 256]
+        for (cid, text, ents), emb in zip(batch, embed.embed([t for _, t, _ in batch])):
+            store.add_chunk(cid, text, emb, ents)
+    for a, b in zip(rng.choice(n_entities, n_entities * 2, p=pop), rng.choice(n_entities, n_entities * 2, p=pop)):
+        if a != b:
+            store.add_relation(entities[a], entities[b])
+
+    gold = []
+    for cid, text, ents in rnd.sample(docs, min(n_queries, n_chunks)):
+        words = [w for w in text.split() if w not in ents]
+        terms = rnd.sample(ents, 1) + rnd.sample(words, 3) + rnd.choices(vocab, k=4)
+        rnd.shuffle(terms)
+        gold.append(GoldItem(" ".join(terms), [cid]))
+    return store, gold
+
+
+# ---- Stage timing ----
+
+def stage_of(cypher: str) -> str:
+    if "collect({id: node.id" in cypher:
+        return "hybrid"
+    if "vector.queryNodes" in cypher:
+        return "vector"
+    if "fulltext.queryNodes" in cypher or "CONTAINS" in cypher:
+        return "fulltext"
+    if "RELATES*" in cypher:
+        return "expand"
+    if "GraphMeta" in cypher:
+        return "version"
+    return "fetch"
+
+
+class StageTimer:
+    """
+    Per-thread stage clock wired into one GraphRetriever instance.
+
+    Wraps the instance's `_read`, `_embed_queries` and `_finish`, so every
+    Neo4j round trip, the query embedding and the rerank/text-fill step are
+    attributed to the query running on the calling thread.
+    """
+
+    def __init__(self, retriever: GraphRetriever):
+        self._local = threading.local()
+        read, embed, finish = retriever._read, retriever._embed_queries, retriever._finish
+        retriever._read = lambda cypher, params=None: self._timed(stage_of(cypher), read, cypher, params)
+        retriever._embed_queries = lambda queries: self._timed("embed", embed, queries)
+        retriever._finish = lambda query, merged: self._timed("finish", finish, query, merged)
+
+    def _timed(self, stage: str, fn, *args):
+        t0 = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            stages = getattr(self._local, "stages", None)
+            if stages is not None:
+                stages[stage] = stages.get(stage, 0.0) + time.perf_counter() - t0
+
+    def begin(self) -> None:
+        self._local.stages = {}
+
+    def end(self, total: float) -> Dict[str, float]:
+        stages, self._local.stages = self._local.stages, None
+        stages["fusion"] = max(0.0, total - sum(stages.values()))
+        stages["total"] = total
+        return stages
+
+
+# ---- Running ----
+
+def run_queries(
+    retriever: GraphRetriever, gold: Sequence[GoldItem], clients: int = 1, warmup: int = 0
+) -> Tuple[List[List[Dict]], List[Dict[str, float]], float]:
+    """
+    Answers every gold query with `clients` concurrent callers after
+    `warmup` untimed queries. Returns hits and stage times in gold order,
+    plus the wall-clock seconds of the timed pass.
+    """
+    timer = StageTimer(retriever)
+
+    def one(item: GoldItem) -> Tuple[List[Dict], Dict[str, float]]:
+        timer.begin()
+        t0 = time.perf_counter()
+        hits = retriever.retrieve(item.query)
+        return hits, timer.end(time.perf_counter() - t0)
+
+    with ThreadPoolExecutor(max_workers=max(1, clients)) as pool:
+        list(pool.map(one, [gold[i % len(gold)] for i in range(warmup)]))
+        t0 = time.perf_counter()
+        out = list(pool.map(one, gold))
+        wall = time.perf_counter() - t0
+    return [h for h, _ in out], [s for _, s in out], wall
+
+
+def quality(gold: Sequence[GoldItem], hits: Sequence[List[Dict]], ks: Sequence[int]) -> Dict[str, float]:
+    ranked = [[h["id"] for h in hs] for hs in hits]
+    out: Dict[str, float] = {}
+    for k in ks:
+        out[f"recall@{k}"] = float(np.mean([recall_at_k(r, g.relevant, k) for r, g in zip(ranked, gold)]))
+        out[f"hit@{k}"] = float(np.mean([bool(set(r[:k]) & set(g.relevant)) for r, g in zip(ranked, gold)]))
+    out["mrr"] = float(np.mean([reciprocal_rank(r, g.relevant) for r, g in zip(ranked, gold)]))
+    answered = [(g, hs) for g, hs in zip(gold, hits) if g.answer]
+    if answered:
+        # Does the retrieved context contain the gold answer at all?
+        out["answer_in_context"] = float(np.mean([
+            g.answer.lower() in " ".join(h.get("text") or "" for h in hs).lower() for g, hs in answered
+        ]))
+    return out
+
+
+def latency(stage_times: Sequence[Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+    out = {}
+    for stage in STAGES:
+        a = np.array([s[stage] for s in stage_times if stage in s]) * 1e3
+        if a.size:
+            p50, p95, p99 = np.percentile(a, [50, 95, 99])
+            out[stage] = {
+                "p50": float(p50), "p95": float(p95), "p99": float(p99),
+                "mean": float(a.mean()), "n": int(a.size),
+            }
+    return out
+
+
+def grid(args) -> List[Dict[str, Any]]:
+    return [
+        {"top_k": k, "expand_hops": h, "alpha": a, "fusion": f}
+        for k, h, a, f in itertools.product(args.top_k, args.hops, args.alpha, args.fusion)
+    ]
+
+
+def run_grid(neo, embed, gold: Sequence[GoldItem], configs: Sequence[Dict[str, Any]], args) -> List[Dict[str, Any]]:
+    runs = []
+    for params in configs:
+        retriever = GraphRetriever(neo, embed, single_round_trip=args.single_round_trip, **params)
+        hits, stage_times, wall = run_queries(retriever, gold, args.clients, args.warmup)
+        ks = sorted({k for k in args.k if k <= params["top_k"]} | {params["top_k"]})
+        runs.append({
+            "params": params,
+            "quality": quality(gold, hits, ks),
+            "latency_ms": latency(stage_times),
+            "qps": len(gold) / wall if wall else 0.0,
+        })
+        q, lat, top = runs[-1]["quality"], runs[-1]["latency_ms"]["total"], params["top_k"]
+        print(
+            f"{json.dumps(params):<70} recall@{top} {q['recall@%d' % top]:.3f} "
+            f"mrr {q['mrr']:.3f}  p50 {lat['p50']:.1f}ms p95 {lat['p95']:.1f}ms p99 {lat['p99']:.1f}ms  "
+            f"{runs[-1]['qps']:.0f} q/s",
+            flush=True,
+        )
+    return runs
+
+
+# ---- Regression check ----
+
+def _key(params: Dict[str, Any]) -> str:
+    return json.dumps(params, sort_keys=True)
+
+
+def compare(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    max_quality_drop: float = 0.01,
+    max_latency_ratio: float = 1.25,
+    latency_stats: Sequence[str] = ("p50", "p95"),
+) -> List[str]:
+    """
+    Regressions of `current` against `baseline` (both result dicts from this
+    module), matched by run params: any recall@k / hit@k / MRR lower by more
+    than `max_quality_drop` (absolute), or total latency statistics more
+    than `max_latency_ratio` times the baseline.
+    """
+    base = {_key(r["params"]): r for r in baseline["runs"]}
+    problems = []
+    for run in current["runs"]:
+        old = base.get(_key(run["params"]))
+        if old is None:
+            continue
+        label = _key(run["params"])
+        for name, value in run["quality"].items():
+            if name.startswith(QUALITY_KEYS) and name in old["quality"]:
+                if old["quality"][name] - value > max_quality_drop:
+                    problems.append(f"{label}: {name} {old['quality'][name]:.4f} -> {value:.4f}")
+        new_t, old_t = run["latency_ms"].get("total", {}), old["latency_ms"].get("total", {})
+        for stat in latency_stats:
+            if stat in new_t and old_t.get(stat) and new_t[stat] > old_t[stat] * max_latency_ratio:
+                problems.append(f"{label}: total {stat} {old_t[stat]:.2f}ms -> {new_t[stat]:.2f}ms")
+    return problems
+
+
+def _git_rev() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--gold", default=None, help="gold JSONL; generated with the synthetic corpus when omitted")
+    p.add_argument("--corpus", default=None, help="chunk JSONL loaded into the fake graph")
+    p.add_argument("--config", default=None, help="pipeline config: benchmark its Neo4j and embedder instead")
+    p.add_argument("--chunks", type=int, default=5000, help="synthetic corpus size")
+    p.add_argument("--queries", type=int, default=500, help="synthetic gold queries")
+    p.add_argument("--dim", type=int, default=256, help="hashing embedder dimension for fake runs")
+    p.add_argument("--top-k", type=int, nargs="+", default=[12])
+    p.add_argument("--hops", type=int, nargs="+", default=[2])
+    p.add_argument("--alpha", type=float, nargs="+", default=[0.6])
+    p.add_argument("--fusion", nargs="+", default=["weighted"], choices=["weighted", "rrf"])
+    p.add_argument("--k", type=int, nargs="+", default=[1, 5, 10], help="recall/hit cutoffs")
+    p.add_argument("--single-round-trip", action=argparse.BooleanOptionalAction, default=True)
+    p.add_argument("--clients", type=int, default=4, help="concurrent callers")
+    p.add_argument("--warmup", type=int, default=50, help="untimed queries before each run")
+    p.add_argument("--query-latency", type=float, default=0.0, help="simulated seconds per fake round trip")
+    p.add_argument("--out", default=None, help="write results JSON here")
+    p.add_argument("--baseline", default=None, help="results JSON to compare against")
+    p.add_argument("--max-quality-drop", type=float, default=0.01)
+    p.add_argument("--max-latency-ratio", type=float, default=1.25)
+    args = p.parse_args(argv)
+
+    if args.config:
+        from ..pipelines.cli import _embeddings, _load_cfg, _neo
+
+        cfg = _load_cfg(args.config)
+        neo, embed, mode = _neo(cfg), _embeddings(cfg), "neo4j"
+        if not args.gold:
+            p.error("--config needs --gold")
+        gold = load_gold(args.gold)
+    else:
+        embed, mode = Embeddings("hashing", "hashing", dim=args.dim), "fake"
+        if args.corpus:
+            if not args.gold:
+                p.error("--corpus needs --gold")
+            store, gold = load_store(args.corpus, embed), load_gold(args.gold)
+        else:
+            store, gold = synthetic_store(embed, args.chunks, args.queries)
+            if args.gold:
+                gold = load_gold(args.gold)
+        neo = store.client(args.query_latency)
+
+    results = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git_rev": _git_rev(),
+            "mode": mode,
+            "queries": len(gold),
+            "clients": args.clients,
+            "warmup": args.warmup,
+            "single_round_trip": args.single_round_trip,
+        },
+        "runs": run_grid(neo, embed, gold, grid(args), args),
+    }
+    neo.close()
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            problems = compare(json.load(f), results, args.max_quality_drop, args.max_latency_ratio)
+        for line in problems:
+            print(f"REGRESSION {line}")
+        return 1 if problems else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from databases.neo4j_client import Neo4jClient
+from .graph_version import GraphVersion
+
+
+ENTITY_CYPHER = (
+    "UNWIND $rows AS e\n"
+    "MERGE (en:Entity {id: e.id})\n"
+    "SET en.name = e.name, en.type = e.type"
+)
+
+# Two single-node MATCHes use the Entity id constraint index for each side
+# instead of a cartesian `MATCH (src ...), (dst ...)`.
+RELATION_CYPHER = (
+    "UNWIND $rows AS r\n"
+    "MATCH (src:Entity {id: r.src})\n"
+    "MATCH (dst:Entity {id: r.dst})\n"
+    "MERGE (src)-[rel:RELATES {type: r.type}]->(dst)\n"
+    "SET rel.updated_at = timestamp()"
+)
+
+MENTION_CYPHER = (
+    "UNWIND $rows AS m\n"
+    "MATCH (c:Chunk {id: m.chunk_id})\n"
+    "MATCH (en:Entity {id: m.entity_id})\n"
+    "MERGE (c)-[:MENTIONS]->(en)\n"
+    "SET c.updated_at = timestamp()"
+)
+
+
+class BulkGraphWriter:
+    """
+    Buffers extraction payloads from many chunks and writes them in bulk.
+
+    - Entities are deduplicated by id, relations by (src, dst, type) and
+      mentions by (chunk_id, entity_id) across every buffered chunk
+    - `flush()` writes entities, then relations, then mentions in `UNWIND`
+      batches of `batch_size` rows, one write transaction per batch
+    - Flushes trigger automatically once `max_rows` rows or roughly
+      `max_bytes` of parameters are buffered
+    - `stats` reports rows written, transactions and rows/sec
+    - `version`, when given, is touched once per non-empty flush
+    """
+
+    def __init__(
+        self,
+        neo: Neo4jClient,
+        batch_size: int = 5000,
+        max_rows: int = 50_000,
+        max_bytes: int = 32 << 20,
+        version: Optional[GraphVersion] = None,
+    ):
+        self.neo = neo
+        self.version = version
+        self.batch_size = batch_size
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self._entities: Dict[str, Dict] = {}
+        self._relations: Dict[Tuple[str, str, str], Dict] = {}
+        self._mentions: Dict[Tuple[str, str], Dict] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # flushes run in order, never overlap
+        self.stats: Dict[str, float] = {
+            "entities": 0, "relations": 0, "mentions": 0, "transactions": 0, "flushes": 0,
+            "seconds": 0.0, "rows_per_sec": 0.0,
+        }
+
+    @property
+    def pending_rows(self) -> int:
+        return len(self._entities) + len(self._relations) + len(self._mentions)
+
+    def add(self, chunk_id: str, payload: Dict) -> None:
+        flush = False
+        with self._lock:
+            for e in payload.get("entities", []):
+                if not e.get("id"):
+                    continue
+                row = {"id": e["id"], "name": e.get("name"), "type": e.get("type")}
+                if row["id"] not in self._entities:
+                    self._bytes += len(json.dumps(row))
+                self._entities[row["id"]] = row
+                key = (chunk_id, row["id"])
+                if key not in self._mentions:
+                    self._mentions[key] = {"chunk_id": chunk_id, "entity_id": row["id"]}
+                    self._bytes += len(chunk_id) + len(row["id"]) + 32
+            for r in payload.get("relations", []):
+                if not (r.get("src") and r.get("dst")):
+                    continue
+                key = (r["src"], r["dst"], r.get("type"))
+                if key not in self._relations:
+                    self._relations[key] = {"src": key[0], "dst": key[1], "type": key[2]}
+                    self._bytes += len(json.dumps(self._relations[key]))
+            flush = self.pending_rows >= self.max_rows or self._bytes >= self.max_bytes
+        if flush:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._flush_lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        with self._lock:
+            ents = list(self._entities.values())
+            rels = list(self._relations.values())
+            ments = list(self._mentions.values())
+            self._entities, self._relations, self._mentions, self._bytes = {}, {}, {}, 0
+        if not (ents or rels or ments):
+            return
+        t0 = time.perf_counter()
+        tx = 0
+        # Entities first so relations/mentions in the same flush can MATCH them.
+        for cypher, rows in ((ENTITY_CYPHER, ents), (RELATION_CYPHER, rels), (MENTION_CYPHER, ments)):
+            if rows:
+                self.neo.write_batches(cypher, rows, self.batch_size)
+                tx += -(-len(rows) // self.batch_size)
+        if self.version is not None:
+            self.version.touch()
+        elapsed = time.perf_counter() - t0
+        with self._lock:
+            s = self.stats
+            s["entities"] += len(ents)
+            s["relations"] += len(rels)
+            s["mentions"] += len(ments)
+            s["transactions"] += tx
+            s["flushes"] += 1
+            s["seconds"] += elapsed
+            rows = s["entities"] + s["relations"] + s["mentions"]
+            s["rows_per_sec"] = rows / s["seconds"] if s["seconds"] else 0.0
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> "BulkGraphWriter":
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is None:
+            self.flush()
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import csv
+import glob
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+from ..ingestion.document_loader import Chunk
+from ..utils.embeddings import Embeddings
+from ..utils.instrumentation import arg_len, timed
+
+
+# Header rows in `neo4j-admin database import` syntax. Chunk and Entity ids
+# live in separate ID spaces so both can use a plain string `id` property.
+HEADERS = {
+    "chunks": ["id:ID(Chunk)", "text", "doc_id", "order:int", "embedding:float[]", ":LABEL"],
+    "entities": ["id:ID(Entity)", "name", "type", ":LABEL"],
+    "relates": [":START_ID(Entity)", ":END_ID(Entity)", "type", ":TYPE"],
+    "mentions": [":START_ID(Chunk)", ":END_ID(Entity)", ":TYPE"],
+}
+ARRAY_DELIMITER = ";"
+
+
+class _PartWriter:
+    """Rolling `<name>-00001.csv` data files next to one `<name>_header.csv`."""
+
+    def __init__(self, out_dir: str, name: str, rows_per_file: int):
+        self.out_dir = out_dir
+        self.name = name
+        self.rows_per_file = rows_per_file
+        self.rows = 0
+        self.parts = 0
+        self._file = None
+        self._writer = None
+        with open(os.path.join(out_dir, f"{name}_header.csv"), "w", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerow(HEADERS[name])
+        # Parts of an earlier export would match the import pattern too.
+        for old in glob.glob(os.path.join(out_dir, f"{name}-[0-9]*.csv")):
+            os.remove(old)
+
+    def write(self, row: List) -> None:
+        if self._writer is None or self.rows % self.rows_per_file == 0:
+            self._roll()
+        self._writer.writerow(row)
+        self.rows += 1
+
+    def _roll(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        self.parts += 1
+        path = os.path.join(self.out_dir, f"{self.name}-{self.parts:05d}.csv")
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+
+    def flush(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class CsvImportExporter:
+    """
+    Offline bulk-load path: streams the graph to CSVs for `neo4j-admin database import full`.
+
+    Exposes the same pipeline-facing methods as GraphBuilder (`embed`,
+    `upsert_chunks`, `bulk_writer().add/flush`), so the streaming ingest can
+    target it unchanged. Entities, relations and mentions are deduplicated in
+    memory; embeddings are written as `float[]` arrays. Call `close()` and
+    then run `import_command()` against a stopped, empty database.
+    """
+
+    def __init__(self, out_dir: str, embed: Embeddings, rows_per_file: int = 1_000_000):
+        os.makedirs(out_dir, exist_ok=True)
+        self.out_dir = out_dir
+        self.embed = embed
+        self._lock = threading.Lock()
+        self._writers = {name: _PartWriter(out_dir, name, rows_per_file) for name in HEADERS}
+        aliases = os.path.join(out_dir, "chunk_aliases.jsonl")
+        if os.path.exists(aliases):
+            os.remove(aliases)  # appended to per batch below
+        self._entity_ids: Set[str] = set()
+        self._relations: Set[Tuple[str, str, Optional[str]]] = set()
+
+    # ------------------------ GraphBuilder interface ------------------------
+
+    @timed("upsert_chunks", arg_len(1))
+    def upsert_chunks(self, chunks: List[Chunk], vectors: Optional[List[List[float]]] = None):
+        if vectors is None:
+            vectors = self.embed.embed([c.text for c in chunks])
+        with self._lock:
+            w = self._writers["chunks"]
+            for c, v in zip(chunks, vectors):
+                emb = ARRAY_DELIMITER.join(repr(float(x)) for x in v)
+                w.write([c.id, c.text, c.doc_id, c.order, emb, "Chunk"])
+
+    @timed("upsert_entities")
+    def upsert_entities(self, chunk_id: str, payload: Dict):
+        self.add(chunk_id, payload)
+
+    def bulk_writer(self, **_) -> "CsvImportExporter":
+        return self
+
+    def add(self, chunk_id: str, payload: Dict) -> None:
+        with self._lock:
+            mentioned = set()
+            for e in payload.get("entities", []):
+                eid = e.get("id")
+                if not eid:
+                    continue
+                if eid not in self._entity_ids:
+                    self._entity_ids.add(eid)
+                    self._writers["entities"].write([eid, e.get("name") or "", e.get("type") or "", "Entity"])
+                if eid not in mentioned:
+                    mentioned.add(eid)
+                    self._writers["mentions"].write([chunk_id, eid, "MENTIONS"])
+            for r in payload.get("relations", []):
+                key = (r.get("src"), r.get("dst"), r.get("type"))
+                if not (key[0] and key[1]) or key in self._relations:
+                    continue
+                self._relations.add(key)
+                self._writers["relates"].write([key[0], key[1], key[2] or "", "RELATES"])
+
+    def flush(self) -> None:
+        with self._lock:
+            for w in self._writers.values():
+                w.flush()
+
+    def delete_chunks(self, chunk_ids: List[str]):
+        pass  # cold loads start from an empty database
+
+    def add_aliases(self, aliases: Dict[str, List[Tuple[str, str]]]):
+        # Not part of the import: kept next to the CSVs as canonical -> aliases.
+        with self._lock, open(os.path.join(self.out_dir, "chunk_aliases.jsonl"), "a", encoding="utf-8") as f:
+            for cid, al in aliases.items():
+                f.write(json.dumps({"id": cid, "aliases": al}) + "\n")
+
+    def clear_mentions(self, chunk_ids: List[str]):
+        pass
+
+    # ------------------------------- Output ---------------------------------
+
+    def close(self) -> None:
+        with self._lock:
+            for w in self._writers.values():
+                w.close()
+
+    def counts(self) -> Dict[str, int]:
+        return {name: w.rows for name, w in self._writers.items()}
+
+    def import_command(self, database: str = "neo4j") -> str:
+        def files(name: str) -> str:
+            header = os.path.join(self.out_dir, f"{name}_header.csv")
+            parts = os.path.join(self.out_dir, rf"{name}-\d+\.csv")
+            return f"'{header},{parts}'"
+
+        return (
+            f"neo4j-admin database import full {database} "
+            f"--nodes=Chunk={files('chunks')} "
+            f"--nodes=Entity={files('entities')} "
+            f"--relationships=RELATES={files('relates')} "
+            f"--relationships=MENTIONS={files('mentions')} "
+            f"--array-delimiter='{ARRAY_DELIMITER}' --multiline-fields=true "
+            "--skip-bad-relationships=true --overwrite-destination=true"
+        )
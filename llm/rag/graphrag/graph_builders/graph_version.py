@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Optional
+
+from databases.neo4j_client import Neo4jClient
+
+
+BUMP_CYPHER = (
+    "MERGE (m:GraphMeta {id: 'graph'})\n"
+    "SET m.version = coalesce(m.version, 0) + 1\n"
+    "RETURN m.version AS version"
+)
+READ_CYPHER = "MATCH (m:GraphMeta {id: 'graph'}) RETURN m.version AS version"
+
+
+class GraphVersion:
+    """
+    Monotonic graph version kept on a `(:GraphMeta {id: 'graph'})` node.
+
+    Anything derived from the graph (e.g. RetrievalCache entries) can be
+    keyed on it:
+    - Writers call `touch()` after each write; the bump itself happens at
+      most once per `bump_interval` seconds, so write transactions do not
+      all queue on the one GraphMeta node. A write inside the interval
+      arms a timer that bumps when the interval ends, so the last write of
+      a burst is published at most `bump_interval` late even if nothing
+      follows it. `flush()` (GraphBuilder.close() calls it) bumps whatever
+      is still pending right away
+    - Readers call `current()` (or `acurrent()` on an event loop), which
+      re-reads Neo4j at most every `poll_interval` seconds; bumps from this
+      process are seen immediately
+    """
+
+    def __init__(self, neo: Neo4jClient, poll_interval: float = 1.0, bump_interval: float = 5.0):
+        self.neo = neo
+        self.poll_interval = poll_interval
+        self.bump_interval = bump_interval
+        self._version = 0
+        self._read_at = float("-inf")
+        self._bumped_at = float("-inf")
+        self._dirty = False
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+
+    def current(self) -> int:
+        now = time.monotonic()
+        if now - self._read_at < self.poll_interval:
+            return self._version
+        try:
+            rows = self.neo.run(READ_CYPHER)
+        except Exception:
+            return self._version  # serve the last known version rather than fail reads
+        return self._observe(rows, now)
+
+    async def acurrent(self, async_neo=None) -> int:
+        """`current()` for event loops: reads through `async_neo`, else on a worker thread."""
+        now = time.monotonic()
+        if now - self._read_at < self.poll_interval:
+            return self._version
+        if async_neo is None:
+            return await asyncio.to_thread(self.current)
+        try:
+            rows = await async_neo.run(READ_CYPHER)
+        except Exception:
+            return self._version
+        return self._observe(rows, now)
+
+    def _observe(self, rows, now: float) -> int:
+        with self._lock:
+            if rows and rows[0].get("version") is not None:
+                self._version = max(self._version, int(rows[0]["version"]))
+            self._read_at = now
+            return self._version
+
+    def touch(self) -> None:
+        """Record a write; bumps now if the last bump is `bump_interval` old, else when it will be."""
+        with self._lock:
+            self._dirty = True
+            wait_s = self.bump_interval - (time.monotonic() - self._bumped_at)
+            if wait_s > 0 and self._timer is None:
+                self._timer = threading.Timer(wait_s, self._trailing_bump)
+                self._timer.daemon = True
+                self._timer.start()
+        if wait_s <= 0:
+            self.flush()
+
+    def _trailing_bump(self) -> None:
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        except Exception:
+            with self._lock:
+                self._dirty = True  # the next touch() or flush() tries again
+
+    def flush(self) -> None:
+        """Bump the version if a write is still pending."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return
+            self._dirty = False
+        self.bump()
+
+    def bump(self) -> int:
+        rows = self.neo.write(BUMP_CYPHER)
+        with self._lock:
+            if rows:
+                self._version = max(self._version, int(rows[0]["version"]))
+            self._read_at = self._bumped_at = time.monotonic()
+            return self._version
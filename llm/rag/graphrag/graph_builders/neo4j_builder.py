@@ -1,53 +1,155 @@
 from __future__ import annotations
-from typing import Dict, Iterable, List
+from typing import Dict, List, Optional, Tuple
 
 
 from databases.neo4j_client import Neo4jClient
 from ..utils.embeddings import Embeddings
+from ..utils.instrumentation import arg_len, timed
+from ..utils.text_store import TextBlobStore
 from ..ingestion.document_loader import Chunk
+from ..retrievers import quantized
+from .bulk_writer import BulkGraphWriter
+from .graph_version import GraphVersion
 
 
+class GraphBuilder:
+    def __init__(
+        self,
+        neo: Neo4jClient,
+        embed: Embeddings,
+        batch_size: int = 500,
+        version: Optional[GraphVersion] = None,
+        quantize: Optional[str] = None,
+        side_store: Optional[quantized.MmapQuantizedStore] = None,
+        text_store: Optional[TextBlobStore] = None,
+        keep_node_text: bool = True,
+    ):
+        self.neo = neo
+        self.embed = embed
+        self.batch_size = batch_size
+        # Also store int8/binary codes (c.embedding_q) and/or append them to a
+        # local side file, for GraphRetriever(quantized=...).
+        if quantize is not None and quantize not in quantized.KINDS:
+            raise ValueError(f"unknown quantisation kind: {quantize}")
+        self.quantize = quantize
+        self.side_store = side_store
+        # Chunk text also goes to a local blob store, which retrievers read
+        # instead of the node. The node keeps its text by default because
+        # GraphRetriever's full-text leg indexes c.text; keep_node_text=False
+        # saves that space but leaves retrieval vector-only.
+        self.text_store = text_store
+        self.keep_node_text = keep_node_text
+        # Touched after every write so retrieval caches can invalidate; the
+        # bumps are coalesced, and close() flushes the last one.
+        self.version = version or GraphVersion(neo)
+        self.neo.ensure_constraints()
 
+    @timed("upsert_chunks", arg_len(1))
+    def upsert_chunks(self, chunks: List[Chunk], vectors: Optional[List[List[float]]] = None):
+        # Pass `vectors` when the caller already embedded the chunks.
+        if vectors is None:
+            vectors = self.embed.embed([c.text for c in chunks])
+        cypher = (
+            "UNWIND $rows AS row\n"
+            "MERGE (c:Chunk {id: row.id})\n"
+            "SET c.text = row.text, c.doc_id = row.doc_id, c.order = row.order, c.embedding = row.embedding,\n"
+            "    c.updated_at = timestamp()"
+        )
+        rows = [dict(id=c.id, text=c.text, doc_id=c.doc_id, order=c.order, embedding=vectors[i]) for i, c in enumerate(chunks)]
+        if self.quantize and rows:
+            codes, scales = quantized.quantize(vectors, self.quantize)
+            for row, code, scale in zip(rows, codes, scales):
+                row["q"], row["scale"] = code.tobytes(), float(scale)
+            cypher += ", c.embedding_q = row.q, c.embedding_scale = row.scale"
+        if self.text_store is not None and rows:
+            # Blobs land first, so a node never points at missing text.
+            refs = self.text_store.put_many((c.id, c.text) for c in chunks)
+            for row in rows:
+                row["text_offset"], row["text_length"], _ = refs[row["id"]]
+                if not self.keep_node_text:
+                    row["text"] = None
+            cypher += ", c.text_offset = row.text_offset, c.text_length = row.text_length"
+        self.neo.write_batches(cypher, rows, self.batch_size)
+        if self.side_store is not None:
+            self.side_store.put([c.id for c in chunks], vectors)
+        self.version.touch()
 
-class GraphBuilder:
-def __init__(self, neo: Neo4jClient, embed: Embeddings):
-self.neo = neo
-self.embed = embed
-self.neo.ensure_constraints()
-
-
-def upsert_chunks(self, chunks: List[Chunk]):
-texts = [c.text for c in chunks]
-vecs = self.embed.embed(texts)
-cypher = (
-"UNWIND $rows AS row\n"
-"MERGE (c:Chunk {id: row.id})\n"
-"SET c.text = row.text, c.doc_id = row.doc_id, c.order = row.order, c.embedding = row.embedding"
-)
-rows = [dict(id=c.id, text=c.text, doc_id=c.doc_id, order=c.order, embedding=vecs[i]) for i, c in enumerate(chunks)]
-self.neo.write(cypher, {"rows": rows})
-
-
-def upsert_entities(self, chunk_id: str, payload: Dict):
-ents = payload.get("entities", [])
-rels = payload.get("relations", [])
-cypher = (
-"UNWIND $entities AS e\n"
-"MERGE (en:Entity {id: e.id})\n"
-"SET en.name = e.name, en.type = e.type\n"
-"WITH 1 as _\n"
-"UNWIND $rels AS r\n"
-"MATCH (src:Entity {id: r.src}), (dst:Entity {id: r.dst})\n"
-"MERGE (src)-[:RELATES {type: r.type}]->(dst)"
-)
-self.neo.write(cypher, {"entities": ents, "rels": rels})
-
-
-# Link chunk mentions
-cy2 = (
-"MATCH (c:Chunk {id: $chunk_id})\n"
-"UNWIND $entities AS e\n"
-"MATCH (en:Entity {id: e.id})\n"
-"MERGE (c)-[:MENTIONS]->(en)"
-)
-self.neo.write(cy2, {"chunk_id": chunk_id, "entities": ents})
+    @timed("upsert_entities")
+    def upsert_entities(self, chunk_id: str, payload: Dict):
+        ents = payload.get("entities", [])
+        rels = payload.get("relations", [])
+        cypher = (
+            "UNWIND $entities AS e\n"
+            "MERGE (en:Entity {id: e.id})\n"
+            "SET en.name = e.name, en.type = e.type\n"
+            "WITH 1 as _\n"
+            "UNWIND $rels AS r\n"
+            "MATCH (src:Entity {id: r.src}), (dst:Entity {id: r.dst})\n"
+            "MERGE (src)-[rel:RELATES {type: r.type}]->(dst)\n"
+            "SET rel.updated_at = timestamp()"
+        )
+        self.neo.write(cypher, {"entities": ents, "rels": rels})
+
+        # Link chunk mentions
+        cy2 = (
+            "MATCH (c:Chunk {id: $chunk_id})\n"
+            "SET c.updated_at = timestamp()\n"
+            "WITH c\n"
+            "UNWIND $entities AS e\n"
+            "MATCH (en:Entity {id: e.id})\n"
+            "MERGE (c)-[:MENTIONS]->(en)"
+        )
+        self.neo.write(cy2, {"chunk_id": chunk_id, "entities": ents})
+        self.version.touch()
+
+    def bulk_writer(self, **kwargs) -> BulkGraphWriter:
+        """Cross-chunk batched alternative to calling upsert_entities per chunk."""
+        kwargs.setdefault("version", self.version)
+        return BulkGraphWriter(self.neo, **kwargs)
+
+    def clear_mentions(self, chunk_ids: List[str]):
+        # Drop MENTIONS from chunks whose text changed before re-extracting them.
+        self.neo.write(
+            "UNWIND $ids AS id\n"
+            "MATCH (c:Chunk {id: id})\n"
+            "SET c.updated_at = timestamp()\n"
+            "WITH c\n"
+            "MATCH (c)-[m:MENTIONS]->()\n"
+            "DELETE m",
+            {"ids": chunk_ids},
+        )
+        self.version.touch()
+
+    def add_aliases(self, aliases: Dict[str, List[Tuple[str, str]]]):
+        # Near-duplicates dropped by ChunkDeduplicator: canonical id -> [(alias id, doc id)].
+        rows = [
+            {"id": cid, "aliases": [a for a, _ in al], "docs": sorted({d for _, d in al})}
+            for cid, al in aliases.items()
+        ]
+        if not rows:
+            return
+        self.neo.write_batches(
+            "UNWIND $rows AS row\n"
+            "MATCH (c:Chunk {id: row.id})\n"
+            "SET c.aliases = coalesce(c.aliases, []) + [a IN row.aliases WHERE NOT a IN coalesce(c.aliases, [])],\n"
+            "    c.alias_docs = coalesce(c.alias_docs, []) + [d IN row.docs WHERE NOT d IN coalesce(c.alias_docs, [])]",
+            rows,
+            self.batch_size,
+        )
+        self.version.touch()
+
+    def delete_chunks(self, chunk_ids: List[str]):
+        # DETACH also removes the chunk's MENTIONS edges.
+        self.neo.write(
+            "UNWIND $ids AS id\n"
+            "MATCH (c:Chunk {id: id})\n"
+            "DETACH DELETE c",
+            {"ids": chunk_ids},
+        )
+        if self.text_store is not None:
+            self.text_store.delete_many(chunk_ids)
+        self.version.touch()
+
+    def close(self) -> None:
+        """Publish any version bump still pending from the last writes."""
+        self.version.flush()
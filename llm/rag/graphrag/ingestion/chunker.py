@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import mmap
+import re
+from collections import deque
+from typing import Callable, Deque, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+
+# A tokenizer only has to count tokens in a piece of text.
+Tokenizer = Callable[[str], int]
+Buffer = Union[str, bytes, bytearray, memoryview, mmap.mmap]
+
+_WORD = re.compile(r"\S+")
+_WORD_B = re.compile(rb"\S+")
+# Sentence ends: terminal punctuation followed by whitespace, or a blank line.
+# The match starts on the punctuation / first newline; the leading character
+# class lets `re` skip ahead without trying every position.
+_SENTENCE_END = re.compile(r"[.!?。！？\n](?:(?<=[.!?。！？])\s+|(?<=\n)[ \t]*\n\s*)")
+# Same on raw UTF-8 (。！？ matched on their last byte), so byte sources need
+# no decode/encode to track offsets.
+_SENTENCE_END_B = re.compile(
+    rb"[.!?\n\x82\x81\x9f](?:(?<=[.!?])\s+|(?<=\xe3\x80\x82)\s+|(?<=\xef\xbc[\x81\x9f])\s+|(?<=\n)[ \t]*\n\s*)"
+)
+
+
+def whitespace_tokens(text: str) -> int:
+    """Whitespace-separated words; matches the size unit of `simple_chunk`."""
+    return len(text.split())
+
+
+def hf_tokenizer(name_or_path: str) -> Tokenizer:
+    """Token counter backed by a Hugging Face tokenizer (no special tokens)."""
+    from transformers import AutoTokenizer
+
+    tok = AutoTokenizer.from_pretrained(name_or_path)
+    return lambda text: len(tok.encode(text, add_special_tokens=False))
+
+
+def tiktoken_tokenizer(encoding: str = "cl100k_base") -> Tokenizer:
+    import tiktoken
+
+    enc = tiktoken.get_encoding(encoding)
+    return lambda text: len(enc.encode_ordinary(text))
+
+
+def make_tokenizer(spec: Optional[str]) -> Tokenizer:
+    """`whitespace` (default), `hf:<name or path>` or `tiktoken:<encoding>`."""
+    if not spec or spec == "whitespace":
+        return whitespace_tokens
+    kind, _, arg = spec.partition(":")
+    if kind == "hf":
+        return hf_tokenizer(arg)
+    if kind == "tiktoken":
+        return tiktoken_tokenizer(arg or "cl100k_base")
+    raise ValueError(f"unknown tokenizer: {spec}")
+
+
+class Span(NamedTuple):
+    """Half-open [start, end) range of the source plus its token count."""
+
+    start: int
+    end: int
+    tokens: int
+
+
+class StreamingChunker:
+    """
+    Incremental, sentence-aware chunker that yields offset spans.
+
+    - The source (str, bytes or an mmap of a file) is scanned `block_size`
+      at a time; only the current block and the sentences of the chunk
+      being built are held, so memory stays flat on multi-GB inputs
+    - Sentences are packed until the next one would exceed `size` tokens;
+      the next chunk starts with whole trailing sentences worth at most
+      `overlap` tokens
+    - A sentence longer than `size` is packed word by word, so chunks cut
+      inside it overlap like any other. So is a sentence that would leave
+      the current chunk under `min_tokens` (default size // 4): a short
+      sentence never ends up alone ahead of a long one
+    - Spans index the source directly: characters for str, bytes for
+      bytes/mmap. `text(source, span)` materialises one chunk on demand
+    - `tokenizer` counts tokens per sentence (summing per-sentence counts is
+      close to, not exactly, the tokenizer's count for the joined text)
+    """
+
+    def __init__(
+        self,
+        size: int = 800,
+        overlap: int = 120,
+        tokenizer: Optional[Tokenizer] = None,
+        block_size: int = 1 << 20,
+        min_tokens: Optional[int] = None,
+    ):
+        if overlap >= size:
+            raise ValueError("overlap must be smaller than size")
+        self.size = size
+        self.overlap = overlap
+        self.min_tokens = size // 4 if min_tokens is None else min_tokens
+        self.count = tokenizer or whitespace_tokens
+        self.block_size = block_size
+
+    # -------------------------------- Scanning -------------------------------
+
+    def _blocks(self, source: Buffer) -> Iterator[Tuple[Union[str, bytes], bool]]:
+        """(block, is_last); byte blocks end after an ASCII whitespace byte."""
+        n = len(source)
+        if isinstance(source, str):
+            for pos in range(0, n, self.block_size):
+                yield source[pos : pos + self.block_size], pos + self.block_size >= n
+            return
+        pos = 0
+        while pos < n:
+            end = min(n, pos + self.block_size)
+            if end < n:
+                tail = bytes(source[max(pos, end - 4096) : end])
+                cut = max(tail.rfind(b"\n"), tail.rfind(b" "))
+                if cut >= 0:
+                    end = end - len(tail) + cut + 1
+            yield bytes(source[pos:end]), end >= n
+            pos = end
+
+    def _units(self, source: Buffer) -> Iterator[Tuple[int, int, int]]:
+        """(start, end, tokens) per trimmed sentence."""
+        is_str = isinstance(source, str)
+        sentence_end = _SENTENCE_END if is_str else _SENTENCE_END_B
+        newline = "\n" if is_str else 10
+        count = self.count
+        offset = 0  # source offset of text[0]
+        carry = "" if is_str else b""
+        for block, last in self._blocks(source):
+            text = carry + block
+            # Cut after the punctuation, or before the newline of a blank line.
+            matches = [(m.start() + (text[m.start()] != newline), m.end()) for m in sentence_end.finditer(text)]
+            if matches and not last and matches[-1][1] == len(text):
+                matches.pop()  # the whitespace run may continue in the next block
+            cuts = [m[0] for m in matches]
+            starts = [0] + [m[1] for m in matches]
+            stop = starts[-1]
+            if last:
+                cuts.append(len(text))
+                stop = len(text)
+            elif len(text) - stop > self.block_size:
+                # A whole block without a boundary: flush up to its last space.
+                ws = max(text.rfind(" " if is_str else b" "), text.rfind("\n" if is_str else b"\n"))
+                if ws > stop:
+                    cuts.append(ws)
+                    stop = ws
+            for a, b in zip(starts, cuts):
+                raw = text[a:b]
+                body = raw.strip()
+                if not body:
+                    continue
+                a += len(raw) - len(raw.lstrip())
+                n = count(body if is_str else body.decode("utf-8", "replace"))
+                yield offset + a, offset + a + len(body), n
+            offset += stop
+            carry = text[stop:]
+
+    def _words(self, source: Buffer, unit: Tuple[int, int, int]) -> Iterator[Tuple[int, int, int]]:
+        # One sentence as (start, end, tokens) per word.
+        start, end, _ = unit
+        if isinstance(source, str):
+            for m in _WORD.finditer(source, start, end):
+                yield m.start(), m.end(), self.count(m.group())
+            return
+        body = bytes(source[start:end])
+        for m in _WORD_B.finditer(body):
+            yield start + m.start(), start + m.end(), self.count(m.group().decode("utf-8", "replace"))
+
+    # --------------------------------- Chunks --------------------------------
+
+    def spans(self, source: Buffer) -> Iterator[Span]:
+        window: Deque[Tuple[int, int, int]] = deque()
+        tokens = 0
+        size, overlap, min_tokens = self.size, self.overlap, self.min_tokens
+        for sentence in self._units(source):
+            n = sentence[2]
+            if n > size or (window and tokens + n > size and tokens < min_tokens):
+                units: Iterable[Tuple[int, int, int]] = self._words(source, sentence)
+            else:
+                units = (sentence,)
+            for unit in units:
+                n = unit[2]
+                if window and tokens + n > size:
+                    yield Span(window[0][0], window[-1][1], tokens)
+                    # Keep whole trailing units worth at most `overlap` tokens.
+                    while window and (tokens > overlap or tokens + n > size):
+                        tokens -= window.popleft()[2]
+                window.append(unit)
+                tokens += n
+        if window:
+            yield Span(window[0][0], window[-1][1], tokens)
+
+    @staticmethod
+    def text(source: Buffer, span: Span) -> str:
+        if isinstance(source, str):
+            return source[span.start : span.end]
+        return bytes(source[span.start : span.end]).decode("utf-8", "replace")
+
+    def chunks(self, source: Buffer) -> Iterator[Tuple[Span, str]]:
+        for span in self.spans(source):
+            yield span, self.text(source, span)
+
+    def file_chunks(self, path: str) -> Iterator[Tuple[Span, str]]:
+        """Chunk a UTF-8 file through a read-only mmap; spans are byte offsets."""
+        with open(path, "rb") as f:
+            if f.seek(0, 2) == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                yield from self.chunks(buf)
+
+
+def chunk_spans(text: str, size: int = 800, overlap: int = 120, tokenizer: Optional[Tokenizer] = None) -> List[Span]:
+    return list(StreamingChunker(size, overlap, tokenizer).spans(text))
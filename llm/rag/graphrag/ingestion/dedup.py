@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .document_loader import Chunk
+
+
+_MASK = np.uint64(0xFFFFFFFF)
+_SHIFT = np.uint64(32)
+
+
+def lsh_params(threshold: float, num_perm: int, fn_weight: float = 0.9) -> Tuple[int, int]:
+    """
+    (bands, rows) with bands * rows <= num_perm that minimise the weighted
+    false-positive and false-negative areas of the S-curve
+    1 - (1 - s**rows)**bands around `threshold`. Candidates are verified
+    afterwards, so a false positive only costs a comparison and misses are
+    weighted higher by default.
+    """
+    s = np.linspace(0.0, 1.0, 201)
+    best, best_err = (1, num_perm), float("inf")
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        p = 1.0 - (1.0 - s**rows) ** bands
+        lo = s <= threshold
+        err = (1.0 - fn_weight) * p[lo].sum() + fn_weight * (1.0 - p[~lo]).sum()
+        if err < best_err:
+            best, best_err = (bands, rows), err
+    return best
+
+
+class MinHasher:
+    """
+    MinHash signatures over word `shingle`-grams.
+
+    Words are hashed with CRC32 (memoised per word); each shingle hash is a
+    polynomial roll of its word hashes. The `num_perm` multiply-shift hashes
+    ((a*x + b) mod 2**64) >> 32 run as one numpy broadcast per text.
+    """
+
+    def __init__(self, num_perm: int = 128, shingle: int = 5, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.shingle = shingle
+        self._a = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)  # odd
+        self._b = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64)
+        self._roll = (np.uint64(0x01000193) ** np.arange(shingle, dtype=np.uint64)) & _MASK
+        self._words: Dict[str, int] = {}
+
+    def _word_hashes(self, words: List[str]) -> np.ndarray:
+        cache = self._words
+        if len(cache) > 2_000_000:
+            cache.clear()
+        hs = list(map(cache.get, words))
+        if None in hs:
+            for i, h in enumerate(hs):
+                if h is None:
+                    hs[i] = cache[words[i]] = zlib.crc32(words[i].encode("utf-8"))
+        return np.array(hs, dtype=np.uint64)
+
+    def shingles(self, text: str) -> np.ndarray:
+        words = self._word_hashes(text.lower().split())
+        if words.size == 0:
+            return words
+        k = min(self.shingle, words.size)
+        n = words.size - k + 1
+        rolled = words[:n] * self._roll[0]
+        for j in range(1, k):
+            rolled += words[j : j + n] * self._roll[j]
+        return np.unique(rolled & _MASK)
+
+    def signature(self, text: str) -> np.ndarray:
+        sh = self.shingles(text)
+        if sh.size == 0:
+            return np.full(self.num_perm, 0xFFFFFFFF, dtype=np.uint32)
+        return ((self._a[:, None] * sh[None, :] + self._b[:, None]) >> _SHIFT).min(axis=1).astype(np.uint32)
+
+
+class ChunkDeduplicator:
+    """
+    Near-duplicate chunk filter (MinHash + LSH band index), run before embedding.
+
+    - `filter(chunks)` returns only canonical chunks; every dropped chunk is
+      recorded as an alias (chunk id, doc id) of the canonical it matched
+    - Exact copies are caught by a content hash before any MinHash work
+    - Candidates from shared LSH buckets are confirmed against the estimated
+      Jaccard similarity of their signatures (>= `threshold`)
+    - Only canonical chunks are indexed: memory is about `num_perm * 4` bytes
+      of signature plus `bands` dict entries per unique chunk
+    - `pop_aliases()` drains the alias map for GraphBuilder.add_aliases;
+      `stats()` reports the dedup ratio
+    Thread-safe; the first chunk seen wins, so results follow input order.
+    """
+
+    def __init__(self, threshold: float = 0.85, num_perm: int = 128, shingle: int = 5, seed: int = 1):
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm, shingle, seed)
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+        self._tables: List[Dict[bytes, int]] = [{} for _ in range(self.bands)]
+        self._exact: Dict[bytes, int] = {}
+        self._ids: List[str] = []
+        self._sigs = np.zeros((1024, num_perm), dtype=np.uint32)
+        self._aliases: Dict[str, List[Tuple[str, str]]] = {}
+        self._lock = threading.Lock()
+        self.seen = 0
+        self.exact_duplicates = 0
+        self.near_duplicates = 0
+
+    def _band_keys(self, sig: np.ndarray) -> List[bytes]:
+        return [sig[i * self.rows : (i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def _match(self, sig: np.ndarray, keys: Sequence[bytes]) -> Optional[int]:
+        cands = {t[k] for t, k in zip(self._tables, keys) if k in t}
+        if not cands:
+            return None
+        idx = np.fromiter(cands, dtype=np.int64)
+        sim = (self._sigs[idx] == sig).mean(axis=1)
+        best = int(np.argmax(sim))
+        return int(idx[best]) if sim[best] >= self.threshold else None
+
+    def _insert(self, chunk_id: str, sig: np.ndarray, keys: Sequence[bytes]) -> int:
+        i = len(self._ids)
+        if i == len(self._sigs):
+            self._sigs = np.concatenate([self._sigs, np.zeros_like(self._sigs)])
+        self._sigs[i] = sig
+        self._ids.append(chunk_id)
+        for t, k in zip(self._tables, keys):
+            t.setdefault(k, i)
+        return i
+
+    def canonical(self, chunk: Chunk) -> Optional[str]:
+        """Id of the chunk this one duplicates, or None (it is then indexed as canonical)."""
+        digest = hashlib.blake2b(chunk.text.encode("utf-8"), digest_size=16).digest()
+        with self._lock:
+            self.seen += 1
+            hit = self._exact.get(digest)
+            if hit is not None:
+                self.exact_duplicates += 1
+                return self._ids[hit]
+        sig = self.hasher.signature(chunk.text)  # the expensive part runs unlocked
+        keys = self._band_keys(sig)
+        with self._lock:
+            hit = self._exact.get(digest)
+            if hit is not None:
+                self.exact_duplicates += 1
+                return self._ids[hit]
+            hit = self._match(sig, keys)
+            if hit is not None:
+                self.near_duplicates += 1
+                return self._ids[hit]
+            self._exact[digest] = self._insert(chunk.id, sig, keys)
+            return None
+
+    def filter(self, chunks: Sequence[Chunk]) -> List[Chunk]:
+        out = []
+        for c in chunks:
+            canon = self.canonical(c)
+            if canon is None or canon == c.id:
+                out.append(c)
+            else:
+                with self._lock:
+                    self._aliases.setdefault(canon, []).append((c.id, c.doc_id))
+        return out
+
+    def pop_aliases(self) -> Dict[str, List[Tuple[str, str]]]:
+        with self._lock:
+            out, self._aliases = self._aliases, {}
+        return out
+
+    def stats(self) -> Dict[str, float]:
+        dups = self.exact_duplicates + self.near_duplicates
+        return {
+            "seen": self.seen,
+            "unique": len(self._ids),
+            "exact_duplicates": self.exact_duplicates,
+            "near_duplicates": self.near_duplicates,
+            "dedup_ratio": dups / self.seen if self.seen else 0.0,
+            "bands": self.bands,
+            "rows": self.rows,
+        }
@@ -1,46 +1,140 @@
 from __future__ import annotations
 import os
+import time
 import uuid
 from pathlib import Path
-from typing import Dict, Iterable, List
+from typing import Iterator, List, Optional
 
 
 from pydantic import BaseModel
 
+from .chunker import StreamingChunker
+from .parse_pool import PLAIN_SUFFIXES, DocumentParserPool, ParseReport, parse_document, parse_in_process
 
 
+SUPPORTED_SUFFIXES = {".txt", ".md", ".pdf"}
+
 
 class Chunk(BaseModel):
-id: str
-doc_id: str
-text: str
-order: int
+    id: str
+    doc_id: str
+    text: str
+    order: int
+    # Offsets into the source: characters for in-memory text, bytes when
+    # chunked from a memory-mapped file.
+    start: Optional[int] = None
+    end: Optional[int] = None
 
 
+def simple_chunk(text: str, size: int = 800, overlap: int = 120) -> List[str]:
+    words = text.split()
+    chunks = []
+    start = 0
+    while start < len(words):
+        end = min(len(words), start + size)
+        chunks.append(" ".join(words[start:end]))
+        if end == len(words):
+            return chunks
+        start = max(end - overlap, start + 1)
+    return chunks
 
 
-def _read_text(path: Path) -> str:
-if path.suffix.lower() in {".txt", ".md"}:
-return path.read_text(encoding="utf-8", errors="ignore")
-# Simple PDF fallback (no heavy deps):
-if path.suffix.lower() == ".pdf":
-try:
-import pypdf
-reader = pypdf.PdfReader(str(path))
-return "\n".join(page.extract_text() or "" for page in reader.pages)
-except Exception:
-return "" # keep lightweight here
-return ""
+def chunk_id(doc_id: str, order: int) -> str:
+    # Deterministic so re-ingesting the same document MERGEs onto the same nodes.
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{doc_id}#{order}"))
 
 
+def iter_documents(corpus_dir: str) -> Iterator[Path]:
+    root = Path(corpus_dir)
+    for path in sorted(p for p in root.rglob("*") if p.suffix.lower() in SUPPORTED_SUFFIXES):
+        yield path
 
 
-def simple_chunk(text: str, size: int = 800, overlap: int = 120) -> List[str]:
-words = text.split()
-chunks = []
-start = 0
-while start < len(words):
-end = min(len(words), start + size)
-chunks.append(" ".join(words[start:end]))
-if end == len(words):
-return chunks
+def doc_id_for(path: Path, corpus_dir: str) -> str:
+    return str(path.relative_to(corpus_dir)).replace(os.sep, "/")
+
+
+def chunk_document(
+    doc_id: str, text: str, size: int = 800, overlap: int = 120, chunker: Optional[StreamingChunker] = None
+) -> List[Chunk]:
+    chunker = chunker or StreamingChunker(size, overlap)
+    return [
+        Chunk(id=chunk_id(doc_id, i), doc_id=doc_id, text=piece, order=i, start=span.start, end=span.end)
+        for i, (span, piece) in enumerate(chunker.chunks(text))
+    ]
+
+
+def iter_file_chunks(
+    path: Path,
+    doc_id: str,
+    chunker: StreamingChunker,
+    text: Optional[str] = None,
+    report: Optional[ParseReport] = None,
+) -> Iterator[Chunk]:
+    """
+    Chunks of one document. Without pre-parsed `text`, plain-text files are
+    scanned through mmap, never loaded whole; the time spent reading them
+    (not the consumer's time between chunks) goes to `report`. Other files
+    are parsed here, and parse errors propagate.
+    """
+    streamed = text is None and path.suffix.lower() in PLAIN_SUFFIXES
+    if text is not None:
+        pieces = chunker.chunks(text)
+    elif streamed:
+        pieces = chunker.file_chunks(str(path))
+    else:
+        pieces = chunker.chunks(parse_document(path))
+    seconds = 0.0
+    t0 = time.perf_counter()
+    try:
+        for i, (span, piece) in enumerate(pieces):
+            seconds += time.perf_counter() - t0
+            yield Chunk(id=chunk_id(doc_id, i), doc_id=doc_id, text=piece, order=i, start=span.start, end=span.end)
+            t0 = time.perf_counter()
+    except OSError as exc:
+        if streamed and report is not None:
+            report.record_read(path, seconds + time.perf_counter() - t0, f"{type(exc).__name__}: {exc}")
+        raise
+    if streamed and report is not None:
+        report.record_read(path, seconds + time.perf_counter() - t0)
+
+
+def iter_chunks(
+    corpus_dir: str,
+    size: int = 800,
+    overlap: int = 120,
+    chunker: Optional[StreamingChunker] = None,
+    workers: int = 0,
+    timeout_s: Optional[float] = None,
+    report: Optional[ParseReport] = None,
+) -> Iterator[Chunk]:
+    """
+    Lazily parse and chunk the corpus, in document order.
+
+    With `workers` > 0, documents are parsed by a DocumentParserPool of that
+    many processes and `timeout_s` bounds each file. Files that fail or time
+    out are skipped and listed in `report` along with per-file latencies.
+    """
+    chunker = chunker or StreamingChunker(size, overlap)
+    paths = iter_documents(corpus_dir)
+    if workers > 0:
+        docs = DocumentParserPool(workers, timeout_s, report=report).parse(paths)
+    else:
+        docs = parse_in_process(paths, report)
+    for doc in docs:
+        if doc.error is None:
+            try:
+                yield from iter_file_chunks(doc.path, doc_id_for(doc.path, corpus_dir), chunker, doc.text, report)
+            except OSError:
+                continue  # unreadable plain-text file, listed in `report`
+
+
+def load_corpus(
+    corpus_dir: str,
+    size: int = 800,
+    overlap: int = 120,
+    workers: int = 0,
+    timeout_s: Optional[float] = None,
+    report: Optional[ParseReport] = None,
+) -> List[Chunk]:
+    return list(iter_chunks(corpus_dir, size, overlap, workers=workers, timeout_s=timeout_s, report=report))
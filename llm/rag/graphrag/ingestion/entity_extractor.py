@@ -1,29 +1,49 @@
 from __future__ import annotations
+import json
+import re
 from typing import Dict, List
 from .document_loader import Chunk
 from ..utils.llm import LLM
 
-
 ENTITY_PROMPT = (
-"Extract named entities (people, orgs, locations, products, tickers) and key relations as triples.\n"
-"Return JSON with fields 'entities' (list of {id,name,type}) and 'relations' (list of {src,dst,type}).\n"
+    "Extract named entities (people, orgs, locations, products, tickers) and key relations as triples.\n"
+    "Return JSON with fields 'entities' (list of {id,name,type}) and 'relations' (list of {src,dst,type}).\n"
 )
 
 
+class ExtractionParseError(ValueError):
+    def __init__(self, message: str, raw: str):
+        super().__init__(message)
+        self.raw = raw
+
+
+def build_messages(chunk: Chunk, prompt: str = ENTITY_PROMPT) -> List[Dict[str, str]]:
+    return [
+        {"role": "system", "content": prompt},
+        {"role": "user", "content": chunk.text[:4000]},
+    ]
+
+
+def parse_entities(raw: str) -> Dict:
+    """Locate the JSON payload in an LLM reply; raise ExtractionParseError if there is none."""
+    m = re.search(r"\{[\s\S]*\}$", raw.strip())
+    if not m:
+        raise ExtractionParseError("no JSON object in response", raw)
+    try:
+        payload = json.loads(m.group(0))
+    except ValueError as exc:
+        raise ExtractionParseError(f"invalid JSON: {exc}", raw) from exc
+    if not isinstance(payload, dict):
+        raise ExtractionParseError("JSON payload is not an object", raw)
+    payload.setdefault("entities", [])
+    payload.setdefault("relations", [])
+    return payload
 
 
 def extract_entities(llm: LLM, chunk: Chunk) -> Dict:
-messages = [
-{"role": "system", "content": ENTITY_PROMPT},
-{"role": "user", "content": chunk.text[:4000]},
-]
-raw = llm.chat(messages)
-# Be forgiving: attempt to locate JSON in text
-import json, re
-m = re.search(r"\{[\s\S]*\}$", raw.strip())
-if not m:
-return {"entities": [], "relations": []}
-try:
-return json.loads(m.group(0))
-except Exception:
-return {"entities": [], "relations": []}
+    raw = llm.chat(build_messages(chunk))
+    # Be forgiving: attempt to locate JSON in text
+    try:
+        return parse_entities(raw)
+    except ExtractionParseError:
+        return {"entities": [], "relations": []}
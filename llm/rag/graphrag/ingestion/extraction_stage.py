@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .document_loader import Chunk
+from .entity_extractor import ENTITY_PROMPT, ExtractionParseError, build_messages, parse_entities
+from ..utils.embedding_cache import text_hash
+from ..utils.llm import LLM
+
+
+class LLMResponseCache:
+    """
+    Durable cache of parsed extraction payloads in SQLite.
+
+    Keyed by (model, sha256(prompt), sha256(chunk text)), so changing the
+    prompt or model invalidates entries. Only successfully parsed payloads are
+    stored; failures are always re-asked.
+    """
+
+    def __init__(self, path: str):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS extractions ("
+            " model TEXT NOT NULL, prompt_hash TEXT NOT NULL, text_hash TEXT NOT NULL,"
+            " payload TEXT NOT NULL, created REAL NOT NULL,"
+            " PRIMARY KEY (model, prompt_hash, text_hash))"
+        )
+        self._conn.commit()
+
+    def get(self, model: str, prompt: str, text: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM extractions WHERE model = ? AND prompt_hash = ? AND text_hash = ?",
+                (model, text_hash(prompt), text_hash(text)),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, model: str, prompt: str, text: str, payload: Dict) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO extractions VALUES (?, ?, ?, ?, ?)",
+                (model, text_hash(prompt), text_hash(text), json.dumps(payload), time.time()),
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class RateLimiter:
+    """Thread-safe token bucket: at most `rate` units per second, `burst` at once."""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, units: float = 1.0) -> None:
+        units = min(units, self.capacity)  # a single oversized request waits for a full bucket
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= units:
+                    self._tokens -= units
+                    return
+                wait_s = (units - self._tokens) / self.rate
+            time.sleep(wait_s)
+
+
+def estimate_tokens(messages: List[Dict[str, str]]) -> int:
+    """Rough prompt size for token-per-minute limits (~4 characters per token)."""
+    return sum(len(m["content"]) for m in messages) // 4 + 1
+
+
+@dataclass
+class ExtractionFailure:
+    chunk_id: str
+    attempts: int
+    error: str
+    raw: str = ""
+
+
+class ParallelExtractor:
+    """
+    Concurrent entity extraction over many chunks.
+
+    - Up to `concurrency` LLM calls in flight, optionally capped at
+      `rate_per_sec` requests per second and `tokens_per_min` estimated
+      prompt tokens per minute
+    - Payloads are looked up in / written to an optional LLMResponseCache
+    - Parse and call failures are retried up to `max_attempts` after a
+      jittered exponential backoff (`backoff_s` doubling, capped at
+      `max_backoff_s`); chunks that still fail are recorded in `failures`
+      and not yielded
+    - `run()` drives the pool itself; `extract()` is the per-chunk entry for
+      callers that bring their own threads (the streaming pipeline runs it
+      on `concurrency` workers). Both update `stats`, and
+      `on_progress(stats)` is called every `progress_every` completed chunks
+    """
+
+    def __init__(
+        self,
+        llm: LLM,
+        cache: Optional[LLMResponseCache] = None,
+        concurrency: int = 8,
+        rate_per_sec: Optional[float] = None,
+        tokens_per_min: Optional[float] = None,
+        max_attempts: int = 3,
+        backoff_s: float = 1.0,
+        max_backoff_s: float = 30.0,
+        prompt: str = ENTITY_PROMPT,
+        progress_every: int = 100,
+        on_progress: Optional[Callable[[Dict[str, float]], None]] = None,
+    ):
+        self.llm = llm
+        self.cache = cache
+        self.concurrency = concurrency
+        self.limiter = RateLimiter(rate_per_sec) if rate_per_sec else None
+        # Provider token limits are per minute, so allow a minute's worth at once.
+        self.token_limiter = RateLimiter(tokens_per_min / 60.0, int(tokens_per_min)) if tokens_per_min else None
+        self.max_attempts = max_attempts
+        self.backoff_s = backoff_s
+        self.max_backoff_s = max_backoff_s
+        self.prompt = prompt
+        self.progress_every = progress_every
+        self.on_progress = on_progress
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Clear `failures` and `stats`; `run()` calls this on entry."""
+        with self._lock:
+            self.failures: List[ExtractionFailure] = []
+            self.stats: Dict[str, float] = {
+                "done": 0, "cached": 0, "retried": 0, "failed": 0, "seconds": 0.0, "chunks_per_sec": 0.0,
+            }
+            self._t0 = time.perf_counter()
+
+    def _extract(self, chunk: Chunk) -> Tuple[Dict, bool]:
+        if self.cache is not None:
+            cached = self.cache.get(self.llm.model, self.prompt, chunk.text)
+            if cached is not None:
+                return cached, True
+        messages = build_messages(chunk, self.prompt)
+        if self.limiter is not None:
+            self.limiter.acquire()
+        if self.token_limiter is not None:
+            self.token_limiter.acquire(estimate_tokens(messages))
+        raw = self.llm.chat(messages)
+        payload = parse_entities(raw)
+        if self.cache is not None:
+            self.cache.put(self.llm.model, self.prompt, chunk.text, payload)
+        return payload, False
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter, so workers that failed together do not retry together.
+        return random.uniform(0.0, min(self.max_backoff_s, self.backoff_s * 2 ** (attempt - 1)))
+
+    def extract(self, chunk: Chunk) -> Optional[Dict]:
+        """Extract one chunk on the calling thread, with retries; None if it keeps failing."""
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                payload, from_cache = self._extract(chunk)
+            except Exception as exc:
+                if attempt < self.max_attempts:
+                    with self._lock:
+                        self.stats["retried"] += 1
+                    time.sleep(self._backoff(attempt))
+                    continue
+                raw = exc.raw if isinstance(exc, ExtractionParseError) else ""
+                with self._lock:
+                    self.failures.append(ExtractionFailure(chunk.id, attempt, repr(exc), raw))
+                    self.stats["failed"] += 1
+                return None
+            with self._lock:
+                self.stats["done"] += 1
+                self.stats["cached"] += from_cache
+                report = self._tick()
+            if report is not None:
+                self.on_progress(report)
+            return payload
+        return None
+
+    def run(self, chunks: Iterable[Chunk]) -> Iterator[Tuple[Chunk, Dict]]:
+        """Yield (chunk, payload) in completion order; input is consumed lazily."""
+        self.reset()
+        source = iter(chunks)
+        pending: Dict = {}
+
+        def refill(pool: ThreadPoolExecutor) -> None:
+            while len(pending) < self.concurrency * 2:
+                chunk = next(source, None)
+                if chunk is None:
+                    return
+                pending[pool.submit(self.extract, chunk)] = chunk
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="extract") as pool:
+            refill(pool)
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    chunk = pending.pop(fut)
+                    payload = fut.result()
+                    if payload is not None:
+                        yield chunk, payload
+                refill(pool)
+        with self._lock:
+            report = self._tick(force=True)
+        if report is not None:
+            self.on_progress(report)
+
+    def _tick(self, force: bool = False) -> Optional[Dict[str, float]]:
+        # Called under the lock; returns the stats to report, if any.
+        self.stats["seconds"] = elapsed = time.perf_counter() - self._t0
+        self.stats["chunks_per_sec"] = self.stats["done"] / elapsed if elapsed else 0.0
+        if self.on_progress and (force or self.stats["done"] % self.progress_every == 0):
+            return dict(self.stats)
+        return None
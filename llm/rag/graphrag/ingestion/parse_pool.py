@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import json
+import multiprocessing as mp
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from multiprocessing.connection import wait
+from pathlib import Path
+from typing import Deque, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+import numpy as np
+
+
+PLAIN_SUFFIXES = {".txt", ".md"}
+
+
+def parse_document(path: Path) -> str:
+    """Extract text from one document; raises on unreadable input."""
+    suffix = path.suffix.lower()
+    if suffix in PLAIN_SUFFIXES:
+        return path.read_text(encoding="utf-8", errors="ignore")
+    if suffix == ".pdf":
+        import pypdf
+
+        reader = pypdf.PdfReader(str(path))
+        return "\n".join(page.extract_text() or "" for page in reader.pages)
+    raise ValueError(f"unsupported document type: {path.suffix}")
+
+
+class ParsedDoc(NamedTuple):
+    """
+    One parse result. `text` is None for plain-text files, which callers
+    stream from disk themselves, and for failures (`error` is then set).
+    """
+
+    path: Path
+    text: Optional[str]
+    seconds: float
+    error: Optional[str] = None
+
+
+@dataclass
+class ParseReport:
+    """
+    Per-file parse latencies plus every failure and timeout of a run.
+
+    Plain-text files are not parsed up front; whoever streams them from
+    disk reports their read time and errors through `record_read()`.
+    """
+
+    latencies: Dict[str, float] = field(default_factory=dict)
+    failures: Dict[str, str] = field(default_factory=dict)
+    timeouts: List[str] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False, compare=False)
+
+    def record(self, doc: ParsedDoc) -> None:
+        self.record_read(doc.path, doc.seconds, doc.error)
+
+    def record_read(self, path: Path, seconds: float, error: Optional[str] = None) -> None:
+        key = str(path)
+        with self._lock:
+            self.latencies[key] = seconds
+            if error is not None:
+                self.failures[key] = error
+
+    def record_timeout(self, path: Path) -> None:
+        with self._lock:
+            self.timeouts.append(str(path))
+
+    def summary(self) -> Dict[str, float]:
+        with self._lock:
+            a = np.fromiter(self.latencies.values(), dtype=np.float64)
+            out = {"files": int(a.size), "failed": len(self.failures), "timed_out": len(self.timeouts)}
+        if a.size:
+            out.update(
+                p50_s=float(np.percentile(a, 50)), p95_s=float(np.percentile(a, 95)),
+                max_s=float(a.max()), total_s=float(a.sum()),
+            )
+        return out
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"summary": self.summary(), "failures": self.failures, "timeouts": self.timeouts,
+                 "latencies": self.latencies},
+                f, indent=2,
+            )
+
+
+def _default_context() -> str:
+    # Workers start (and are replaced after a timeout) while the pipeline's
+    # threads and event loop run; forking a multi-threaded process can copy
+    # a lock some other thread holds. forkserver forks from a clean server.
+    return "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn"
+
+
+def _unread(doc: ParsedDoc) -> bool:
+    # Plain-text files pass through unparsed; their reader records them.
+    return doc.text is None and doc.error is None
+
+
+def _parse_one(path: Path) -> ParsedDoc:
+    t0 = time.perf_counter()
+    try:
+        text = parse_document(path)
+    except Exception as exc:  # reported, never raised: one bad file must not stop the run
+        return ParsedDoc(path, None, time.perf_counter() - t0, f"{type(exc).__name__}: {exc}")
+    return ParsedDoc(path, text, time.perf_counter() - t0)
+
+
+def _worker(conn) -> None:
+    while True:
+        path = conn.recv()
+        if path is None:
+            return
+        doc = _parse_one(path)
+        conn.send((doc.text, doc.seconds, doc.error))
+
+
+class _Slot:
+    def __init__(self, ctx):
+        self.conn, child = ctx.Pipe()
+        self.proc = ctx.Process(target=_worker, args=(child,), daemon=True)
+        self.proc.start()
+        child.close()
+        self.task: Optional[int] = None
+        self.started = 0.0
+
+    def stop(self, kill: bool = False) -> None:
+        if kill:
+            self.proc.kill()
+        else:
+            try:
+                self.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        self.proc.join(timeout=5)
+        self.conn.close()
+
+
+class DocumentParserPool:
+    """
+    Parses documents in worker processes, outside the caller's GIL.
+
+    - `parse(paths)` streams ParsedDoc results in input order; at most
+      `workers * prefetch` results wait in the reorder buffer
+    - A file running past `timeout_s` gets its worker killed and replaced,
+      and is reported as a timeout instead of stalling the run
+    - Parse errors come back as `ParsedDoc.error`; nothing is raised
+    - Plain-text files are not shipped through the pool (text=None): the
+      caller reads them itself, e.g. through StreamingChunker's mmap path
+    - Every result is recorded in `report`, except plain-text files: the
+      code that reads them calls `report.record_read()`
+    - Each `parse()` call starts and stops its own worker processes, unless
+      the pool is opened first (`open()` / `close()`, or a `with` block):
+      then the workers are kept across calls, e.g. one call per batch
+    - Workers start through "forkserver" (or "spawn" where that is missing)
+      unless `mp_context` says otherwise, so they never inherit the
+      caller's threads mid-run
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        timeout_s: Optional[float] = 60.0,
+        prefetch: int = 4,
+        report: Optional[ParseReport] = None,
+        mp_context: Optional[str] = None,
+    ):
+        self.workers = max(1, workers)
+        self.timeout_s = timeout_s
+        self.prefetch = max(1, prefetch)
+        self.report = report if report is not None else ParseReport()
+        self._ctx = mp.get_context(mp_context or _default_context())
+        self._slots: Optional[List[_Slot]] = None
+
+    def open(self) -> "DocumentParserPool":
+        if self._slots is None:
+            self._slots = [_Slot(self._ctx) for _ in range(self.workers)]
+        return self
+
+    def close(self) -> None:
+        slots, self._slots = self._slots, None
+        for slot in slots or ():
+            slot.stop()
+
+    def __enter__(self) -> "DocumentParserPool":
+        return self.open()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def parse(self, paths: Iterable[Path]) -> Iterator[ParsedDoc]:
+        kept = self._slots is not None
+        slots = self._slots if kept else [_Slot(self._ctx) for _ in range(self.workers)]
+        todo = iter(enumerate(paths))
+        pending: Deque[int] = deque()  # tasks in input order, not yet yielded
+        order: Dict[int, Path] = {}
+        done: Dict[int, ParsedDoc] = {}
+        exhausted = False
+        try:
+            while True:
+                # Dispatch while the reorder buffer has room.
+                for slot in slots:
+                    while slot.task is None and not exhausted and len(pending) < self.workers * self.prefetch:
+                        nxt = next(todo, None)
+                        if nxt is None:
+                            exhausted = True
+                            break
+                        i, path = nxt
+                        order[i] = path
+                        pending.append(i)
+                        if path.suffix.lower() in PLAIN_SUFFIXES:
+                            done[i] = ParsedDoc(path, None, 0.0)
+                            continue
+                        slot.conn.send(path)
+                        slot.task, slot.started = i, time.monotonic()
+
+                while pending and pending[0] in done:
+                    i = pending.popleft()
+                    doc = done.pop(i)
+                    del order[i]
+                    if not _unread(doc):
+                        self.report.record(doc)
+                    yield doc
+                busy = [s for s in slots if s.task is not None]
+                if not busy:
+                    if exhausted and not pending:
+                        return
+                    continue
+
+                wait_s = None
+                if self.timeout_s is not None:
+                    wait_s = max(0.0, min(s.started + self.timeout_s for s in busy) - time.monotonic())
+                ready = wait([s.conn for s in busy], timeout=wait_s)
+                now = time.monotonic()
+                for k, slot in enumerate(slots):
+                    if slot.task is None:
+                        continue
+                    i, path = slot.task, order[slot.task]
+                    if slot.conn in ready:
+                        try:
+                            text, seconds, error = slot.conn.recv()
+                        except EOFError:  # worker died (e.g. segfault in a parser)
+                            text, seconds, error = None, now - slot.started, "worker process died"
+                            slot.stop(kill=True)
+                            slots[k] = _Slot(self._ctx)
+                        else:
+                            slot.task = None
+                        done[i] = ParsedDoc(path, text, seconds, error)
+                    elif self.timeout_s is not None and now - slot.started >= self.timeout_s:
+                        slot.stop(kill=True)
+                        slots[k] = _Slot(self._ctx)
+                        self.report.record_timeout(path)
+                        done[i] = ParsedDoc(path, None, now - slot.started, f"timed out after {self.timeout_s}s")
+        finally:
+            for k, slot in enumerate(slots):
+                if not kept:
+                    slot.stop(kill=slot.task is not None)
+                elif slot.task is not None:
+                    # Abandoned mid-file: its answer would reach the next call.
+                    slot.stop(kill=True)
+                    slots[k] = _Slot(self._ctx)
+
+
+def parse_in_process(paths: Iterable[Path], report: Optional[ParseReport] = None) -> Iterator[ParsedDoc]:
+    """Serial counterpart of DocumentParserPool.parse (no timeouts)."""
+    for path in paths:
+        doc = ParsedDoc(path, None, 0.0) if path.suffix.lower() in PLAIN_SUFFIXES else _parse_one(path)
+        if report is not None and not _unread(doc):
+            report.record(doc)
+        yield doc
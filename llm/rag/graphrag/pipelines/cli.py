@@ -1,32 +1,244 @@
 from __future__ import annotations
 import os
+from pathlib import Path
+from typing import Optional
 import yaml
 import typer
+from neo4j.exceptions import AuthError, ServiceUnavailable
 from rich import print
 
 
 from databases.neo4j_client import Neo4jClient, Neo4jConfig
+from ..utils.embedding_cache import EmbeddingCache
 from ..utils.embeddings import Embeddings
+from ..utils import instrumentation
 from ..utils.llm import LLM
-from ..ingestion.document_loader import load_corpus
-from ..ingestion.entity_extractor import extract_entities
+from ..ingestion.chunker import StreamingChunker, make_tokenizer
+from ..ingestion.dedup import ChunkDeduplicator
+from ..ingestion.document_loader import iter_documents
+from ..ingestion.extraction_stage import LLMResponseCache, ParallelExtractor
+from ..ingestion.parse_pool import ParseReport
+from ..graph_builders.csv_export import CsvImportExporter
 from ..graph_builders.neo4j_builder import GraphBuilder
 from ..retrievers.graph_walk import GraphRetriever
 from ..prompting.system_prompts import ANSWER_SYSTEM
+from .manifest import IngestManifest
+from .streaming import build_ingest_pipeline
 
 
 app = typer.Typer(add_completion=False)
 
 
+def _load_cfg(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f)
 
 
-def _load_cfg(path: str):
-with open(path, "r", encoding="utf-8") as f:
-return yaml.safe_load(f)
+def _neo(cfg) -> Neo4jClient:
+    n = cfg["neo4j"]
+    return Neo4jClient(Neo4jConfig(uri=n["uri"], user=n["user"], password=n["password"], database=n.get("database", "neo4j")))
+
+
+def _embeddings(cfg) -> Embeddings:
+    e = cfg["embedding"]
+    c = e.get("cache") or {}
+    default_cache = os.path.join(cfg["paths"]["output_dir"], "embedding_cache.sqlite")
+    cache_path = c.get("path", default_cache)  # null disables the cache
+    cache = None
+    if cache_path:
+        cache = EmbeddingCache(cache_path, max_entries=c.get("max_entries", 1_000_000))
+        if c.get("warm", 10_000):
+            cache.warm(c.get("warm", 10_000), provider=e["provider"], model=e["model"])
+    return Embeddings(e["provider"], e["model"], cache=cache, **e.get("options", {}))
 
 
+def _graph_populated(neo: Neo4jClient) -> Optional[bool]:
+    """Whether the database holds any node (count store, O(1)); None if it cannot be reached."""
+    try:
+        return bool(neo.run("MATCH (n) RETURN count(n) > 0 AS populated")[0]["populated"])
+    except (ServiceUnavailable, AuthError):
+        return None
+
+
+def _extractor(cfg) -> ParallelExtractor:
+    x = cfg.get("extraction") or {}
+    default_cache = os.path.join(cfg["paths"]["output_dir"], "llm_cache.sqlite")
+    cache_path = x.get("cache_path", default_cache)  # null disables the cache
+    return ParallelExtractor(
+        LLM(cfg["llm"]["provider"], cfg["llm"]["model"]),
+        cache=LLMResponseCache(cache_path) if cache_path else None,
+        concurrency=x.get("concurrency", 8),
+        rate_per_sec=x["rpm"] / 60.0 if x.get("rpm") else None,
+        tokens_per_min=x.get("tpm"),
+        max_attempts=x.get("max_attempts", 3),
+    )
 
 
 @app.command()
-def ingest(config: str = typer.Option("configs/config.yaml")):
-app()
+def ingest(
+    config: str = typer.Option("configs/config.yaml"),
+    extract: bool = typer.Option(True),
+    full: bool = typer.Option(False, help="Ignore the manifest and re-ingest every document."),
+    mode: str = typer.Option(
+        "auto",
+        help="transactional | bulk-export | auto (bulk-export when the database is empty).",
+    ),
+):
+    cfg = _load_cfg(config)
+    instrumentation.configure(cfg.get("metrics"))
+    embed = _embeddings(cfg)
+    extractor = _extractor(cfg) if extract else None
+
+    corpus_dir = cfg["paths"]["corpus_dir"]
+    output_dir = cfg["paths"]["output_dir"]
+    manifest_path = os.path.join(output_dir, "ingest_manifest.json")
+    if mode not in ("auto", "transactional", "bulk-export"):
+        raise typer.BadParameter(f"unknown mode: {mode}")
+
+    # Ask the database, not the local manifest, whether this is a cold load:
+    # the import below overwrites whatever the database holds.
+    neo = _neo(cfg)
+    populated = _graph_populated(neo)
+    if populated:
+        if IngestManifest.promote_pending(manifest_path):
+            print("[green]Bulk import found in the database; adopted its pending manifest[/green]")
+    elif populated is False and IngestManifest.discard_pending(manifest_path):
+        print("[yellow]Database is empty: the previous bulk export was never imported, exporting again[/yellow]")
+    if mode == "auto":
+        if populated is None:
+            raise typer.BadParameter(
+                "cannot reach Neo4j to check whether the graph is empty; pass --mode explicitly"
+            )
+        mode = "transactional" if populated else "bulk-export"
+    if mode == "bulk-export" and populated:
+        raise typer.BadParameter("the database is not empty; bulk-export is only for loading an empty graph")
+
+    if mode == "bulk-export":
+        # Cold load: write neo4j-admin import CSVs instead of MERGE transactions.
+        # The manifest stays pending until the import shows up in the database.
+        neo.close()
+        neo = None
+        IngestManifest.discard_pending(manifest_path)  # a fresh export covers every document
+        manifest = IngestManifest(IngestManifest.pending_path(manifest_path))
+        builder = CsvImportExporter(os.path.join(output_dir, "import"), embed)
+    else:
+        manifest = IngestManifest(manifest_path, force=full)
+        builder = GraphBuilder(neo, embed)
+    dedup = ChunkDeduplicator(**cfg["dedup"]) if cfg.get("dedup") else None
+    parse_report = ParseReport()
+    pipe = build_ingest_pipeline(
+        builder,
+        extractor,
+        corpus_dir,
+        chunk_size=cfg["chunking"]["size"],
+        overlap=cfg["chunking"]["overlap"],
+        chunker=StreamingChunker(
+            cfg["chunking"]["size"], cfg["chunking"]["overlap"], make_tokenizer(cfg["chunking"].get("tokenizer"))
+        ),
+        manifest=manifest,
+        dedup=dedup,
+        parse_report=parse_report,
+        **cfg.get("ingest", {}),
+    )
+    stats = pipe.run(iter_documents(corpus_dir))
+    runs = [("corpus", pipe.seconds, pipe.bottleneck(), stats)]
+    for doc_id, chunk_ids in manifest.removed_docs().items():
+        builder.delete_chunks(chunk_ids)
+    requeued = manifest.requeued()
+    if requeued:
+        # Their dedup canonicals changed or disappeared above: chunk them again.
+        print(f"[yellow]Re-ingesting {len(requeued)} documents whose duplicate chunks lost their canonical[/yellow]")
+        stats = pipe.run(Path(corpus_dir, d) for d in requeued)
+        runs.append(("re-ingest", pipe.seconds, pipe.bottleneck(), stats))
+    if extractor is not None and extractor.failures:
+        # Their hashes are already recorded: forget them so the next run extracts them again.
+        manifest.retry_chunks(f.chunk_id for f in extractor.failures)
+    manifest.save()
+    builder.close()
+
+    if neo is not None:
+        GraphRetriever(neo, embed).ensure_indexes(cfg["embedding"].get("dimension"))
+    else:
+        print(f"[green]Wrote import CSVs[/green] {builder.counts()}")
+        print(
+            "Stop the database, run the import, then start it and run `ingest` again to create indexes "
+            "(documents are only marked as ingested once the import is in the database):"
+        )
+        print(f"  {builder.import_command(cfg['neo4j'].get('database', 'neo4j'))}")
+    print(f"[green]Ingest finished in {sum(r[1] for r in runs):.1f}s[/green]")
+    for name, seconds, bottleneck, stats in runs:
+        print(f"  {name} pass: {seconds:.1f}s (bottleneck: [bold]{bottleneck}[/bold])")
+        for s in stats.values():
+            print(
+                f"    {s.name:<16} in={s.items_in:<7} out={s.items_out:<7} busy={s.busy_s:7.1f}s "
+                f"starved={s.wait_in_s:7.1f}s blocked={s.wait_out_s:7.1f}s"
+            )
+    p = parse_report.summary()
+    if p["files"]:
+        print(
+            f"  parsing: {p['files']} files, p50 {p['p50_s'] * 1e3:.1f} ms, p95 {p['p95_s'] * 1e3:.1f} ms, "
+            f"max {p['max_s']:.2f}s"
+        )
+    if parse_report.failures:
+        report_path = os.path.join(output_dir, "parse_report.json")
+        os.makedirs(output_dir, exist_ok=True)
+        parse_report.save(report_path)
+        print(
+            f"[yellow]{p['failed']} documents could not be read ({p['timed_out']} timed out) and were skipped; "
+            f"see {report_path}[/yellow]"
+        )
+    m = manifest.summary
+    print(
+        f"  documents: {m['docs_processed']} processed, {m['docs_skipped']} unchanged, {m['docs_removed']} removed; "
+        f"chunks: {m['chunks_processed']} processed, {m['chunks_skipped']} unchanged, {m['chunks_deleted']} deleted"
+    )
+    if dedup is not None:
+        d = dedup.stats()
+        print(
+            f"  dedup: {d['seen']} chunks seen, {d['exact_duplicates']} exact + {d['near_duplicates']} near duplicates "
+            f"dropped (ratio {d['dedup_ratio']:.1%})"
+        )
+    if extractor is not None:
+        x = extractor.stats
+        print(
+            f"  extraction: {x['done']} chunks ({x['cached']} cached), {x['retried']} retries, "
+            f"{x['chunks_per_sec']:.1f} chunks/s"
+        )
+        if extractor.failures:
+            print(
+                f"[yellow]{len(extractor.failures)} chunks failed entity extraction; "
+                f"they are retried on the next run[/yellow]"
+            )
+        if extractor.cache is not None:
+            extractor.cache.close()
+    if embed.cache is not None:
+        e = embed.cache.stats()
+        print(f"  embedding cache: {e['hits']} hits, {e['misses']} misses ({e['hit_rate']:.1%}), {e['entries']} entries")
+        embed.cache.close()
+    if neo is not None:
+        neo.close()
+
+
+@app.command()
+def ask(question: str, config: str = typer.Option("configs/config.yaml")):
+    cfg = _load_cfg(config)
+    instrumentation.configure(cfg.get("metrics"))
+    neo = _neo(cfg)
+    embed = _embeddings(cfg)
+    r = cfg.get("retrieval", {})
+    retriever = GraphRetriever(neo, embed, top_k=r.get("top_k", 12), expand_hops=r.get("expand_hops", 2))
+    hits = retriever.retrieve(question)
+    context = "\n\n".join(h["text"] for h in hits)
+    llm = LLM(cfg["llm"]["provider"], cfg["llm"]["model"])
+    answer = llm.chat([
+        {"role": "system", "content": ANSWER_SYSTEM},
+        {"role": "user", "content": f"CONTEXT:\n{context}\n\nQUESTION: {question}"},
+    ])
+    print(answer)
+    if embed.cache is not None:
+        embed.cache.close()
+    neo.close()
+
+
+if __name__ == "__main__":
+    app()
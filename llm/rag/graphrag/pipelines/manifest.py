@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Set, Tuple
+
+from ..ingestion.document_loader import Chunk
+from ..utils.embedding_cache import text_hash
+
+
+def file_hash(path: Path, block: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for buf in iter(lambda: f.read(block), b""):
+            h.update(buf)
+    return h.hexdigest()
+
+
+class IngestManifest:
+    """
+    Local record of what the graph already holds, for incremental ingest.
+
+    Layout (JSON): {doc_id: {"hash": <file sha256>, "chunks": {chunk_id: <text sha256>},
+                             "aliases": {chunk_id: <canonical chunk id>}}}
+
+    - `doc_unchanged()` lets the reader skip documents whose bytes did not change
+    - `diff_chunks()` keeps only new/modified chunks of a changed document and
+      returns ids of chunks that no longer exist
+    - `removed_docs()` lists documents that disappeared from the corpus
+    - `add_aliases()` records chunks ChunkDeduplicator dropped in favour of a
+      canonical chunk, usually in another document. When that canonical is
+      modified or deleted, the alias chunk is forgotten and its document
+      loses its hash, so it is ingested again; `requeued()` lists such
+      documents for a follow-up pass of the same run
+    - `retry_chunks()` forgets chunks whose entity extraction failed and
+      clears their documents' hashes, so the next run extracts them again
+    Changes are held in memory until `save()`, so a failed run is retried in full.
+    `force=True` treats every document and chunk as changed but still prunes.
+
+    An offline bulk export saves to `pending_path(path)` instead: the graph
+    only holds those documents once neo4j-admin import has run, so the
+    entries are adopted with `promote_pending()` after that is confirmed.
+    """
+
+    def __init__(self, path: str, force: bool = False):
+        self.path = path
+        self.force = force
+        self.docs: Dict[str, Dict] = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.docs = json.load(f)
+        self._seen: Set[str] = set()
+        # canonical chunk id -> {(doc id, alias chunk id)}, from every entry's "aliases"
+        self._aliased: Dict[str, Set[Tuple[str, str]]] = {}
+        for doc_id, entry in self.docs.items():
+            for alias, canon in entry.get("aliases", {}).items():
+                self._aliased.setdefault(canon, set()).add((doc_id, alias))
+        self._lock = threading.Lock()
+        self.summary: Dict[str, int] = {
+            "docs_skipped": 0, "docs_processed": 0, "docs_removed": 0,
+            "chunks_skipped": 0, "chunks_processed": 0, "chunks_deleted": 0,
+        }
+
+    def doc_unchanged(self, doc_id: str, content_hash: str) -> bool:
+        with self._lock:
+            self._seen.add(doc_id)
+            entry = self.docs.get(doc_id)
+            if not self.force and entry is not None and entry.get("hash") == content_hash:
+                self.summary["docs_skipped"] += 1
+                self.summary["chunks_skipped"] += len(entry["chunks"])
+                return True
+            return False
+
+    def diff_chunks(self, doc_id: str, content_hash: str, chunks: List[Chunk]) -> Tuple[List[Chunk], List[str]]:
+        new_hashes = {c.id: text_hash(c.text) for c in chunks}
+        with self._lock:
+            prev = self.docs.get(doc_id, {})
+            old = prev.get("chunks", {})
+            changed = [c for c in chunks if self.force or old.get(c.id) != new_hashes[c.id]]
+            stale = [cid for cid in old if cid not in new_hashes]
+            # Unchanged aliases still stand; changed chunks go through dedup again.
+            gone = {c.id for c in changed}.union(stale)
+            aliases = {}
+            for alias, canon in prev.get("aliases", {}).items():
+                if alias in gone:
+                    self._unlink(doc_id, alias, canon)
+                else:
+                    aliases[alias] = canon
+            self.docs[doc_id] = {"hash": content_hash, "chunks": new_hashes, "aliases": aliases}
+            self._requeue_aliases_of(gone)
+            self.summary["docs_processed"] += 1
+            self.summary["chunks_skipped"] += len(chunks) - len(changed)
+            self.summary["chunks_processed"] += len(changed)
+            self.summary["chunks_deleted"] += len(stale)
+        return changed, stale
+
+    def removed_docs(self) -> Dict[str, List[str]]:
+        """Pop documents not seen in this run and return their chunk ids."""
+        with self._lock:
+            gone = {d: list(e["chunks"]) for d, e in self.docs.items() if d not in self._seen}
+            for d, ids in gone.items():
+                for alias, canon in self.docs.pop(d).get("aliases", {}).items():
+                    self._unlink(d, alias, canon)
+                self.summary["docs_removed"] += 1
+                self.summary["chunks_deleted"] += len(ids)
+            self._requeue_aliases_of({cid for ids in gone.values() for cid in ids})
+        return gone
+
+    def add_aliases(self, aliases: Dict[str, List[Tuple[str, str]]]) -> None:
+        """Record dedup aliases: canonical chunk id -> [(alias chunk id, doc id)]."""
+        with self._lock:
+            for canon, links in aliases.items():
+                for alias, doc_id in links:
+                    entry = self.docs.get(doc_id)
+                    if entry is None:
+                        continue
+                    entry.setdefault("aliases", {})[alias] = canon
+                    self._aliased.setdefault(canon, set()).add((doc_id, alias))
+
+    def retry_chunks(self, chunk_ids: Iterable[str]) -> int:
+        """Forget `chunk_ids` so the next run processes them again; returns how many were known."""
+        wanted = set(chunk_ids)
+        forgotten = 0
+        with self._lock:
+            for entry in self.docs.values():
+                hit = wanted.intersection(entry["chunks"])
+                if not hit:
+                    continue
+                for chunk_id in hit:
+                    del entry["chunks"][chunk_id]
+                entry["hash"] = None
+                forgotten += len(hit)
+        return forgotten
+
+    def requeued(self) -> List[str]:
+        """Documents whose hash was cleared (lost alias or failed chunk) and not re-read since."""
+        with self._lock:
+            return sorted(d for d, e in self.docs.items() if e.get("hash") is None)
+
+    def _unlink(self, doc_id: str, alias: str, canon: str) -> None:
+        links = self._aliased.get(canon)
+        if links is not None:
+            links.discard((doc_id, alias))
+            if not links:
+                del self._aliased[canon]
+
+    def _requeue_aliases_of(self, chunk_ids) -> None:
+        # Aliases of a modified or deleted canonical have no text in the
+        # graph any more: forget them so their documents are chunked again.
+        for canon in chunk_ids:
+            for doc_id, alias in self._aliased.pop(canon, ()):
+                entry = self.docs.get(doc_id)
+                if entry is None:
+                    continue
+                entry.get("aliases", {}).pop(alias, None)
+                entry["chunks"].pop(alias, None)
+                entry["hash"] = None
+
+    @staticmethod
+    def pending_path(path: str) -> str:
+        root, ext = os.path.splitext(path)
+        return f"{root}.pending{ext}"
+
+    @classmethod
+    def promote_pending(cls, path: str) -> bool:
+        """Adopt the pending manifest of an imported bulk export; False if there is none."""
+        pending = cls.pending_path(path)
+        if not os.path.exists(pending):
+            return False
+        os.replace(pending, path)
+        return True
+
+    @classmethod
+    def discard_pending(cls, path: str) -> bool:
+        """Drop the pending manifest of an export that was never imported."""
+        pending = cls.pending_path(path)
+        if not os.path.exists(pending):
+            return False
+        os.remove(pending)
+        return True
+
+    def save(self) -> None:
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.docs, f)
+        os.replace(tmp, self.path)  # atomic: never leave a half-written manifest
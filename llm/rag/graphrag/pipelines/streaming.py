@@ -0,0 +1,364 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from ..graph_builders.neo4j_builder import GraphBuilder
+from ..ingestion.chunker import StreamingChunker
+from ..ingestion.dedup import ChunkDeduplicator
+from ..ingestion.document_loader import Chunk, doc_id_for, iter_documents, iter_file_chunks
+from ..ingestion.extraction_stage import ParallelExtractor
+from ..ingestion.parse_pool import DocumentParserPool, ParseReport, parse_in_process
+from ..utils.embedding_executor import EmbeddingExecutor
+from .manifest import IngestManifest, file_hash
+
+
+_DONE = object()
+
+
+@dataclass
+class StageStats:
+    name: str
+    workers: int
+    items_in: int = 0
+    items_out: int = 0
+    batches: int = 0
+    busy_s: float = 0.0      # time spent inside the stage function
+    wait_in_s: float = 0.0   # starved: waiting on the upstream queue
+    wait_out_s: float = 0.0  # back-pressured: waiting on the downstream queue
+
+    @property
+    def utilisation(self) -> float:
+        total = self.busy_s + self.wait_in_s + self.wait_out_s
+        return self.busy_s / total if total else 0.0
+
+
+@dataclass
+class Stage:
+    """
+    One pipeline step: `fn(batch) -> iterable of outputs` run by `workers`
+    threads over batches of up to `batch_size` items. `queue_size` bounds the
+    stage's input buffer (in items), which is what propagates back-pressure.
+    """
+
+    name: str
+    fn: Callable[[List], Optional[Iterable]]
+    workers: int = 1
+    batch_size: int = 1
+    queue_size: int = 64
+    linger_s: float = 0.05  # how long to wait for a batch to fill up
+    on_finish: Optional[Callable[[], None]] = None  # run once after the last batch
+    on_close: Optional[Callable[[], None]] = None  # run once when the workers exit, even on error
+    stats: StageStats = field(init=False)
+
+    def __post_init__(self):
+        self.stats = StageStats(self.name, self.workers)
+
+
+class StreamingPipeline:
+    """
+    Bounded-queue, thread-per-worker streaming pipeline.
+
+    Each stage reads from its own bounded queue and writes to the next, so
+    memory stays proportional to the queue sizes rather than to the input,
+    and all stages overlap. The first worker error stops the pipeline and is
+    re-raised from `run()`; each stage's `on_close` runs either way. Every
+    `run()` starts with fresh stage stats.
+    """
+
+    def __init__(self, stages: List[Stage]):
+        self.stages = stages
+        self._stop = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._lock = threading.Lock()
+        self.seconds = 0.0
+
+    def _put(self, q: "queue.Queue", item, stats: Optional[StageStats]) -> bool:
+        t0 = time.perf_counter()
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        if stats is not None:
+            with self._lock:
+                stats.wait_out_s += time.perf_counter() - t0
+        return not self._stop.is_set()
+
+    def _fail(self, exc: BaseException) -> None:
+        with self._lock:
+            self._error = self._error or exc
+        self._stop.set()
+
+    def _worker(
+        self, stage: Stage, inq: "queue.Queue", outq: Optional["queue.Queue"], remaining: List[int], alive: List[int]
+    ) -> None:
+        st = stage.stats
+        finished = False
+        try:
+            while not finished and not self._stop.is_set():
+                t0 = time.perf_counter()
+                try:
+                    item = inq.get(timeout=0.1)
+                except queue.Empty:
+                    with self._lock:
+                        st.wait_in_s += time.perf_counter() - t0
+                    continue
+                batch = []
+                if item is _DONE:
+                    finished = True
+                else:
+                    batch.append(item)
+                    deadline = time.perf_counter() + stage.linger_s
+                    while len(batch) < stage.batch_size:
+                        try:
+                            item = inq.get(timeout=max(0.0, deadline - time.perf_counter()))
+                        except queue.Empty:
+                            break
+                        if item is _DONE:
+                            finished = True
+                            break
+                        batch.append(item)
+                with self._lock:
+                    st.wait_in_s += time.perf_counter() - t0
+                if not batch:
+                    continue
+
+                t1 = time.perf_counter()
+                out = stage.fn(batch)
+                out = list(out) if out is not None else []
+                with self._lock:
+                    st.busy_s += time.perf_counter() - t1
+                    st.items_in += len(batch)
+                    st.items_out += len(out)
+                    st.batches += 1
+                if outq is not None:
+                    for o in out:
+                        if not self._put(outq, o, st):
+                            return
+        except BaseException as exc:  # surface the first failure from run()
+            self._fail(exc)
+        finally:
+            if finished:
+                # Re-post the sentinel for sibling workers; the last one signals downstream.
+                with self._lock:
+                    remaining[0] -= 1
+                    last = remaining[0] == 0
+                if not last:
+                    self._put(inq, _DONE, None)
+                else:
+                    try:
+                        if stage.on_finish is not None and not self._stop.is_set():
+                            stage.on_finish()
+                    except BaseException as exc:
+                        self._fail(exc)
+                    if outq is not None:
+                        self._put(outq, _DONE, None)
+            with self._lock:
+                alive[0] -= 1
+                closing = alive[0] == 0
+            if closing and stage.on_close is not None:
+                try:
+                    stage.on_close()
+                except BaseException as exc:
+                    self._fail(exc)
+
+    def run(self, source: Iterable) -> Dict[str, StageStats]:
+        t0 = time.perf_counter()
+        self._stop.clear()
+        self._error = None
+        for stage in self.stages:
+            stage.stats = StageStats(stage.name, stage.workers)  # the previous run's dict keeps its own
+        queues = [queue.Queue(maxsize=s.queue_size) for s in self.stages]
+        threads = []
+        for i, stage in enumerate(self.stages):
+            outq = queues[i + 1] if i + 1 < len(queues) else None
+            remaining, alive = [stage.workers], [stage.workers]
+            for w in range(stage.workers):
+                t = threading.Thread(
+                    target=self._worker,
+                    args=(stage, queues[i], outq, remaining, alive),
+                    name=f"{stage.name}-{w}",
+                    daemon=True,
+                )
+                t.start()
+                threads.append(t)
+
+        try:
+            for item in source:
+                if not self._put(queues[0], item, None):
+                    break
+            self._put(queues[0], _DONE, None)
+        except BaseException as exc:
+            self._fail(exc)
+        for t in threads:
+            t.join()
+        self.seconds = time.perf_counter() - t0
+        if self._error is not None:
+            raise self._error
+        return self.stats()
+
+    def stats(self) -> Dict[str, StageStats]:
+        return {s.name: s.stats for s in self.stages}
+
+    def bottleneck(self) -> Optional[str]:
+        # Highest busy time per worker is the stage everything else waits on.
+        if not self.stages:
+            return None
+        return max(self.stages, key=lambda s: s.stats.busy_s / max(1, s.workers)).name
+
+
+def build_ingest_pipeline(
+    builder: GraphBuilder,
+    extractor: Optional[ParallelExtractor],
+    corpus_dir: str,
+    chunk_size: int = 800,
+    overlap: int = 120,
+    read_workers: int = 2,
+    embed_batch: int = 64,
+    embed_workers: int = 2,
+    embed_in_flight: int = 4,
+    embed_batch_tokens: int = 8000,
+    upsert_batch: int = 256,
+    extract_workers: Optional[int] = None,
+    entity_batch: int = 32,
+    entity_flush_rows: int = 50_000,
+    queue_size: int = 256,
+    manifest: Optional[IngestManifest] = None,
+    chunker: Optional[StreamingChunker] = None,
+    dedup: Optional[ChunkDeduplicator] = None,
+    parse_workers: int = 0,
+    parse_timeout_s: Optional[float] = 60.0,
+    parse_report: Optional[ParseReport] = None,
+) -> StreamingPipeline:
+    """
+    read → parse → chunk → embed → upsert chunks → extract entities → upsert entities.
+
+    Run with `pipe.run(iter_documents(corpus_dir))`; extraction stages are
+    skipped when `extractor` is None. The extract stage runs
+    `extract_workers` (default: the extractor's `concurrency`) threads over
+    `extractor.extract`, so the extractor's limits, retries and stats apply.
+    With a `manifest`, unchanged documents and chunks are dropped early and
+    chunks that no longer exist are deleted.
+    With `parse_workers` > 0, documents are parsed by a DocumentParserPool
+    of that many processes (`parse_timeout_s` per file), otherwise on the
+    parse stage's threads. Files that fail or time out are skipped, keep
+    whatever the graph and manifest held for them, and are listed in
+    `parse_report` together with per-file latencies.
+    `chunker` defaults to a whitespace-token StreamingChunker(chunk_size, overlap);
+    plain-text files go through its mmap path and are never read whole.
+    With `dedup`, near-duplicate chunks are dropped before embedding and
+    recorded as aliases on their canonical chunk (and in the manifest) once
+    all chunks are written.
+    Embedding goes through an EmbeddingExecutor shared by the
+    `embed_workers` threads: each batch is split into requests of at most
+    `embed_batch_tokens` estimated tokens, at most `embed_in_flight` of them
+    are sent at once, and rate-limit errors are retried with backoff.
+    """
+    chunker = chunker or StreamingChunker(chunk_size, overlap)
+    report = parse_report if parse_report is not None else ParseReport()
+    pool = DocumentParserPool(parse_workers, parse_timeout_s, report=report) if parse_workers > 0 else None
+
+    def read(paths: List[Path]):
+        out = []
+        for p in paths:
+            doc_id = doc_id_for(p, corpus_dir)
+            h = file_hash(p) if manifest is not None else ""
+            if manifest is not None and manifest.doc_unchanged(doc_id, h):
+                continue
+            out.append((p, doc_id, h))
+        return out
+
+    def parse(items: List[tuple]):
+        meta = {p: (doc_id, h) for p, doc_id, h in items}
+        if pool is not None:
+            docs = pool.open().parse(list(meta))  # workers stay up between batches
+        else:
+            docs = parse_in_process(list(meta), report)
+        # Plain-text files come back without text and are chunked from an mmap below.
+        return [(d.path, *meta[d.path], d.text) for d in docs if d.error is None]
+
+    def chunk(docs: List[tuple]):
+        out: List[Chunk] = []
+        for path, doc_id, h, text in docs:
+            try:
+                chunks = list(iter_file_chunks(path, doc_id, chunker, text, report))
+            except OSError:
+                continue  # recorded in the report; the manifest keeps the old entry
+            if manifest is not None:
+                chunks, stale = manifest.diff_chunks(doc_id, h, chunks)
+                if stale:
+                    builder.delete_chunks(stale)
+            out.extend(chunks)
+        return out
+
+    def drop_duplicates(chunks: List[Chunk]):
+        return dedup.filter(chunks)
+
+    def write_aliases():
+        aliases = dedup.pop_aliases()
+        builder.add_aliases(aliases)
+        if manifest is not None:
+            manifest.add_aliases(aliases)
+
+    embedder = EmbeddingExecutor(
+        builder.embed, max_batch_tokens=embed_batch_tokens, max_batch_size=embed_batch, max_in_flight=embed_in_flight
+    )
+
+    def embed(chunks: List[Chunk]):
+        vecs = embedder.embed([c.text for c in chunks])
+        return list(zip(chunks, vecs))
+
+    def upsert_chunks(pairs: List[tuple]):
+        builder.upsert_chunks([c for c, _ in pairs], [v for _, v in pairs])
+        if manifest is not None and extractor is not None:
+            builder.clear_mentions([c.id for c, _ in pairs])
+        return [c for c, _ in pairs] if extractor is not None else None
+
+    def extract(chunks: List[Chunk]):
+        return [(c.id, p) for c in chunks if (p := extractor.extract(c)) is not None]
+
+    writer = builder.bulk_writer(max_rows=entity_flush_rows)
+
+    def upsert_entities(rows: List[tuple]):
+        for chunk_id, payload in rows:
+            writer.add(chunk_id, payload)
+
+    stages = [
+        Stage("read", read, workers=read_workers, queue_size=read_workers * 2),
+        # One thread drives the process pool; batches keep all of its workers busy.
+        Stage(
+            "parse", parse,
+            workers=1 if pool is not None else read_workers,
+            batch_size=pool.workers * pool.prefetch if pool is not None else 1,
+            queue_size=pool.workers * pool.prefetch * 2 if pool is not None else read_workers * 2,
+            on_close=pool.close if pool is not None else None,
+        ),
+        Stage("chunk", chunk, queue_size=read_workers * 2),
+    ]
+    if dedup is not None:
+        stages.append(Stage("dedup", drop_duplicates, batch_size=embed_batch, queue_size=queue_size))
+    stages += [
+        Stage(
+            "embed", embed, workers=embed_workers, batch_size=embed_batch, queue_size=queue_size,
+            on_close=embedder.close,
+        ),
+        Stage(
+            "upsert_chunks", upsert_chunks, batch_size=upsert_batch, queue_size=queue_size,
+            on_finish=write_aliases if dedup is not None else None,
+        ),
+    ]
+    if extractor is not None:
+        stages += [
+            Stage("extract", extract, workers=extract_workers or extractor.concurrency, queue_size=queue_size),
+            Stage(
+                "upsert_entities", upsert_entities, batch_size=entity_batch, queue_size=queue_size,
+                on_finish=writer.flush,
+            ),
+        ]
+    return StreamingPipeline(stages)
@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import sys
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from databases.neo4j_client import Neo4jClient
+
+
+# Chunks touched at or after the watermark, with their current MENTIONS.
+# `coalesce` keeps nodes written without timestamps (e.g. neo4j-admin
+# imports) visible to the initial full load, which uses $wm = -1.
+CHUNK_MENTIONS_CYPHER = (
+    "MATCH (c:Chunk) WHERE coalesce(c.updated_at, 0) >= $wm "
+    "OPTIONAL MATCH (c)-[:MENTIONS]->(e:Entity) "
+    "RETURN c.id AS chunk, collect(e.id) AS entities, c.updated_at AS ts"
+)
+RELATES_CYPHER = (
+    "MATCH (a:Entity)-[r:RELATES]->(b:Entity) WHERE coalesce(r.updated_at, 0) >= $wm "
+    "RETURN a.id AS a, b.id AS b, r.updated_at AS ts"
+)
+
+_EMPTY = np.zeros(0, dtype=np.int32)
+
+
+@dataclass(frozen=True)
+class CSR:
+    """Compressed sparse rows: neighbours of row i are indices[indptr[i]:indptr[i + 1]]."""
+
+    indptr: np.ndarray
+    indices: np.ndarray
+
+    @property
+    def n_rows(self) -> int:
+        return len(self.indptr) - 1
+
+    def degree(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+    def gather(self, rows: np.ndarray, cap: int | None = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Neighbours of every row in `rows` (at most `cap` each) and the row each came from."""
+        starts = self.indptr[rows]
+        lens = self.indptr[rows + 1] - starts
+        if cap is not None:
+            lens = np.minimum(lens, cap)
+        total = int(lens.sum())
+        if total == 0:
+            return _EMPTY, _EMPTY
+        # Offsets of each block laid end to end, shifted onto its CSR slice.
+        shift = np.repeat(starts - (np.cumsum(lens) - lens), lens)
+        return self.indices[shift + np.arange(total)], np.repeat(rows, lens)
+
+    @property
+    def nbytes(self) -> int:
+        return self.indptr.nbytes + self.indices.nbytes
+
+
+def build_csr(rows: np.ndarray, cols: np.ndarray, n_rows: int, col_degree: np.ndarray | None = None) -> CSR:
+    """
+    CSR from COO pairs; duplicate pairs are dropped. With `col_degree`, each
+    row lists its lowest-degree neighbours first, so a fan-out cap keeps the
+    most specific ones and sheds hubs.
+    """
+    if len(rows):
+        n_cols = int(cols.max()) + 1
+        key = np.unique(rows.astype(np.int64) * n_cols + cols)
+        rows, cols = (key // n_cols).astype(np.int32), (key % n_cols).astype(np.int32)
+    order = np.lexsort((col_degree[cols], rows)) if col_degree is not None and len(rows) else slice(None)
+    counts = np.bincount(rows, minlength=n_rows)
+    indptr = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    return CSR(indptr, cols[order].astype(np.int32))
+
+
+class _Interner:
+    """Stable string id -> dense int index."""
+
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+        self.ids: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def get(self, key: str) -> int:
+        i = self.index.get(key)
+        if i is None:
+            i = self.index[key] = len(self.ids)
+            self.ids.append(key)
+        return i
+
+    def lookup(self, keys: Iterable[str]) -> np.ndarray:
+        return np.fromiter((self.index[k] for k in keys if k in self.index), dtype=np.int32)
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            sys.getsizeof(self.index)
+            + sys.getsizeof(self.ids)
+            + sum(sys.getsizeof(k) for k in self.ids)
+        )
+
+
+class AdjacencySnapshot:
+    """
+    In-process copy of the Chunk-MENTIONS-Entity-RELATES graph as int32 CSR arrays.
+
+    - `load()` reads every chunk's mentions and every relation once;
+      `refresh()` re-reads only what GraphBuilder stamped with an
+      `updated_at` at or after the last watermark minus `lag_ms` and
+      splices it in. Neo4j's timestamp() is fixed when a transaction
+      starts, so a write that commits after a refresh can carry a stamp
+      below the watermark; the lag re-reads that window (re-reads are
+      idempotent) and should exceed the longest write transaction
+    - `sync(version)` refreshes only when the graph version (GraphVersion,
+      bumped after writes commit) differs from the one last synced;
+      GraphRetriever calls it before each retrieval
+    - `expand()` does the `[:RELATES*0..hops]` walk locally with vectorised
+      frontier steps. Each entity follows at most `max_fanout` relations
+      (lowest-degree neighbours first); entities with more than `max_degree`
+      relations are reached but not walked through
+    - `memory()` reports the bytes held by arrays and id maps
+    Deleted chunks are not seen by `refresh()`; callers re-fetch expanded ids
+    from Neo4j, so they simply drop out until the next `load()`.
+    """
+
+    def __init__(self, neo: Neo4jClient, max_fanout: int = 32, max_degree: int = 1000, lag_ms: int = 60_000):
+        self.neo = neo
+        self.max_fanout = max_fanout
+        self.max_degree = max_degree
+        self.lag_ms = lag_ms
+        self.watermark = -1
+        self.version: Optional[int] = None  # graph version of the last sync()
+        self._lock = threading.Lock()
+        self._chunks = _Interner()
+        self._entities = _Interner()
+        # COO edge lists are the source of truth; CSRs are rebuilt from them.
+        self._mention_c = _EMPTY
+        self._mention_e = _EMPTY
+        self._rel_a = _EMPTY
+        self._rel_b = _EMPTY
+        # (chunk interner, chunk->entity, entity<->entity, entity->chunk),
+        # swapped in one assignment so readers never see a half-built state.
+        self._graph: Tuple[_Interner, CSR, CSR, CSR] = self._build()
+
+    # -------------------------------- Loading --------------------------------
+
+    def load(self) -> "AdjacencySnapshot":
+        with self._lock:
+            self._chunks, self._entities = _Interner(), _Interner()
+            self._mention_c = self._mention_e = self._rel_a = self._rel_b = _EMPTY
+            self.watermark = -1
+            self.version = None
+            self._apply(*self._read(-1))
+        return self
+
+    def refresh(self) -> int:
+        """Apply changes since the watermark; returns the number of chunks and relations read."""
+        with self._lock:
+            return self._refresh_locked()
+
+    def sync(self, version: int) -> int:
+        """`refresh()` if the graph has moved to another version; 0 if not, or if a refresh is running."""
+        if version == self.version or not self._lock.acquire(blocking=False):
+            return 0  # a concurrent refresh is underway; serve the current arrays meanwhile
+        try:
+            if version == self.version:
+                return 0
+            n = self._refresh_locked()
+            self.version = version
+            return n
+        finally:
+            self._lock.release()
+
+    def _refresh_locked(self) -> int:
+        wm = self.watermark - self.lag_ms if self.watermark >= 0 else -1
+        chunk_rows, rel_rows = self._read(wm)
+        if chunk_rows or rel_rows:
+            self._apply(chunk_rows, rel_rows)
+        return len(chunk_rows) + len(rel_rows)
+
+    def _read(self, wm: int) -> Tuple[List[Dict], List[Dict]]:
+        return (
+            self.neo.run(CHUNK_MENTIONS_CYPHER, {"wm": wm}),
+            self.neo.run(RELATES_CYPHER, {"wm": wm}),
+        )
+
+    def _apply(self, chunk_rows: List[Dict], rel_rows: List[Dict]) -> None:
+        ck, ek = self._chunks, self._entities
+        touched = np.fromiter((ck.get(r["chunk"]) for r in chunk_rows), dtype=np.int32, count=len(chunk_rows))
+        # A touched chunk's MENTIONS are replaced wholesale.
+        keep = ~np.isin(self._mention_c, touched)
+        new_c = [ck.index[r["chunk"]] for r in chunk_rows for _ in r["entities"]]
+        new_e = [ek.get(e) for r in chunk_rows for e in r["entities"]]
+        self._mention_c = np.concatenate([self._mention_c[keep], np.asarray(new_c, dtype=np.int32)])
+        self._mention_e = np.concatenate([self._mention_e[keep], np.asarray(new_e, dtype=np.int32)])
+        rel_a = np.concatenate([self._rel_a, np.asarray([ek.get(r["a"]) for r in rel_rows], dtype=np.int32)])
+        rel_b = np.concatenate([self._rel_b, np.asarray([ek.get(r["b"]) for r in rel_rows], dtype=np.int32)])
+        # Relations re-read inside the lag window would otherwise pile up.
+        n_e = max(len(ek), 1)
+        key = np.unique(rel_a.astype(np.int64) * n_e + rel_b)
+        self._rel_a, self._rel_b = (key // n_e).astype(np.int32), (key % n_e).astype(np.int32)
+
+        stamps = [r["ts"] for r in chunk_rows + rel_rows if r.get("ts") is not None]
+        if stamps:
+            self.watermark = max(self.watermark, int(max(stamps)))
+        self._graph = self._build()
+
+    def _build(self) -> Tuple[_Interner, CSR, CSR, CSR]:
+        n_c, n_e = len(self._chunks), len(self._entities)
+        # RELATES is walked undirected, as in the Cypher pattern.
+        a = np.concatenate([self._rel_a, self._rel_b])
+        b = np.concatenate([self._rel_b, self._rel_a])
+        rel_deg = np.bincount(a, minlength=n_e)
+        relates = build_csr(a, b, n_e, col_degree=rel_deg)
+        ment_deg = np.bincount(self._mention_e, minlength=n_e)
+        chunk_ents = build_csr(self._mention_c, self._mention_e, n_c, col_degree=ment_deg)
+        ent_chunks = build_csr(self._mention_e, self._mention_c, n_e)
+        return self._chunks, chunk_ents, relates, ent_chunks
+
+    # ------------------------------- Expansion -------------------------------
+
+    def expand(self, seed_ids: Sequence[str], hops: int, limit: int) -> List[str]:
+        """
+        Chunks reachable from `seed_ids` via MENTIONS / RELATES*0..hops / MENTIONS,
+        seeds excluded. Ranked by entity paths reaching them, nearer hops weighing more.
+        """
+        ck, chunk_ents, relates, ent_chunks = self._graph
+        seeds = ck.lookup(seed_ids)
+        seeds = seeds[seeds < chunk_ents.n_rows]  # interned by an in-progress refresh
+        if not len(seeds) or limit <= 0:
+            return []
+
+        ents, _ = chunk_ents.gather(seeds, self.max_fanout)
+        dist = np.full(relates.n_rows, -1, dtype=np.int32)
+        frontier = np.unique(ents)
+        dist[frontier] = 0
+        walkable = relates.degree() <= self.max_degree
+        for hop in range(1, hops + 1):
+            frontier = frontier[walkable[frontier]]
+            if not len(frontier):
+                break
+            nbrs, _ = relates.gather(frontier, self.max_fanout)
+            nbrs = np.unique(nbrs)
+            frontier = nbrs[dist[nbrs] < 0]
+            dist[frontier] = hop
+
+        reached = np.flatnonzero(dist >= 0)
+        chunks, via = ent_chunks.gather(reached, self.max_fanout)
+        if not len(chunks):
+            return []
+        score = np.bincount(chunks, weights=1.0 / (1.0 + dist[via]), minlength=len(ck))
+        score[seeds] = 0.0
+        top = np.flatnonzero(score)
+        top = top[np.argsort(-score[top], kind="stable")][:limit]
+        return [ck.ids[i] for i in top]
+
+    # -------------------------------- Report ---------------------------------
+
+    def memory(self) -> Dict[str, int]:
+        _, chunk_ents, relates, ent_chunks = self._graph
+        arrays = chunk_ents.nbytes + relates.nbytes + ent_chunks.nbytes
+        coo = sum(a.nbytes for a in (self._mention_c, self._mention_e, self._rel_a, self._rel_b))
+        ids = self._chunks.nbytes + self._entities.nbytes
+        return {
+            "chunks": len(self._chunks),
+            "entities": len(self._entities),
+            "mentions": int(chunk_ents.indices.size),
+            "relations": int(self._rel_a.size),
+            "csr_bytes": arrays,
+            "edge_list_bytes": coo,
+            "id_map_bytes": ids,
+            "total_bytes": arrays + coo + ids,
+        }
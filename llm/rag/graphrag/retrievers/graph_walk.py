@@ -1,10 +1,81 @@
 from __future__ import annotations
 
-from typing import Dict, List, Tuple
+from typing import Any, Dict, List, Sequence, Tuple
+import asyncio
 import math
+import re
 
-from databases.neo4j_client import Neo4jClient
-from ..utils.embeddings import Embeddings
+import numpy as np
+
+from databases.neo4j_client import AsyncNeo4jClient, Neo4jClient
+from ..graph_builders.graph_version import GraphVersion
+from ..utils.embeddings import AsyncEmbeddings, Embeddings
+from ..utils.instrumentation import result_len, timed
+from ..utils.text_store import TextBlobStore
+from .adjacency import AdjacencySnapshot
+from .quantized import MmapQuantizedStore, NodeQuantizedStore
+from .ranker import Reranker, reciprocal_rank_fusion
+from .rerank import EmbeddingMatrix
+from .retrieval_cache import RetrievalCache
+
+
+VECTOR_CYPHER = (
+    "CALL db.index.vector.queryNodes($name, $k, $q) YIELD node, score "
+    "RETURN node.id AS id, node.text AS text, score "
+    "ORDER BY score DESC"
+)
+FULLTEXT_CYPHER = (
+    "CALL db.index.fulltext.queryNodes($name, $q) YIELD node, score "
+    "RETURN node.id AS id, node.text AS text, score "
+    "ORDER BY score DESC LIMIT $k"
+)
+SUBSTRING_CYPHER = (
+    "MATCH (c:Chunk) "
+    "WHERE c.text CONTAINS $q "
+    "RETURN c.id AS id, c.text AS text, 1.0 AS score "
+    "LIMIT $k"
+)
+EMBEDDINGS_CYPHER = (
+    "MATCH (c:Chunk) WHERE c.id IN $ids "
+    "RETURN c.id AS id, c.embedding AS emb"
+)
+CHUNKS_CYPHER = (
+    "MATCH (c:Chunk) WHERE c.id IN $ids "
+    "RETURN c.id AS id, c.text AS text, c.embedding AS emb, 0.0 AS score"
+)
+CHUNK_TEXTS_CYPHER = (
+    "MATCH (c:Chunk) WHERE c.id IN $ids "
+    "RETURN c.id AS id, c.text AS text, 0.0 AS score"
+)
+
+# Batched variants for retrieve_many: one row of $qs per query, results
+# tagged with the query's position `qi`.
+VECTOR_MANY_CYPHER = (
+    "UNWIND range(0, size($qs) - 1) AS qi "
+    "CALL { WITH qi "
+    "  CALL db.index.vector.queryNodes($name, $k, $qs[qi]) YIELD node, score "
+    "  RETURN node.id AS id, node.text AS text, score } "
+    "RETURN qi, id, text, score"
+)
+FULLTEXT_MANY_CYPHER = (
+    "UNWIND range(0, size($qs) - 1) AS qi "
+    "CALL { WITH qi "
+    "  CALL db.index.fulltext.queryNodes($name, $qs[qi]) YIELD node, score "
+    "  RETURN node.id AS id, node.text AS text, score "
+    "  ORDER BY score DESC LIMIT $k } "
+    "RETURN qi, id, text, score"
+)
+SUBSTRING_MANY_CYPHER = (
+    "UNWIND range(0, size($qs) - 1) AS qi "
+    "CALL { WITH qi "
+    "  MATCH (c:Chunk) WHERE c.text CONTAINS $qs[qi] "
+    "  RETURN c.id AS id, c.text AS text, 1.0 AS score LIMIT $k } "
+    "RETURN qi, id, text, score"
+)
+
+
+_TEXT_PROJECTION = re.compile(r"\b\w+\.text AS text\b")
+PROCEDURE_NOT_FOUND = "Neo.ClientError.Procedure.ProcedureNotFound"
 
 
 def _cosine(a: List[float], b: List[float]) -> float:
@@ -25,6 +96,30 @@ class GraphRetriever:
     - Optionally expands across the entity graph to gather extra context
     - Re-ranks merged candidates with cosine(query_vec, candidate_embedding)
       when embeddings are present on nodes (c.embedding).
+    - With single_round_trip=True, vector + full-text search, score
+      normalisation, expansion and embedding projection run as one Cypher
+      query; any failure falls back to the multi-query path for that call,
+      and a missing vector/full-text procedure turns single_round_trip off
+      for good (the edition will not grow one between calls).
+    - `aretrieve()` is the asyncio variant: it runs the vector and full-text
+      candidate queries concurrently on `async_neo` (or worker threads when
+      only the sync client is given).
+    - With an `adjacency` snapshot, graph expansion runs in process (see
+      AdjacencySnapshot) and Neo4j only serves the expanded chunks by id;
+      the snapshot is refreshed whenever `graph_version` moves.
+    - `retrieve_many()` answers a list of queries with one embedding call
+      and a handful of UNWIND-batched queries per `batch_size` queries.
+    - With a `cache`, query vectors and ranked results are reused; results
+      are scoped to `graph_version`, which GraphBuilder bumps on writes.
+    - `fusion="rrf"` swaps the alpha-weighted score sum for reciprocal-rank
+      fusion of the semantic and lexical rankings; a `reranker` (see
+      ranker.Reranker) then reorders the fused list before top_k is taken.
+    - With a `quantized` store (int8/binary codes on nodes or in a local
+      side file), candidates are first scored on codes and only the best
+      `rescore_n` fetch full-precision embeddings for exact cosine.
+    - With a `text_store`, Neo4j queries project `null AS text`; text is
+      read from the local store only for the final top_k (plus the
+      cross-encoder's top_n when a reranker needs it).
     """
 
     def __init__(
@@ -36,6 +131,18 @@ class GraphRetriever:
         alpha: float = 0.6,               # weight for vector score vs. text score
         vector_index: str = "chunk_embedding_idx",
         fulltext_index: str = "chunk_text_fts",
+        single_round_trip: bool = True,
+        async_neo: AsyncNeo4jClient | None = None,
+        async_embed: AsyncEmbeddings | None = None,
+        adjacency: AdjacencySnapshot | None = None,
+        cache: RetrievalCache | None = None,
+        graph_version: GraphVersion | None = None,
+        fusion: str = "weighted",           # "weighted" | "rrf"
+        rrf_k: int = 60,
+        reranker: Reranker | None = None,
+        quantized: NodeQuantizedStore | MmapQuantizedStore | None = None,
+        rescore_n: int = 20,
+        text_store: TextBlobStore | None = None,
     ):
         self.neo = neo
         self.embed = embed
@@ -44,6 +151,31 @@ class GraphRetriever:
         self.alpha = alpha
         self.vector_index = vector_index
         self.fulltext_index = fulltext_index
+        self.single_round_trip = single_round_trip
+        self.async_neo = async_neo
+        self.async_embed = async_embed
+        self.adjacency = adjacency
+        self.cache = cache
+        if (cache is not None or adjacency is not None) and graph_version is None:
+            graph_version = GraphVersion(neo)
+        self.graph_version = graph_version
+        if fusion not in ("weighted", "rrf"):
+            raise ValueError(f"unknown fusion: {fusion}")
+        self.fusion = fusion
+        self.rrf_k = rrf_k
+        self.reranker = reranker
+        self.quantized = quantized
+        self.rescore_n = rescore_n
+        self.text_store = text_store
+
+    def _read(self, cypher: str, params: Dict[str, Any] | None = None) -> List[Dict]:
+        return self.neo.run(self._project(cypher), params)
+
+    def _project(self, cypher: str) -> str:
+        # With an off-graph text store, candidate queries leave text behind.
+        if self.text_store is None:
+            return cypher
+        return _TEXT_PROJECTION.sub("null AS text", cypher)
 
     # ----------------------------- Index helpers -----------------------------
 
@@ -67,49 +199,32 @@ class GraphRetriever:
 
     # ------------------------- Candidate gathering --------------------------
 
+    @timed("vector_search", result_len)
     def _vector_candidates(self, qvec: List[float]) -> List[Dict]:
-        cypher = (
-            "CALL db.index.vector.queryNodes($name, $k, $q) YIELD node, score "
-            "RETURN node.id AS id, node.text AS text, score "
-            "ORDER BY score DESC"
-        )
         try:
-            return self.neo.run(
-                cypher, {"name": self.vector_index, "k": self.top_k, "q": qvec}
+            return self._read(
+                VECTOR_CYPHER, {"name": self.vector_index, "k": self.top_k, "q": qvec}
             )
         except Exception:
             return []
 
+    @timed("fulltext_search", result_len)
     def _fulltext_candidates(self, qstr: str) -> List[Dict]:
         # Prefer full-text; fallback to substring search.
-        cypher_ft = (
-            "CALL db.index.fulltext.queryNodes($name, $q) YIELD node, score "
-            "RETURN node.id AS id, node.text AS text, score "
-            "ORDER BY score DESC LIMIT $k"
-        )
         try:
-            return self.neo.run(
-                cypher_ft, {"name": self.fulltext_index, "q": qstr, "k": self.top_k}
+            return self._read(
+                FULLTEXT_CYPHER, {"name": self.fulltext_index, "q": qstr, "k": self.top_k}
             )
         except Exception:
-            cypher_sub = (
-                "MATCH (c:Chunk) "
-                "WHERE c.text CONTAINS $q "
-                "RETURN c.id AS id, c.text AS text, 1.0 AS score "
-                "LIMIT $k"
-            )
-            return self.neo.run(cypher_sub, {"q": qstr, "k": self.top_k})
+            return self._read(SUBSTRING_CYPHER, {"q": qstr, "k": self.top_k})
 
     # ------------------------- Merge & re-ranking ---------------------------
 
+    @timed("fetch_embeddings", result_len)
     def _fetch_embeddings(self, ids: List[str]) -> Dict[str, List[float]]:
         if not ids:
             return {}
-        rows = self.neo.run(
-            "MATCH (c:Chunk) WHERE c.id IN $ids "
-            "RETURN c.id AS id, c.embedding AS emb",
-            {"ids": ids},
-        )
+        rows = self._read(EMBEDDINGS_CYPHER, {"ids": ids})
         return {r["id"]: r.get("emb") for r in rows if r.get("emb") is not None}
 
     def _normalize(self, hits: List[Dict], key: str = "score") -> Dict[str, float]:
@@ -119,12 +234,498 @@ class GraphRetriever:
         return {h["id"]: (h[key] / maxv) for h in hits}
 
     def _merge_and_rerank(
-        self, query_vec: List[float], vec_hits: List[Dict], ft_hits: List[Dict]
+        self,
+        query_vec: List[float],
+        vec_hits: List[Dict],
+        ft_hits: List[Dict],
+        extra_hits: List[Dict] | None = None,
     ) -> List[Dict]:
+        all_ids, id_to_text, v_norm, f_norm = self._merge_inputs(vec_hits, ft_hits, extra_hits)
+        if self.quantized is not None:
+            cos = self._quantized_cosines(query_vec, all_ids)
+            return self._fuse(query_vec, all_ids, id_to_text, v_norm, f_norm, {}, cos=cos)
+        # Pull stored embeddings for cosine re-ranking
+        embs = self._fetch_embeddings(all_ids)
+        return self._fuse(query_vec, all_ids, id_to_text, v_norm, f_norm, embs)
+
+    def _merge_inputs(
+        self, vec_hits: List[Dict], ft_hits: List[Dict], extra_hits: List[Dict] | None = None
+    ) -> Tuple[List[str], Dict[str, str], Dict[str, float], Dict[str, float]]:
         v_norm = self._normalize(vec_hits)
         f_norm = self._normalize(ft_hits)
+        extra_hits = extra_hits or []
+        all_ids = list({*v_norm.keys(), *f_norm.keys(), *(h["id"] for h in extra_hits)})
+        id_to_text = {h["id"]: h["text"] for h in extra_hits + vec_hits + ft_hits}
+        return all_ids, id_to_text, v_norm, f_norm
+
+    # Timed here rather than in _merge_and_rerank: every retrieval path
+    # (single round trip, retrieve_many, aretrieve) ends in _fuse.
+    @timed("merge_rerank", result_len)
+    def _fuse(
+        self,
+        query_vec: List[float],
+        all_ids: List[str],
+        id_to_text: Dict[str, str],
+        v_norm: Dict[str, float],
+        f_norm: Dict[str, float],
+        embs: Dict[str, List[float]],
+        cos: Dict[str, float] | None = None,
+    ) -> List[Dict]:
+        # Score every candidate with a single matrix-vector product, unless
+        # the caller already scored them (retrieve_many).
+        if cos is None:
+            cand = EmbeddingMatrix.from_mapping(embs)
+            cos = cand.score_dict(query_vec) if len(cand) else {}
+
+        vec_scores = {cid: cos.get(cid, v_norm.get(cid, 0.0)) for cid in all_ids}
+        if self.fusion == "rrf":
+            semantic = sorted(all_ids, key=lambda c: vec_scores[c], reverse=True)
+            lexical = sorted(f_norm, key=f_norm.get, reverse=True)
+            scores = reciprocal_rank_fusion([semantic, lexical], self.rrf_k, [self.alpha, 1 - self.alpha])
+        else:
+            scores = {
+                cid: self.alpha * vec_scores[cid] + (1 - self.alpha) * f_norm.get(cid, 0.0) for cid in all_ids
+            }
+
+        merged = [{"id": cid, "text": id_to_text.get(cid, ""), "score": scores.get(cid, 0.0)} for cid in all_ids]
+        merged.sort(key=lambda h: h["score"], reverse=True)
+        return merged
+
+    def _quantized_cosines(self, query_vec: List[float], ids: List[str]) -> Dict[str, float]:
+        # Approximate scores on codes; exact cosine only for the short list.
+        qm = self.quantized.get(ids)
+        if not len(qm):
+            return {}
+        approx = qm.score(query_vec)
+        short = [qm.ids[i] for i in np.argsort(-approx, kind="stable")[: self.rescore_n]]
+        cos = dict(zip(qm.ids, approx.tolist()))
+        exact = EmbeddingMatrix.from_mapping(self._fetch_embeddings(short))
+        if len(exact):
+            cos.update(exact.score_dict(query_vec))
+        return cos
+
+    def _finish(self, query: str, merged: List[Dict]) -> Tuple[List[Dict], bool]:
+        """The top_k hits, and whether they may be cached (not if the rerank budget cut scoring short)."""
+        cacheable = True
+        if self.reranker is not None:
+            if self.reranker.cross_encoder is not None:
+                self._fill_text(merged[: self.reranker.top_n])
+            merged, stats = self.reranker.rerank_with_stats(query, merged)
+            cacheable = not stats["truncated"]
+        top = merged[: self.top_k]
+        self._fill_text(top)
+        return top, cacheable
+
+    def _fill_text(self, hits: List[Dict]) -> None:
+        if self.text_store is None:
+            return
+        missing = [h["id"] for h in hits if not h.get("text")]
+        if missing:
+            texts = self.text_store.get_many(missing)
+            for h in hits:
+                if not h.get("text"):
+                    h["text"] = texts.get(h["id"], "")
+
+    # ------------------------- Single round trip ----------------------------
+
+    def _hybrid_cypher(self) -> str:
+        if self.expand_hops > 0 and self.adjacency is None:
+            expand = (
+                "CALL {\n"
+                "  WITH seed_ids\n"
+                "  MATCH (c:Chunk) WHERE c.id IN seed_ids\n"
+                "  MATCH (c)-[:MENTIONS]->(:Entity)"
+                f"-[:RELATES*0..{int(self.expand_hops)}]-(:Entity)<-[:MENTIONS]-(n:Chunk)\n"
+                "  WHERE NOT n.id IN seed_ids\n"
+                "  WITH DISTINCT n LIMIT $k\n"
+                "  RETURN collect(n.id) AS exp_ids\n"
+                "}\n"
+                "WITH vec, ft, seed_ids + exp_ids AS all_ids\n"
+            )
+        else:
+            expand = "WITH vec, ft, seed_ids AS all_ids\n"
+        return (
+            "CALL {\n"
+            "  CALL db.index.vector.queryNodes($vector_index, $k, $q) YIELD node, score\n"
+            "  RETURN collect({id: node.id, score: score}) AS vec\n"
+            "}\n"
+            "CALL {\n"
+            "  CALL db.index.fulltext.queryNodes($fulltext_index, $qstr, {limit: $k}) YIELD node, score\n"
+            "  RETURN collect({id: node.id, score: score}) AS ft\n"
+            "}\n"
+            "WITH vec, ft,\n"
+            "  reduce(m = 0.0, h IN vec | CASE WHEN h.score > m THEN h.score ELSE m END) AS vmax,\n"
+            "  reduce(m = 0.0, h IN ft | CASE WHEN h.score > m THEN h.score ELSE m END) AS fmax\n"
+            "WITH [h IN vec | {id: h.id, s: h.score / CASE WHEN vmax = 0 THEN 1.0 ELSE vmax END}] AS vec,\n"
+            "     [h IN ft | {id: h.id, s: h.score / CASE WHEN fmax = 0 THEN 1.0 ELSE fmax END}] AS ft\n"
+            "WITH vec, ft, [h IN vec | h.id] + [h IN ft | h.id] AS seed_ids\n"
+            + expand
+            + "UNWIND all_ids AS cid\n"
+            "WITH DISTINCT cid, vec, ft\n"
+            "MATCH (c:Chunk {id: cid})\n"
+            f"RETURN c.id AS id, c.text AS text, {'null' if self.quantized is not None else 'c.embedding'} AS emb,\n"
+            "  coalesce(head([h IN vec WHERE h.id = cid | h.s]), 0.0) AS v,\n"
+            "  coalesce(head([h IN ft WHERE h.id = cid | h.s]), 0.0) AS f"
+        )
+
+    def _hybrid_params(self, qvec: List[float], qstr: str) -> Dict[str, Any]:
+        return {
+            "vector_index": self.vector_index,
+            "fulltext_index": self.fulltext_index,
+            "k": self.top_k,
+            "q": qvec,
+            "qstr": qstr,
+        }
+
+    def _hybrid_failed(self, exc: Exception) -> None:
+        if getattr(exc, "code", None) == PROCEDURE_NOT_FOUND:
+            self.single_round_trip = False
+
+    @timed("hybrid_search", result_len)
+    def _hybrid_candidates(self, qvec: List[float], qstr: str) -> List[Dict] | None:
+        """One Bolt round trip for all candidates; None if the server refused it."""
+        try:
+            return self._read(self._hybrid_cypher(), self._hybrid_params(qvec, qstr))
+        except Exception as exc:
+            self._hybrid_failed(exc)
+            return None
+
+    @timed("hybrid_search", result_len)
+    async def _ahybrid_candidates(self, qvec: List[float], qstr: str) -> List[Dict] | None:
+        try:
+            return await self._arun(self._hybrid_cypher(), self._hybrid_params(qvec, qstr))
+        except Exception as exc:
+            self._hybrid_failed(exc)
+            return None
+
+    def _rank_hybrid_rows(self, query_vec: List[float], rows: List[Dict]) -> List[Dict]:
+        # Scores arrive already normalised server-side.
+        ids = [r["id"] for r in rows]
+        cos = self._quantized_cosines(query_vec, ids) if self.quantized is not None else None
+        return self._fuse(
+            query_vec,
+            ids,
+            {r["id"]: r["text"] for r in rows},
+            {r["id"]: r["v"] for r in rows},
+            {r["id"]: r["f"] for r in rows},
+            {r["id"]: r["emb"] for r in rows if r.get("emb") is not None},
+            cos=cos,
+        )
+
+    # ---------------------------- Graph expansion ----------------------------
+
+    def _expand_cypher(self) -> str:
+        return (
+            "MATCH (c:Chunk) WHERE c.id IN $ids "
+            "MATCH (c)-[:MENTIONS]->(:Entity)"
+            f"-[:RELATES*0..{int(self.expand_hops)}]-(:Entity)<-[:MENTIONS]-(n:Chunk) "
+            "WHERE NOT n.id IN $ids "
+            "RETURN DISTINCT n.id AS id, n.text AS text, 0.0 AS score "
+            "LIMIT $k"
+        )
+
+    def _chunks_cypher(self) -> str:
+        # Quantized mode never needs float embeddings for expanded chunks.
+        return CHUNK_TEXTS_CYPHER if self.quantized is not None else CHUNKS_CYPHER
+
+    def _local_expand(self, seed_ids: List[str]) -> List[str]:
+        return self.adjacency.expand(seed_ids, self.expand_hops, self.top_k)
+
+    @timed("expand", result_len)
+    def _expand_candidates(self, seed_ids: List[str]) -> List[Dict]:
+        if self.expand_hops <= 0 or not seed_ids:
+            return []
+        try:
+            if self.adjacency is not None:
+                return self._read(self._chunks_cypher(), {"ids": self._local_expand(seed_ids)})
+            return self._read(self._expand_cypher(), {"ids": seed_ids, "k": self.top_k})
+        except Exception:
+            return []
+
+    @staticmethod
+    def _as_hybrid_rows(hits: List[Dict]) -> List[Dict]:
+        # Zero index scores, so the fused rank comes from cosine alone.
+        return [{**h, "v": 0.0, "f": 0.0} for h in hits]
+
+    # -------------------------------- Caching --------------------------------
 
-        all_ids = list({*v_norm.keys(), *f_norm.keys()})
-        id_to_text = {h["id"]: h["text"] for h in vec_hits + ft_hits}
+    def _embed_namespace(self) -> str:
+        return f"{getattr(self.embed, 'provider', '')}/{getattr(self.embed, 'model', '')}"
+
+    def _embed_queries(self, queries: List[str]) -> List[List[float]]:
+        if self.cache is None:
+            return self.embed.embed(queries)
+        ns = self._embed_namespace()
+        vecs = [self.cache.get_vector(ns, q) for q in queries]
+        todo = list(dict.fromkeys(q for q, v in zip(queries, vecs) if v is None))
+        if todo:
+            fresh = dict(zip(todo, self.embed.embed(todo)))
+            for q, v in fresh.items():
+                self.cache.put_vector(ns, q, v)
+            vecs = [fresh[q] if v is None else v for q, v in zip(queries, vecs)]
+        return vecs
+
+    def _result_key(self, query: str) -> Tuple:
+        rerank = self.reranker.cache_key() if self.reranker is not None else None
+        quant = None
+        if self.quantized is not None:
+            quant = (type(self.quantized).__name__, self.quantized.kind, self.rescore_n)
+        text = self.text_store.path if self.text_store is not None else None
+        return RetrievalCache.result_key(
+            query, self.top_k, self.expand_hops, self.alpha, self.fusion, self.rrf_k, rerank,
+            self.vector_index, self.fulltext_index, quant, text,
+        )
+
+    # -------------------------------- Public ---------------------------------
+
+    def _version(self) -> int:
+        """Graph version for cache keys; brings the adjacency snapshot up to it."""
+        if self.cache is None and self.adjacency is None:
+            return 0
+        version = self.graph_version.current()
+        if self.adjacency is not None:
+            self.adjacency.sync(version)
+        return version
+
+    async def _aversion(self) -> int:
+        if self.cache is None and self.adjacency is None:
+            return 0
+        # Reads Neo4j at most once per poll interval, without blocking the loop.
+        version = await self.graph_version.acurrent(self.async_neo)
+        if self.adjacency is not None and self.adjacency.version != version:
+            await asyncio.to_thread(self.adjacency.sync, version)
+        return version
+
+    def retrieve(self, query: str) -> List[Dict]:
+        version = self._version()
+        if self.cache is None:
+            return self._retrieve(query)[0]
+        key = self._result_key(query)
+        hits = self.cache.get_results(key, version)
+        if hits is None:
+            hits, cacheable = self._retrieve(query)
+            if cacheable:
+                self.cache.put_results(key, version, hits)
+        return hits
+
+    def _retrieve(self, query: str) -> Tuple[List[Dict], bool]:
+        qvec = self._embed_queries([query])[0]
+        if self.single_round_trip:
+            rows = self._hybrid_candidates(qvec, query)
+            if rows is not None:
+                if self.adjacency is not None:
+                    rows += self._as_hybrid_rows(self._expand_candidates([r["id"] for r in rows]))
+                return self._finish(query, self._rank_hybrid_rows(qvec, rows))
+        vec_hits = self._vector_candidates(qvec)
+        ft_hits = self._fulltext_candidates(query)
+        seeds = list({h["id"] for h in vec_hits + ft_hits})
+        # Expanded chunks carry no index score; cosine decides their rank.
+        exp_hits = self._expand_candidates(seeds)
+        merged = self._merge_and_rerank(qvec, vec_hits, ft_hits, exp_hits)
+        return self._finish(query, merged)
+
+    # --------------------------------- Batch ---------------------------------
+
+    @staticmethod
+    def _group(rows: List[Dict], n: int) -> List[List[Dict]]:
+        out: List[List[Dict]] = [[] for _ in range(n)]
+        for r in rows:
+            out[r["qi"]].append(r)
+        return out
+
+    def _expand_many_cypher(self) -> str:
+        return (
+            "UNWIND range(0, size($seeds) - 1) AS qi "
+            "CALL { WITH qi "
+            "  MATCH (c:Chunk) WHERE c.id IN $seeds[qi] "
+            "  MATCH (c)-[:MENTIONS]->(:Entity)"
+            f"-[:RELATES*0..{int(self.expand_hops)}]-(:Entity)<-[:MENTIONS]-(n:Chunk) "
+            "  WHERE NOT n.id IN $seeds[qi] "
+            "  WITH DISTINCT n LIMIT $k "
+            "  RETURN n.id AS id, n.text AS text } "
+            "RETURN qi, id, text, 0.0 AS score"
+        )
+
+    @timed("candidates_many")
+    def _candidates_many(self, qvecs: List[List[float]], queries: List[str]):
+        n = len(queries)
+        try:
+            vec = self._read(VECTOR_MANY_CYPHER, {"name": self.vector_index, "k": self.top_k, "qs": qvecs})
+        except Exception:
+            vec = []
+        try:
+            ft = self._read(FULLTEXT_MANY_CYPHER, {"name": self.fulltext_index, "k": self.top_k, "qs": queries})
+        except Exception:
+            ft = self._read(SUBSTRING_MANY_CYPHER, {"k": self.top_k, "qs": queries})
+        vec_hits, ft_hits = self._group(vec, n), self._group(ft, n)
+        seeds = [list({h["id"] for h in v + f}) for v, f in zip(vec_hits, ft_hits)]
+
+        exp_hits: List[List[Dict]] = [[] for _ in range(n)]
+        if self.expand_hops > 0:
+            try:
+                if self.adjacency is not None:
+                    local = [self._local_expand(s) if s else [] for s in seeds]
+                    rows = self._read(self._chunks_cypher(), {"ids": list({i for ids in local for i in ids})})
+                    by_id = {r["id"]: r for r in rows}
+                    exp_hits = [[by_id[i] for i in ids if i in by_id] for ids in local]
+                else:
+                    exp_hits = self._group(self._read(self._expand_many_cypher(), {"seeds": seeds, "k": self.top_k}), n)
+            except Exception:
+                pass
+        return vec_hits, ft_hits, exp_hits
+
+    def retrieve_many(self, queries: Sequence[str], batch_size: int = 256) -> List[List[Dict]]:
+        """
+        `retrieve()` for many queries at once; results line up with `queries`.
+
+        Queries are embedded in one call, then every `batch_size` of them
+        share one vector, one full-text, one expansion and one embedding
+        fetch query, and are reranked together from a single matrix.
+        """
+        queries = list(queries)
+        results: List[List[Dict] | None] = [None] * len(queries)
+        version = self._version()
+        if self.cache is not None:
+            results = [self.cache.get_results(self._result_key(q), version) for q in queries]
+        todo = [i for i, r in enumerate(results) if r is None]
+        if not todo:
+            return results
+        qvecs = self._embed_queries([queries[i] for i in todo])
+        for s in range(0, len(todo), batch_size):
+            idx = todo[s:s + batch_size]
+            batch = self._retrieve_batch(qvecs[s:s + batch_size], [queries[i] for i in idx])
+            for i, (hits, cacheable) in zip(idx, batch):
+                results[i] = hits
+                if self.cache is not None and cacheable:
+                    self.cache.put_results(self._result_key(queries[i]), version, hits)
+        return results
+
+    def _retrieve_batch(self, qvecs: List[List[float]], queries: List[str]) -> List[Tuple[List[Dict], bool]]:
+        vec_hits, ft_hits, exp_hits = self._candidates_many(qvecs, queries)
+        merged = [self._merge_inputs(v, f, e) for v, f, e in zip(vec_hits, ft_hits, exp_hits)]
+
+        cos = self._batch_cosines(qvecs, [all_ids for all_ids, *_ in merged])
+        return [
+            self._finish(queries[qi], self._fuse(qvecs[qi], all_ids, id_to_text, v_norm, f_norm, {}, cos=cos[qi]))
+            for qi, (all_ids, id_to_text, v_norm, f_norm) in enumerate(merged)
+        ]
+
+    def _batch_cosines(self, qvecs: List[List[float]], id_lists: List[List[str]]) -> List[Dict[str, float]]:
+        # Union of candidates across the batch: fetched and stacked once.
+        union = list({cid for ids in id_lists for cid in ids})
+        if self.quantized is None:
+            return self._pair_cosines(EmbeddingMatrix.from_mapping(self._fetch_embeddings(union)), qvecs, id_lists)
+        cos = self._pair_cosines(self.quantized.get(union), qvecs, id_lists)
+        shorts = [sorted(c, key=c.get, reverse=True)[: self.rescore_n] for c in cos]
+        exact = EmbeddingMatrix.from_mapping(self._fetch_embeddings(list({i for s in shorts for i in s})))
+        for c, e in zip(cos, self._pair_cosines(exact, qvecs, shorts)):
+            c.update(e)
+        return cos
+
+    @staticmethod
+    def _pair_cosines(matrix, qvecs: List[List[float]], id_lists: List[List[str]]) -> List[Dict[str, float]]:
+        q_idx: List[int] = []
+        c_idx: List[int] = []
+        for qi, ids in enumerate(id_lists):
+            for cid in ids:
+                j = matrix.index.get(cid)
+                if j is not None:
+                    q_idx.append(qi)
+                    c_idx.append(j)
+        scores = matrix.score_pairs(qvecs, q_idx, c_idx).tolist() if q_idx else []
+        cos: List[Dict[str, float]] = [{} for _ in id_lists]
+        for qi, j, sc in zip(q_idx, c_idx, scores):
+            cos[qi][matrix.ids[j]] = sc
+        return cos
+
+    # --------------------------------- Async ---------------------------------
+
+    async def _arun(self, cypher: str, params: Dict[str, Any]) -> List[Dict]:
+        if self.async_neo is not None:
+            return await self.async_neo.run(self._project(cypher), params)
+        return await asyncio.to_thread(self._read, cypher, params)
+
+    async def _aembed_query(self, query: str) -> List[float]:
+        if self.async_embed is None:
+            return (await asyncio.to_thread(self._embed_queries, [query]))[0]
+        ns = self._embed_namespace()
+        vec = self.cache.get_vector(ns, query) if self.cache is not None else None
+        if vec is None:
+            vec = (await self.async_embed.embed([query]))[0]
+            if self.cache is not None:
+                self.cache.put_vector(ns, query, vec)
+        return vec
+
+    @timed("vector_search", result_len)
+    async def _avector_candidates(self, qvec: List[float]) -> List[Dict]:
+        try:
+            return await self._arun(VECTOR_CYPHER, {"name": self.vector_index, "k": self.top_k, "q": qvec})
+        except Exception:
+            return []
+
+    @timed("fulltext_search", result_len)
+    async def _afulltext_candidates(self, qstr: str) -> List[Dict]:
+        try:
+            return await self._arun(FULLTEXT_CYPHER, {"name": self.fulltext_index, "q": qstr, "k": self.top_k})
+        except Exception:
+            return await self._arun(SUBSTRING_CYPHER, {"q": qstr, "k": self.top_k})
+
+    @timed("expand", result_len)
+    async def _aexpand_candidates(self, seed_ids: List[str]) -> List[Dict]:
+        if self.expand_hops <= 0 or not seed_ids:
+            return []
+        try:
+            if self.adjacency is not None:
+                return await self._arun(self._chunks_cypher(), {"ids": self._local_expand(seed_ids)})
+            return await self._arun(self._expand_cypher(), {"ids": seed_ids, "k": self.top_k})
+        except Exception:
+            return []
+
+    @timed("fetch_embeddings", result_len)
+    async def _afetch_embeddings(self, ids: List[str]) -> Dict[str, List[float]]:
+        if not ids:
+            return {}
+        rows = await self._arun(EMBEDDINGS_CYPHER, {"ids": ids})
+        return {r["id"]: r.get("emb") for r in rows if r.get("emb") is not None}
+
+    async def aretrieve(self, query: str) -> List[Dict]:
+        version = await self._aversion()
+        if self.cache is None:
+            return (await self._aretrieve(query))[0]
+        key = self._result_key(query)
+        hits = self.cache.get_results(key, version)
+        if hits is None:
+            hits, cacheable = await self._aretrieve(query)
+            if cacheable:
+                self.cache.put_results(key, version, hits)
+        return hits
+
+    async def _aretrieve(self, query: str) -> Tuple[List[Dict], bool]:
+        qvec = await self._aembed_query(query)
+        if self.single_round_trip:
+            rows = await self._ahybrid_candidates(qvec, query)
+            if rows is not None:
+                if self.adjacency is not None:
+                    rows += self._as_hybrid_rows(await self._aexpand_candidates([r["id"] for r in rows]))
+                if self.quantized is not None:
+                    ranked = await asyncio.to_thread(self._rank_hybrid_rows, qvec, rows)
+                else:
+                    ranked = self._rank_hybrid_rows(qvec, rows)
+                return await self._afinish(query, ranked)
+        vec_hits, ft_hits = await asyncio.gather(
+            self._avector_candidates(qvec), self._afulltext_candidates(query)
+        )
+        seeds = list({h["id"] for h in vec_hits + ft_hits})
+        exp_hits = await self._aexpand_candidates(seeds)
+        all_ids, id_to_text, v_norm, f_norm = self._merge_inputs(vec_hits, ft_hits, exp_hits)
+        if self.quantized is not None:
+            cos = await asyncio.to_thread(self._quantized_cosines, qvec, all_ids)
+            return await self._afinish(query, self._fuse(qvec, all_ids, id_to_text, v_norm, f_norm, {}, cos=cos))
+        embs = await self._afetch_embeddings(all_ids)
+        return await self._afinish(query, self._fuse(qvec, all_ids, id_to_text, v_norm, f_norm, embs))
 
-        # Pull stored embeddings for cosine re
+    async def _afinish(self, query: str, merged: List[Dict]) -> Tuple[List[Dict], bool]:
+        if self.reranker is None or self.reranker.cross_encoder is None:
+            return self._finish(query, merged)
+        # Cross-encoding is CPU-bound; keep it off the event loop.
+        return await asyncio.to_thread(self._finish, query, merged)
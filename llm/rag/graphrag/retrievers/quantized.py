@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from databases.neo4j_client import Neo4jClient
+from .rerank import _as_float32, _normalize_rows
+
+
+KINDS = ("int8", "binary")
+
+
+# ------------------------------ Quantisation -------------------------------
+
+
+def quantize(vectors: Sequence[Sequence[float]], kind: str = "int8") -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Per-vector quantisation; returns (codes, scales).
+
+    - int8: symmetric, scale = max|x| / 127, codes (N, D) int8
+    - binary: sign bits packed 8 per byte, codes (N, ceil(D / 8)) uint8,
+      scale = mean |x| (so scale * sign(x) approximates x)
+    """
+    x = _as_float32(vectors)
+    if kind == "int8":
+        scales = np.abs(x).max(axis=1) / 127.0
+        safe = np.where(scales == 0, 1.0, scales)
+        codes = np.clip(np.rint(x / safe[:, None]), -127, 127).astype(np.int8)
+    elif kind == "binary":
+        scales = np.abs(x).mean(axis=1)
+        codes = np.packbits(x > 0, axis=1)
+    else:
+        raise ValueError(f"unknown quantisation kind: {kind}")
+    return codes, scales.astype(np.float32)
+
+
+def dequantize(codes: np.ndarray, scales: np.ndarray, kind: str, dim: int) -> np.ndarray:
+    if kind == "int8":
+        return codes.astype(np.float32) * scales[:, None]
+    signs = np.unpackbits(codes, axis=1, count=dim).astype(np.float32) * 2.0 - 1.0
+    return signs * scales[:, None]
+
+
+def code_bytes(dim: int, kind: str) -> int:
+    return dim if kind == "int8" else -(-dim // 8)
+
+
+class QuantizedMatrix:
+    """
+    Candidate codes scored against float queries (asymmetric: only the
+    stored side is quantised). Scores approximate cosine similarity; the
+    per-vector scale cancels out of cosine, so it is only kept for
+    `dequantize()` / dot-product use.
+    """
+
+    def __init__(self, ids: Sequence[str], codes: np.ndarray, kind: str, dim: int):
+        self.ids: List[str] = list(ids)
+        self.index: Dict[str, int] = {cid: i for i, cid in enumerate(self.ids)}
+        self.kind = kind
+        self.dim = dim
+        if not self.ids:
+            self._unit = np.zeros((0, dim), dtype=np.float32)
+        elif kind == "int8":
+            self._unit = _normalize_rows(codes.astype(np.float32))
+        else:
+            signs = np.unpackbits(codes, axis=1, count=dim).astype(np.float32) * 2.0 - 1.0
+            self._unit = signs / np.float32(np.sqrt(dim))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def score(self, query_vec: Sequence[float]) -> np.ndarray:
+        q = _normalize_rows(_as_float32([query_vec]))[0]
+        return self._unit @ q
+
+    def score_pairs(self, query_vecs, query_idx: Sequence[int], cand_idx: Sequence[int]) -> np.ndarray:
+        q = _normalize_rows(_as_float32(query_vecs))
+        return np.einsum(
+            "ij,ij->i", q[np.asarray(query_idx, dtype=np.int64)], self._unit[np.asarray(cand_idx, dtype=np.int64)]
+        )
+
+
+# --------------------------------- Stores ----------------------------------
+
+
+class NodeQuantizedStore:
+    """Codes written onto Chunk nodes by GraphBuilder(quantize=...)."""
+
+    CYPHER = (
+        "MATCH (c:Chunk) WHERE c.id IN $ids AND c.embedding_q IS NOT NULL "
+        "RETURN c.id AS id, c.embedding_q AS q"
+    )
+
+    def __init__(self, neo: Neo4jClient, dim: int, kind: str = "int8"):
+        if kind not in KINDS:
+            raise ValueError(f"unknown quantisation kind: {kind}")
+        self.neo = neo
+        self.dim = dim
+        self.kind = kind
+
+    def get(self, ids: Sequence[str]) -> QuantizedMatrix:
+        rows = self.neo.run(self.CYPHER, {"ids": list(ids)}) if ids else []
+        width = code_bytes(self.dim, self.kind)
+        dtype = np.int8 if self.kind == "int8" else np.uint8
+        codes = np.frombuffer(b"".join(bytes(r["q"]) for r in rows), dtype=dtype).reshape(len(rows), width)
+        return QuantizedMatrix([r["id"] for r in rows], codes, self.kind, self.dim)
+
+
+class MmapQuantizedStore:
+    """
+    Append-only local side file of codes, memory-mapped for reads.
+
+    `<path>/codes.bin` and `<path>/scales.bin` hold one fixed-width row per
+    put; `<path>/ids.jsonl` maps ids to rows (last write wins) and is
+    flushed last. Opening the store cuts rows a crashed put() left behind,
+    so the three files always line up. Lookups cost no Bolt traffic at
+    all; the file is rebuilt by re-ingesting.
+    """
+
+    def __init__(self, path: str, dim: int, kind: str = "int8"):
+        if kind not in KINDS:
+            raise ValueError(f"unknown quantisation kind: {kind}")
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.dim = dim
+        self.kind = kind
+        self.width = code_bytes(dim, kind)
+        self._dtype = np.int8 if kind == "int8" else np.uint8
+        self._lock = threading.Lock()
+        self._rows: Dict[str, int] = {}
+        self._n = self._repair()
+        self._codes_f = open(os.path.join(path, "codes.bin"), "ab")
+        self._scales_f = open(os.path.join(path, "scales.bin"), "ab")
+        self._ids_f = open(os.path.join(path, "ids.jsonl"), "a", encoding="utf-8")
+        self._map: Optional[np.memmap] = None
+        self._mapped_rows = 0
+
+    def _repair(self) -> int:
+        """
+        Load ids.jsonl and cut all three files to the rows they have in
+        common. A crash during put() can leave code/scale rows without an id
+        (ids are flushed last) or a half-written last line; without the cut
+        every later row would be read at the wrong offset.
+        """
+        files = {name: os.path.join(self.path, name) for name in ("ids.jsonl", "codes.bin", "scales.bin")}
+        ids: List[str] = []
+        ends = [0]  # byte offset after each complete id line
+        if os.path.exists(files["ids.jsonl"]):
+            with open(files["ids.jsonl"], "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    ids.append(json.loads(line))
+                    ends.append(ends[-1] + len(line))
+        sizes = {name: os.path.getsize(p) if os.path.exists(p) else 0 for name, p in files.items()}
+        n = min(len(ids), sizes["codes.bin"] // self.width, sizes["scales.bin"] // 4)
+        for name, size in (("ids.jsonl", ends[n]), ("codes.bin", n * self.width), ("scales.bin", n * 4)):
+            if sizes[name] > size:
+                os.truncate(files[name], size)
+        for row, cid in enumerate(ids[:n]):
+            self._rows[cid] = row
+        return n
+
+    def put(self, ids: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        if not len(ids):
+            return
+        codes, scales = quantize(vectors, self.kind)
+        with self._lock:
+            self._codes_f.write(codes.tobytes())
+            self._scales_f.write(scales.tobytes())
+            for cid in ids:
+                self._ids_f.write(json.dumps(cid) + "\n")
+                self._rows[cid] = self._n
+                self._n += 1
+            self._codes_f.flush()
+            self._scales_f.flush()
+            self._ids_f.flush()
+
+    def _codes(self) -> np.ndarray:
+        # Remap only after new rows were appended.
+        if self._map is None or self._mapped_rows != self._n:
+            if self._n == 0:
+                return np.zeros((0, self.width), dtype=self._dtype)
+            self._map = np.memmap(
+                os.path.join(self.path, "codes.bin"), dtype=self._dtype, mode="r", shape=(self._n, self.width)
+            )
+            self._mapped_rows = self._n
+        return self._map
+
+    def get(self, ids: Sequence[str]) -> QuantizedMatrix:
+        with self._lock:
+            found = [(cid, self._rows[cid]) for cid in ids if cid in self._rows]
+            codes = self._codes()
+            rows = np.asarray([r for _, r in found], dtype=np.int64)
+            block = np.asarray(codes[rows]) if len(rows) else np.zeros((0, self.width), dtype=self._dtype)
+        return QuantizedMatrix([cid for cid, _ in found], block, self.kind, self.dim)
+
+    @property
+    def nbytes(self) -> int:
+        return self._n * (self.width + 4)
+
+    def close(self) -> None:
+        with self._lock:
+            for f in (self._codes_f, self._scales_f, self._ids_f):
+                f.close()
+            self._map = None
@@ -1,9 +1,294 @@
 from __future__ import annotations
-from typing import List, Dict
 
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
 
+import numpy as np
+
+from ..utils.instrumentation import arg_len, timed
 
 
 def simple_rank(chunks: List[Dict]) -> List[Dict]:
-# Identity ranker placeholder
-return chunks
+    # Identity ranker placeholder
+    return chunks
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[str]], k: int = 60, weights: Optional[Sequence[float]] = None
+) -> Dict[str, float]:
+    """RRF: sum of weight / (k + rank) over every ranking an id appears in (ranks start at 1)."""
+    weights = weights or [1.0] * len(rankings)
+    scores: Dict[str, float] = defaultdict(float)
+    for ranking, w in zip(rankings, weights):
+        for rank, cid in enumerate(ranking, start=1):
+            scores[cid] += w / (k + rank)
+    return dict(scores)
+
+
+# ------------------------------ Stage timings ------------------------------
+
+
+class StageTimings:
+    """Rolling per-stage latency samples (ms) with percentile summaries; thread-safe."""
+
+    def __init__(self, window: int = 2048):
+        self._samples: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=window))
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, ms: float) -> None:
+        with self._lock:
+            self._samples[stage].append(ms)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            samples = {stage: list(xs) for stage, xs in self._samples.items()}
+        out = {}
+        for stage, xs in samples.items():
+            a = np.asarray(xs, dtype=np.float64)
+            out[stage] = {
+                "n": int(a.size),
+                "mean_ms": float(a.mean()),
+                "p50_ms": float(np.percentile(a, 50)),
+                "p95_ms": float(np.percentile(a, 95)),
+                "max_ms": float(a.max()),
+            }
+        return out
+
+
+# ----------------------------- Cross-encoders ------------------------------
+
+
+class CrossEncoderBase:
+    """
+    Scores (query, passage) pairs in padded, length-bucketed batches.
+
+    Pairs are sorted by token length and cut into batches of `batch_size`, so
+    each batch pads only to its own longest pair. Subclasses implement
+    `_encode` (tokenise one batch) and `_forward` (run the model on it).
+    """
+
+    def __init__(self, batch_size: int = 32, max_length: int = 512):
+        self.batch_size = batch_size
+        self.max_length = max_length
+
+    def lengths(self, query: str, passages: Sequence[str]) -> List[int]:
+        # Whitespace words are close enough to order pairs for bucketing.
+        q = len(query.split())
+        return [min(q + len(p.split()), self.max_length) for p in passages]
+
+    def buckets(self, query: str, passages: Sequence[str]) -> List[List[int]]:
+        order = np.argsort(self.lengths(query, passages), kind="stable").tolist()
+        return [order[i : i + self.batch_size] for i in range(0, len(order), self.batch_size)]
+
+    def score_batch(self, query: str, passages: Sequence[str]) -> List[float]:
+        return [float(x) for x in np.asarray(self._forward(self._encode(query, passages))).reshape(-1)]
+
+    def score(self, query: str, passages: Sequence[str]) -> List[float]:
+        out = [0.0] * len(passages)
+        for idx in self.buckets(query, passages):
+            for i, s in zip(idx, self.score_batch(query, [passages[i] for i in idx])):
+                out[i] = s
+        return out
+
+    def _encode(self, query: str, passages: Sequence[str]):
+        raise NotImplementedError
+
+    def _forward(self, batch) -> np.ndarray:
+        raise NotImplementedError
+
+
+class HFCrossEncoder(CrossEncoderBase):
+    """Hugging Face sequence-classification cross-encoder on CPU (torch)."""
+
+    def __init__(
+        self,
+        model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+        batch_size: int = 32,
+        max_length: int = 512,
+        threads: Optional[int] = None,
+    ):
+        super().__init__(batch_size, max_length)
+        import torch
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+        if threads:
+            torch.set_num_threads(threads)
+        self._torch = torch
+        self.model_name = model_name
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+
+    def _encode(self, query: str, passages: Sequence[str]):
+        return self.tokenizer(
+            [query] * len(passages), list(passages),
+            padding="longest", truncation="only_second", max_length=self.max_length, return_tensors="pt",
+        )
+
+    def _forward(self, batch) -> np.ndarray:
+        with self._torch.inference_mode():
+            logits = self.model(**batch).logits
+        return logits[:, -1].float().numpy()
+
+
+class OnnxCrossEncoder(CrossEncoderBase):
+    """
+    Cross-encoder on onnxruntime's CPU provider.
+
+    Build the model with `export_onnx()` and optionally `quantize_int8()`
+    (dynamic int8 weights, usually 2-4x faster on CPU for a small quality cost).
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        tokenizer_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+        batch_size: int = 32,
+        max_length: int = 512,
+        threads: Optional[int] = None,
+    ):
+        super().__init__(batch_size, max_length)
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            opts.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, opts, providers=["CPUExecutionProvider"])
+        self.model_name = model_path
+        self._inputs = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+
+    def _encode(self, query: str, passages: Sequence[str]):
+        enc = self.tokenizer(
+            [query] * len(passages), list(passages),
+            padding="longest", truncation="only_second", max_length=self.max_length, return_tensors="np",
+        )
+        return {k: v.astype(np.int64) for k, v in enc.items() if k in self._inputs}
+
+    def _forward(self, batch) -> np.ndarray:
+        logits = self.session.run(None, batch)[0]
+        return logits[:, -1]
+
+    @staticmethod
+    def export_onnx(model_name: str, out_path: str, opset: int = 17) -> str:
+        import torch
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+        tok = AutoTokenizer.from_pretrained(model_name)
+        model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+        sample = tok(["query"], ["passage"], return_tensors="pt")
+        names = list(sample.keys())
+        axes = {n: {0: "batch", 1: "seq"} for n in names}
+        axes["logits"] = {0: "batch"}
+        torch.onnx.export(
+            model, tuple(sample[n] for n in names), out_path,
+            input_names=names, output_names=["logits"], dynamic_axes=axes, opset_version=opset,
+        )
+        return out_path
+
+    @staticmethod
+    def quantize_int8(src_path: str, dst_path: str) -> str:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(src_path, dst_path, weight_type=QuantType.QInt8)
+        return dst_path
+
+
+# --------------------------------- Reranker --------------------------------
+
+
+class Reranker:
+    """
+    Cascade reranking stage applied to GraphRetriever's fused candidates.
+
+    - Only the `top_n` best fused candidates reach the cross-encoder; the
+      rest keep their fused order below them
+    - Cross-encoder batches run best-fused-rank first; once the next batch
+      would overrun `budget_ms`, scoring stops and unscored candidates keep
+      their fused slots, so a tight budget degrades to plain fusion
+    - Scored hits gain a `rerank_score`; `score` keeps the fused value
+    - `rerank_with_stats()` also returns the call's own latencies and
+      counts (`truncated` when the budget stopped scoring), so concurrent
+      callers never read each other's numbers
+    - `timings` aggregates per-stage latencies (prune / encode / total)
+      across calls, see `timings.summary()` for p50 / p95 when tuning `top_n`
+    Without a cross-encoder the stage only prunes (useful as a baseline).
+    """
+
+    def __init__(
+        self,
+        cross_encoder: Optional[CrossEncoderBase] = None,
+        top_n: int = 50,
+        budget_ms: Optional[float] = None,
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        self.cross_encoder = cross_encoder
+        self.top_n = top_n
+        self.budget_ms = budget_ms
+        self.clock = clock
+        self.timings = StageTimings()
+
+    def cache_key(self) -> Tuple:
+        """Settings that change the reranked order, for result-cache keys."""
+        ce = self.cross_encoder
+        model = None
+        if ce is not None:
+            model = (type(ce).__name__, getattr(ce, "model_name", None), ce.max_length)
+        return (model, self.top_n, self.budget_ms)
+
+    def rerank(self, query: str, hits: List[Dict]) -> List[Dict]:
+        return self.rerank_with_stats(query, hits)[0]
+
+    @timed("rerank", arg_len(2))
+    def rerank_with_stats(self, query: str, hits: List[Dict]) -> Tuple[List[Dict], Dict[str, Any]]:
+        t0 = self.clock()
+        head, tail = hits[: self.top_n], hits[self.top_n :]
+        t_prune = self.clock()
+        scored = 0
+        batches = 0
+        if self.cross_encoder is not None and head:
+            head, scored, batches = self._cross_encode(query, head, t0)
+        t_end = self.clock()
+
+        stats = {
+            "prune_ms": (t_prune - t0) * 1e3,
+            "encode_ms": (t_end - t_prune) * 1e3,
+            "total_ms": (t_end - t0) * 1e3,
+            "candidates": len(hits),
+            "scored": scored,
+            "batches": batches,
+            "truncated": self.cross_encoder is not None and scored < len(head),
+        }
+        for stage in ("prune_ms", "encode_ms", "total_ms"):
+            self.timings.observe(stage[:-3], stats[stage])
+        return head + tail, stats
+
+    def _cross_encode(self, query: str, head: List[Dict], t0: float):
+        ce = self.cross_encoder
+        texts = [h.get("text", "") for h in head]
+        # Length buckets, each run in order of its best fused rank.
+        batches = sorted(ce.buckets(query, texts), key=min)
+        scores: Dict[int, float] = {}
+        per_batch_ms = 0.0
+        done = 0
+        for idx in batches:
+            elapsed_ms = (self.clock() - t0) * 1e3
+            if self.budget_ms is not None and done and elapsed_ms + per_batch_ms > self.budget_ms:
+                break
+            tb = self.clock()
+            for i, s in zip(idx, ce.score_batch(query, [texts[i] for i in idx])):
+                scores[i] = s
+            ms = (self.clock() - tb) * 1e3
+            done += 1
+            per_batch_ms = ms if done == 1 else 0.7 * per_batch_ms + 0.3 * ms
+
+        # Scored candidates are re-sorted among the slots they occupied.
+        slots = sorted(scores)
+        ranked = sorted(slots, key=lambda i: scores[i], reverse=True)
+        out = list(head)
+        for slot, i in zip(slots, ranked):
+            out[slot] = {**head[i], "rerank_score": scores[i]}
+        return out, len(scores), done
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from typing import Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+
+class EmbeddingMatrix:
+    """
+    Dense, row-normalised float32 matrix of candidate embeddings.
+
+    - Stacks candidate vectors once into a contiguous (N, D) array
+    - Scores a single query with one matrix-vector product
+    - Scores a batch of queries with one matrix-matrix product
+    - Scores sparse (query, candidate) pairs in fixed-size blocks
+    Candidates with a zero vector score 0.0, matching `_cosine`.
+    """
+
+    def __init__(self, ids: Sequence[str], vectors: Sequence[Sequence[float]]):
+        if len(ids) != len(vectors):
+            raise ValueError("ids and vectors must have the same length")
+        self.ids: List[str] = list(ids)
+        self.index: Dict[str, int] = {cid: i for i, cid in enumerate(self.ids)}
+        self.matrix = _normalize_rows(_as_float32(vectors))
+
+    @classmethod
+    def from_mapping(cls, embeddings: Mapping[str, Optional[Sequence[float]]]) -> "EmbeddingMatrix":
+        items = [(cid, v) for cid, v in embeddings.items() if v is not None]
+        return cls([cid for cid, _ in items], [v for _, v in items])
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def dim(self) -> int:
+        return int(self.matrix.shape[1])
+
+    def score(self, query_vec: Sequence[float]) -> np.ndarray:
+        """Cosine similarity of every candidate to one query, shape (N,)."""
+        if not self.ids:
+            return np.zeros(0, dtype=np.float32)
+        q = _normalize_rows(_as_float32([query_vec]))[0]
+        return self.matrix @ q
+
+    def score_many(self, query_vecs: Sequence[Sequence[float]]) -> np.ndarray:
+        """Cosine similarity of every candidate to each query, shape (Q, N)."""
+        q = _normalize_rows(_as_float32(query_vecs))
+        if not self.ids:
+            return np.zeros((q.shape[0], 0), dtype=np.float32)
+        return q @ self.matrix.T
+
+    def score_pairs(
+        self,
+        query_vecs: Sequence[Sequence[float]],
+        query_idx: Sequence[int],
+        cand_idx: Sequence[int],
+        block: int = 1 << 16,
+    ) -> np.ndarray:
+        """Cosine of query_vecs[query_idx[j]] and candidate cand_idx[j] for every j, shape (P,)."""
+        q = _normalize_rows(_as_float32(query_vecs))
+        qi = np.asarray(query_idx, dtype=np.int64)
+        ci = np.asarray(cand_idx, dtype=np.int64)
+        out = np.empty(len(qi), dtype=np.float32)
+        for s in range(0, len(out), block):
+            e = s + block
+            out[s:e] = np.einsum("ij,ij->i", q[qi[s:e]], self.matrix[ci[s:e]])
+        return out
+
+    def score_dict(self, query_vec: Sequence[float]) -> Dict[str, float]:
+        return dict(zip(self.ids, self.score(query_vec).tolist()))
+
+
+def _as_float32(vectors) -> np.ndarray:
+    arr = np.ascontiguousarray(np.asarray(vectors, dtype=np.float32))
+    if arr.ndim == 1:
+        arr = arr.reshape(1, -1) if arr.size else arr.reshape(0, 0)
+    if arr.ndim != 2:
+        raise ValueError("embeddings must all share the same dimension")
+    return arr
+
+
+def _normalize_rows(arr: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(arr, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0  # zero vectors stay zero -> cosine 0.0
+    return np.ascontiguousarray(arr / norms, dtype=np.float32)
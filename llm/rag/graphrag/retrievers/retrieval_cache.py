@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+_MISS = object()
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form used for result-cache keys."""
+    return " ".join(query.lower().split())
+
+
+def _seconds(ttl_s: Optional[float]) -> Optional[int]:
+    # Redis takes whole seconds; round up so a sub-second TTL does not become 0.
+    return math.ceil(ttl_s) if ttl_s else None
+
+
+def _digest(obj: Any) -> str:
+    return hashlib.sha256(json.dumps(obj, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """Thread-safe LRU map with an optional per-entry TTL."""
+
+    def __init__(self, max_entries: int, ttl_s: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key, _MISS)
+            if item is not _MISS and self.ttl_s is not None and time.monotonic() - item[0] > self.ttl_s:
+                del self._data[key]
+                self.expired += 1
+                item = _MISS
+            if item is _MISS:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expired": self.expired,
+        }
+
+
+class SqliteKV:
+    """
+    Local stand-in for Redis: `get` / `set(ex=)` / `delete` over a SQLite file.
+
+    Several processes on one host can share it (WAL mode). Expired keys are
+    dropped on read and swept every `sweep_every` writes.
+    """
+
+    def __init__(self, path: str, sweep_every: int = 1000):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.sweep_every = sweep_every
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires FROM kv WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] is not None and row[1] < time.time():
+                self._conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            return row[0]
+
+    def set(self, key: str, value: bytes, ex: Optional[float] = None) -> None:
+        expires = time.time() + ex if ex else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO kv (key, value, expires) VALUES (?, ?, ?)", (key, value, expires)
+            )
+            self._writes += 1
+            if self._writes % self.sweep_every == 0:
+                self._conn.execute("DELETE FROM kv WHERE expires IS NOT NULL AND expires < ?", (time.time(),))
+            self._conn.commit()
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            self._conn.executemany("DELETE FROM kv WHERE key = ?", [(k,) for k in keys])
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def open_shared(url: str):
+    """`redis://...` -> redis.Redis (needs the redis package); anything else -> SqliteKV(path)."""
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        import redis
+
+        return redis.Redis.from_url(url)
+    return SqliteKV(url)
+
+
+class RetrievalCache:
+    """
+    Two-level cache in front of GraphRetriever.
+
+    - Query vectors: LRU keyed by (embedding provider/model, exact query text)
+    - Ranked candidates: LRU with TTL keyed by the normalised query plus every
+      retriever setting that changes the ranking (top_k, expand_hops, alpha,
+      fusion, rrf_k, reranker, indexes, quantized and text stores), scoped
+      to a graph version; when the version moves forward, local entries are
+      dropped and shared keys stop matching. Puts from an older version
+      are ignored, so racing writers cannot roll the cache back
+    - `shared` is any Redis-like client (`get` / `set(key, value, ex=)`),
+      e.g. redis.Redis or SqliteKV, consulted after the local LRU and filled
+      on every put, so several processes reuse each other's work. Shared
+      vectors expire after `vector_ttl_s`, results after `ttl_s`
+    - `stats()` reports hits, misses and evictions for both levels
+    """
+
+    def __init__(
+        self,
+        max_vectors: int = 10_000,
+        max_results: int = 4096,
+        ttl_s: Optional[float] = 300.0,
+        shared=None,
+        prefix: str = "graphrag",
+        vector_ttl_s: Optional[float] = 7 * 86400.0,
+    ):
+        self.vectors = LRUCache(max_vectors)
+        self.results = LRUCache(max_results, ttl_s)
+        self.ttl_s = ttl_s
+        self.vector_ttl_s = vector_ttl_s
+        self.shared = shared
+        self.prefix = prefix
+        self.shared_hits = {"vectors": 0, "results": 0}
+        self.invalidations = 0
+        self._version: Optional[int] = None
+        self._lock = threading.Lock()
+
+    # ------------------------------- Vectors --------------------------------
+
+    def _vector_key(self, namespace: str, query: str) -> str:
+        return f"{self.prefix}:vec:{_digest([namespace, query])}"
+
+    def get_vector(self, namespace: str, query: str) -> Optional[List[float]]:
+        vec = self.vectors.get((namespace, query))
+        if vec is None and self.shared is not None:
+            blob = self.shared.get(self._vector_key(namespace, query))
+            if blob is not None:
+                vec = np.frombuffer(blob, dtype=np.float32).tolist()
+                self.vectors.put((namespace, query), vec)
+                self.shared_hits["vectors"] += 1
+        return vec
+
+    def put_vector(self, namespace: str, query: str, vec: Sequence[float]) -> None:
+        self.vectors.put((namespace, query), list(vec))
+        if self.shared is not None:
+            blob = np.asarray(vec, dtype=np.float32).tobytes()
+            self.shared.set(self._vector_key(namespace, query), blob, ex=_seconds(self.vector_ttl_s))
+
+    # ------------------------------- Results --------------------------------
+
+    @staticmethod
+    def result_key(query: str, top_k: int, expand_hops: int, alpha: float, *settings: Hashable) -> Tuple:
+        """`settings`: anything else that changes the ranking (fusion, rrf_k, reranker, ...)."""
+        return (normalize_query(query), top_k, expand_hops, alpha, *settings)
+
+    def _check_version(self, version: int) -> bool:
+        """Move to `version` if it is newer; False if it is older than the one in use."""
+        with self._lock:
+            if self._version is not None and version < self._version:
+                return False  # a caller that polled before the last bump
+            if self._version != version:
+                if self._version is not None:
+                    self.results.clear()
+                    self.invalidations += 1
+                self._version = version
+            return True
+
+    def _shared_result_key(self, key: Tuple, version: int) -> str:
+        return f"{self.prefix}:res:{version}:{_digest(list(key))}"
+
+    def get_results(self, key: Tuple, version: int) -> Optional[List[Dict]]:
+        current = self._check_version(version)
+        hits = self.results.get(key) if current else None
+        if hits is None and self.shared is not None:
+            blob = self.shared.get(self._shared_result_key(key, version))
+            if blob is not None:
+                hits = json.loads(blob)
+                if current:
+                    self.results.put(key, hits)
+                self.shared_hits["results"] += 1
+        # Copies, so callers can annotate hits without touching the cache.
+        return [dict(h) for h in hits] if hits is not None else None
+
+    def put_results(self, key: Tuple, version: int, hits: List[Dict]) -> None:
+        if not self._check_version(version):
+            return  # computed against an older graph
+        hits = [dict(h) for h in hits]
+        self.results.put(key, hits)
+        if self.shared is not None:
+            self.shared.set(self._shared_result_key(key, version), json.dumps(hits).encode("utf-8"), ex=_seconds(self.ttl_s))
+
+    # -------------------------------- Stats ---------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "vectors": {**self.vectors.stats(), "shared_hits": self.shared_hits["vectors"]},
+            "results": {**self.results.stats(), "shared_hits": self.shared_hits["results"]},
+            "graph_version": self._version,
+            "invalidations": self.invalidations,
+        }
+
+    def clear(self) -> None:
+        self.vectors.clear()
+        self.results.clear()
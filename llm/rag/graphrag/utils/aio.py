@@ -0,0 +1,47 @@
+"""
+Shared background event loop for the blocking clients.
+
+`LLM` and `Embeddings` are thin wrappers that run their async counterparts
+here, so both flavours share one provider switch and the async SDK clients
+keep their connection pools on a single, long-lived loop. Blocking callers
+may sit on any thread, including one that runs its own event loop.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from typing import Awaitable, Optional, TypeVar
+
+T = TypeVar("T")
+
+_lock = threading.Lock()
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_thread: Optional[threading.Thread] = None
+_pid = 0
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    global _loop, _thread, _pid
+    with _lock:
+        # A forked child inherits the loop object but not its thread.
+        if _loop is None or _pid != os.getpid():
+            _loop = asyncio.new_event_loop()
+            _thread = threading.Thread(target=_loop.run_forever, name="graphrag-aio", daemon=True)
+            _thread.start()
+            _pid = os.getpid()
+        return _loop
+
+
+def run_sync(coro: Awaitable[T]) -> T:
+    """Run `coro` on the background loop and block until it finishes."""
+    loop = _background_loop()
+    if threading.current_thread() is _thread:
+        coro.close()
+        raise RuntimeError("run_sync called from the background loop; await the async client instead")
+    fut = asyncio.run_coroutine_threadsafe(coro, loop)
+    try:
+        return fut.result()
+    except BaseException:
+        fut.cancel()  # e.g. KeyboardInterrupt in the caller: stop the upstream request too
+        raise
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Persistent, content-addressed embedding cache backed by SQLite.
+
+    - Rows are keyed by (provider, model, sha256(text)); vectors are float32 blobs
+    - Lookups and inserts are done in bulk, one statement per `batch` keys;
+      re-inserting a key replaces its vector but keeps its hit count
+    - `max_entries` caps the table; least-recently-used rows are evicted
+    - `warm()` pre-loads the most frequently hit rows into an in-memory layer;
+      hits served from it are counted in memory and written back to the
+      LRU columns with the next write (or every `batch` distinct keys)
+    - `hits` / `misses` count lookups since construction (see `stats()`)
+    """
+
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS embeddings ("
+        " provider TEXT NOT NULL,"
+        " model TEXT NOT NULL,"
+        " text_hash TEXT NOT NULL,"
+        " vec BLOB NOT NULL,"
+        " hits INTEGER NOT NULL DEFAULT 0,"
+        " last_used REAL NOT NULL,"
+        " PRIMARY KEY (provider, model, text_hash)"
+        ")"
+    )
+
+    def __init__(self, path: str, max_entries: int = 1_000_000, batch: int = 500):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.batch = batch
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._hot: Dict[Tuple[str, str, str], List[float]] = {}
+        self._hot_touched: Dict[Tuple[str, str, str], int] = {}  # hot-layer hits not yet written back
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(self._SCHEMA)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_lru ON embeddings (last_used)")
+        self._conn.commit()
+        # Kept up to date by put_many / eviction so writes never scan the table.
+        self._rows = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    # ------------------------------- Lookups --------------------------------
+
+    def get_many(self, provider: str, model: str, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        hashes = [text_hash(t) for t in texts]
+        found: Dict[str, List[float]] = {}
+        cold = []
+        now = time.time()
+        with self._lock:
+            for h in set(hashes):
+                key = (provider, model, h)
+                vec = self._hot.get(key)
+                if vec is not None:
+                    found[h] = vec
+                    self._hot_touched[key] = self._hot_touched.get(key, 0) + 1
+                else:
+                    cold.append(h)
+
+            for i in range(0, len(cold), self.batch):
+                part = cold[i : i + self.batch]
+                marks = ",".join("?" * len(part))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vec FROM embeddings "
+                    f"WHERE provider = ? AND model = ? AND text_hash IN ({marks})",
+                    (provider, model, *part),
+                ).fetchall()
+                for h, blob in rows:
+                    found[h] = np.frombuffer(blob, dtype=np.float32).tolist()
+            touched = [h for h in cold if h in found]
+            for i in range(0, len(touched), self.batch):
+                part = touched[i : i + self.batch]
+                marks = ",".join("?" * len(part))
+                self._conn.execute(
+                    f"UPDATE embeddings SET hits = hits + 1, last_used = ? "
+                    f"WHERE provider = ? AND model = ? AND text_hash IN ({marks})",
+                    (now, provider, model, *part),
+                )
+            if len(self._hot_touched) >= self.batch:
+                self._flush_touched_locked(now)
+            if touched:
+                self._conn.commit()
+
+            out = [found.get(h) for h in hashes]
+            n_hit = sum(v is not None for v in out)
+            self.hits += n_hit
+            self.misses += len(out) - n_hit
+        return out
+
+    def put_many(self, provider: str, model: str, texts: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        now = time.time()
+        rows = [
+            (provider, model, text_hash(t), np.asarray(v, dtype=np.float32).tobytes(), now)
+            for t, v in zip(texts, vectors)
+        ]
+        new = {r[2] for r in rows}
+        with self._lock:
+            # Primary-key probes for the batch only, so the running row count
+            # stays exact without a COUNT(*) over the table.
+            keys = list(new)
+            for i in range(0, len(keys), self.batch):
+                part = keys[i : i + self.batch]
+                marks = ",".join("?" * len(part))
+                for (h,) in self._conn.execute(
+                    f"SELECT text_hash FROM embeddings WHERE provider = ? AND model = ? AND text_hash IN ({marks})",
+                    (provider, model, *part),
+                ):
+                    new.discard(h)
+            # Upsert rather than REPLACE: a re-embedded text keeps its hit
+            # count, which warm() ranks by.
+            self._conn.executemany(
+                "INSERT INTO embeddings (provider, model, text_hash, vec, hits, last_used) "
+                "VALUES (?, ?, ?, ?, 0, ?) "
+                "ON CONFLICT (provider, model, text_hash) DO UPDATE SET vec = excluded.vec, last_used = excluded.last_used",
+                rows,
+            )
+            self._rows += len(new)
+            self._flush_touched_locked(now)
+            self._evict_locked()
+            self._conn.commit()
+
+    # ------------------------------ Maintenance -----------------------------
+
+    def _flush_touched_locked(self, now: float) -> None:
+        # Write back hot-layer hits so LRU eviction and warm() still see them.
+        if not self._hot_touched:
+            return
+        self._conn.executemany(
+            "UPDATE embeddings SET hits = hits + ?, last_used = ? "
+            "WHERE provider = ? AND model = ? AND text_hash = ?",
+            [(n, now, *key) for key, n in self._hot_touched.items()],
+        )
+        self._hot_touched.clear()
+
+    def _evict_locked(self) -> None:
+        excess = self._rows - self.max_entries
+        if excess <= 0:
+            return
+        victims = self._conn.execute(
+            "SELECT provider, model, text_hash FROM embeddings ORDER BY last_used LIMIT ?", (excess,)
+        ).fetchall()
+        self._conn.executemany(
+            "DELETE FROM embeddings WHERE provider = ? AND model = ? AND text_hash = ?", victims
+        )
+        for key in victims:
+            self._hot.pop(tuple(key), None)
+        self._rows -= len(victims)
+        self.evictions += len(victims)
+
+    def warm(self, limit: int = 10_000, provider: str | None = None, model: str | None = None) -> int:
+        """Pre-load the `limit` most frequently hit rows into memory."""
+        where, params = "", []
+        if provider is not None:
+            where += " AND provider = ?"
+            params.append(provider)
+        if model is not None:
+            where += " AND model = ?"
+            params.append(model)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT provider, model, text_hash, vec FROM embeddings WHERE 1 = 1{where} "
+                "ORDER BY hits DESC, last_used DESC LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+            for p, m, h, blob in rows:
+                self._hot[(p, m, h)] = np.frombuffer(blob, dtype=np.float32).tolist()
+        return len(rows)
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            hits, misses, evictions = self.hits, self.misses, self.evictions
+        total = hits + misses
+        return {
+            "entries": len(self),
+            "hot_entries": len(self._hot),
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+            "evictions": evictions,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+            self._rows = 0
+            self._hot.clear()
+            self._hot_touched.clear()
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_touched_locked(time.time())
+            self._conn.commit()
+            self._conn.close()
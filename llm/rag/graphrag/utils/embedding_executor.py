@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+RETRYABLE_NAMES = {"RateLimitError", "APITimeoutError", "APIConnectionError", "InternalServerError", "ResponseError"}
+
+
+def approx_tokens(text: str) -> int:
+    # ~4 characters per token for English BPE vocabularies.
+    return len(text) // 4 + 1
+
+
+def is_retryable(exc: BaseException) -> bool:
+    status = getattr(exc, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    return type(exc).__name__ in RETRYABLE_NAMES
+
+
+class EmbeddingExecutor:
+    """
+    Concurrent micro-batching executor around an `Embeddings`-like object.
+
+    - Splits inputs into batches bounded by `max_batch_tokens` and `max_batch_size`
+    - Sends up to `max_in_flight` batches concurrently from a long-lived pool,
+      so the wrapped object's SDK client is reused across batches; the limit
+      holds across all threads calling `embed()`. The pool starts on first
+      use, and `close()` stops it until the next call
+    - Retries rate-limit / transient errors with jittered exponential backoff
+    - Reassembles vectors in input order; `stats` reports texts/sec
+    """
+
+    def __init__(
+        self,
+        embed,
+        max_batch_tokens: int = 8000,
+        max_batch_size: int = 256,
+        max_in_flight: int = 4,
+        max_retries: int = 5,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        token_counter: Callable[[str], int] = approx_tokens,
+    ):
+        self.embed_backend = embed
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.token_counter = token_counter
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.stats: Dict[str, float] = {
+            "texts": 0, "batches": 0, "retries": 0, "seconds": 0.0, "texts_per_sec": 0.0,
+        }
+
+    # ------------------------------- Batching -------------------------------
+
+    def batches(self, texts: List[str]) -> List[List[int]]:
+        """Group input indices into token-budgeted batches (order preserved)."""
+        out: List[List[int]] = []
+        cur: List[int] = []
+        cur_tokens = 0
+        for i, t in enumerate(texts):
+            n = self.token_counter(t)
+            if cur and (cur_tokens + n > self.max_batch_tokens or len(cur) >= self.max_batch_size):
+                out.append(cur)
+                cur, cur_tokens = [], 0
+            cur.append(i)
+            cur_tokens += n
+        if cur:
+            out.append(cur)
+        return out
+
+    def _call_with_retry(self, batch: List[str]) -> List[List[float]]:
+        attempt = 0
+        while True:
+            try:
+                return self.embed_backend.embed(batch)
+            except Exception as exc:
+                if attempt >= self.max_retries or not is_retryable(exc):
+                    raise
+                delay = min(self.max_backoff, self.backoff * (2 ** attempt))
+                time.sleep(random.uniform(0, delay))  # full jitter
+                attempt += 1
+                with self._lock:
+                    self.stats["retries"] += 1
+
+    # -------------------------------- Public --------------------------------
+
+    def embed(self, texts: Iterable[str]) -> List[List[float]]:
+        texts = list(texts)
+        t0 = time.perf_counter()
+        groups = self.batches(texts)
+        pool = self._open()
+        futures = [pool.submit(self._call_with_retry, [texts[i] for i in g]) for g in groups]
+
+        out: List[Optional[List[float]]] = [None] * len(texts)
+        for g, fut in zip(groups, futures):
+            for i, vec in zip(g, fut.result()):
+                out[i] = vec
+
+        elapsed = time.perf_counter() - t0
+        with self._lock:
+            self.stats["texts"] += len(texts)
+            self.stats["batches"] += len(groups)
+            self.stats["seconds"] += elapsed
+            secs = self.stats["seconds"]
+            self.stats["texts_per_sec"] = self.stats["texts"] / secs if secs else 0.0
+        return out  # type: ignore[return-value]
+
+    def _open(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="embed")
+            return self._pool
+
+    def close(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+    def __enter__(self) -> "EmbeddingExecutor":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
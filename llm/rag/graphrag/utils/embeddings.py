@@ -1,35 +1,200 @@
 from __future__ import annotations
-from typing import Iterable, List
+from typing import Dict, Iterable, List, Optional, Tuple
+import asyncio
 import numpy as np
 
+from .aio import run_sync
+from .embedding_cache import EmbeddingCache
+from .instrumentation import result_len, timed
+
+
+LOCAL_PROVIDERS = ("local", "hashing")
+
+
+def _local_client(provider: str, model: str, options: Dict):
+    from .local_embeddings import HashingEmbedder, OnnxEmbedder
+
+    if provider == "local":
+        return OnnxEmbedder(model, **options)
+    return HashingEmbedder(**options)
+
+
+def _fill(texts: List[str], out: List, missing: List[str], fresh: List[List[float]]) -> List[List[float]]:
+    by_text = dict(zip(missing, fresh))
+    return [v if v is not None else by_text[t] for t, v in zip(texts, out)]
+
 
 class Embeddings:
-def __init__(self, provider: str, model: str):
-self.provider = provider
-self.model = model
-
-
-def embed(self, texts: Iterable[str]) -> List[List[float]]:
-texts = list(texts)
-if self.provider == "ollama":
-import ollama
-out = ollama.embed(model=self.model, input=texts)
-return out["embeddings"]
-elif self.provider == "openai":
-from openai import OpenAI
-client = OpenAI()
-out = client.embeddings.create(model=self.model, input=texts)
-return [d.embedding for d in out.data]
-elif self.provider == "azure":
-from openai import AzureOpenAI
-client = AzureOpenAI()
-out = client.embeddings.create(model=self.model, input=texts)
-return [d.embedding for d in out.data]
-else:
-raise ValueError(f"Unsupported embedding provider: {self.provider}")
-
-
-@staticmethod
-def mean_pool(vectors: List[List[float]]) -> List[float]:
-arr = np.array(vectors)
-return arr.mean(axis=0).tolist()
+    """
+    Blocking embedding client: a thin wrapper that runs `AsyncEmbeddings` on
+    the shared background loop (utils/aio.py), so the provider switch,
+    caching and request coalescing live in one place.
+
+    - Providers: ollama | openai | azure, or in-process models:
+      `local` (ONNX sentence-embedding model loaded from the directory
+      `model`; `local_opts` such as batch_size, max_length, threads,
+      quantize go to OnnxEmbedder) and `hashing` (deterministic
+      HashingEmbedder, `dim` in `local_opts`)
+    - In-process providers skip the loop and run on the calling thread;
+      there is no network call to coalesce or time out
+    - Safe to call from several threads, and from code that runs its own
+      event loop
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        model: str,
+        cache: Optional[EmbeddingCache] = None,
+        timeout: Optional[float] = None,
+        **local_opts,
+    ):
+        self.aio = AsyncEmbeddings(provider, model, cache, timeout, **local_opts)
+
+    @property
+    def provider(self) -> str:
+        return self.aio.provider
+
+    @property
+    def model(self) -> str:
+        return self.aio.model
+
+    @property
+    def cache(self) -> Optional[EmbeddingCache]:
+        return self.aio.cache
+
+    def embed(self, texts: Iterable[str], timeout: Optional[float] = None) -> List[List[float]]:
+        if self.provider in LOCAL_PROVIDERS:
+            return self._embed_local(list(texts))
+        return run_sync(self.aio.embed(texts, timeout))
+
+    @timed("embed", result_len)
+    def _embed_local(self, texts: List[str]) -> List[List[float]]:
+        return self.aio._embed_local(texts) if texts else []
+
+    def close(self) -> None:
+        run_sync(self.aio.aclose())
+
+    @staticmethod
+    def mean_pool(vectors: List[List[float]]) -> List[float]:
+        arr = np.array(vectors)
+        return arr.mean(axis=0).tolist()
+
+
+class AsyncEmbeddings:
+    """
+    asyncio embedding client on pooled async SDK clients; `Embeddings` wraps it.
+
+    - Provider switch: ollama | openai | azure | local | hashing, plus an
+      optional EmbeddingCache; in-process providers run in a worker thread
+    - `timeout` (per instance or per call) bounds each request
+    - Identical concurrent requests are coalesced onto one upstream call; the
+      shared call is cancelled only when every waiter has gone away
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        model: str,
+        cache: Optional[EmbeddingCache] = None,
+        timeout: Optional[float] = None,
+        **local_opts,
+    ):
+        self.provider = provider
+        self.model = model
+        self.cache = cache
+        self.timeout = timeout
+        self.local_opts = local_opts
+        self.coalesced = 0
+        self._client = None
+        self._inflight: Dict[Tuple[str, ...], List] = {}  # key -> [task, waiters]
+
+    @property
+    def client(self):
+        if self._client is None:
+            if self.provider == "ollama":
+                import ollama
+                self._client = ollama.AsyncClient()
+            elif self.provider == "openai":
+                from openai import AsyncOpenAI
+                self._client = AsyncOpenAI()
+            elif self.provider == "azure":
+                from openai import AsyncAzureOpenAI
+                self._client = AsyncAzureOpenAI()
+            elif self.provider in LOCAL_PROVIDERS:
+                self._client = _local_client(self.provider, self.model, self.local_opts)
+            else:
+                raise ValueError(f"Unsupported embedding provider: {self.provider}")
+        return self._client
+
+    def _embed_local(self, texts: List[str]) -> List[List[float]]:
+        # In-process providers: cache and model on the calling thread.
+        if self.cache is None:
+            return self.client.embed(texts)
+        out = self.cache.get_many(self.provider, self.model, texts)
+        missing = list(dict.fromkeys(t for t, v in zip(texts, out) if v is None))
+        if missing:
+            fresh = self.client.embed(missing)
+            self.cache.put_many(self.provider, self.model, missing, fresh)
+            out = _fill(texts, out, missing, fresh)
+        return out
+
+    async def _embed_uncached(self, texts: List[str]) -> List[List[float]]:
+        if self.provider == "ollama":
+            out = await self.client.embed(model=self.model, input=texts)
+            return out["embeddings"]
+        out = await self.client.embeddings.create(model=self.model, input=texts)
+        return [d.embedding for d in out.data]
+
+    async def _embed(self, texts: List[str]) -> List[List[float]]:
+        if self.provider in LOCAL_PROVIDERS:
+            self.client  # load once, on the loop thread
+            return await asyncio.to_thread(self._embed_local, texts)
+        if self.cache is None:
+            return await self._embed_uncached(texts)
+        # SQLite lookups are blocking; keep them off the event loop.
+        out = await asyncio.to_thread(self.cache.get_many, self.provider, self.model, texts)
+        missing = list(dict.fromkeys(t for t, v in zip(texts, out) if v is None))
+        if missing:
+            fresh = await self._embed_uncached(missing)
+            await asyncio.to_thread(self.cache.put_many, self.provider, self.model, missing, fresh)
+            out = _fill(texts, out, missing, fresh)
+        return out
+
+    @timed("embed", result_len)
+    async def embed(self, texts: Iterable[str], timeout: Optional[float] = None) -> List[List[float]]:
+        texts = list(texts)
+        if not texts:
+            return []
+        key = tuple(texts)
+        entry = self._inflight.get(key)
+        if entry is None or entry[0].cancelled():
+            task = asyncio.ensure_future(self._embed(texts))
+            entry = self._inflight[key] = [task, 0]
+            task.add_done_callback(lambda t, k=key: self._forget(k, t))
+        else:
+            self.coalesced += 1
+        task = entry[0]
+        entry[1] += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout or self.timeout)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0 and not task.done():
+                # Unlist before cancelling: a caller arriving while the
+                # cancellation is still in flight must start a fresh call.
+                self._forget(key, task)
+                task.cancel()
+
+    def _forget(self, key: Tuple[str, ...], task: asyncio.Future) -> None:
+        entry = self._inflight.get(key)
+        if entry is not None and entry[0] is task:
+            del self._inflight[key]
+
+    async def aclose(self) -> None:
+        close = getattr(self._client, "close", None)
+        if close is not None:
+            res = close()
+            if asyncio.iscoroutine(res):
+                await res
+        self._client = None
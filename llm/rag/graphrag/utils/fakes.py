@@ -0,0 +1,299 @@
+from __future__ import annotations
+
+import hashlib
+import math
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Sequence
+
+import numpy as np
+
+from databases.neo4j_client import Neo4jClient, Neo4jConfig
+from databases.neo4j_fakes import FakeDriver
+from ..retrievers.ranker import CrossEncoderBase
+
+
+class RateLimitError(Exception):
+    """Raised by fake providers to mimic an HTTP 429 from the real SDKs."""
+
+    status_code = 429
+
+
+def hashed_vector(text: str, dim: int) -> List[float]:
+    # Deterministic pseudo-embedding: same text -> same unit vector.
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    v = np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+    return (v / np.linalg.norm(v)).tolist()
+
+
+class FakeEmbeddingProvider:
+    """
+    Local stand-in for `Embeddings` with injectable latency and rate limits.
+
+    - `latency` is paid once per call, `per_text_latency` once per input text
+    - every `rate_limit_every`-th call raises RateLimitError (0 disables)
+    - records batch sizes and peak concurrency for assertions/benchmarks
+    """
+
+    def __init__(
+        self,
+        dim: int = 768,
+        latency: float = 0.05,
+        per_text_latency: float = 0.0,
+        rate_limit_every: int = 0,
+        provider: str = "fake",
+        model: str = "fake-embed",
+    ):
+        self.dim = dim
+        self.latency = latency
+        self.per_text_latency = per_text_latency
+        self.rate_limit_every = rate_limit_every
+        self.provider = provider
+        self.model = model
+        self.calls = 0
+        self.batch_sizes: List[int] = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+
+    def embed(self, texts: Iterable[str]) -> List[List[float]]:
+        texts = list(texts)
+        with self._lock:
+            self.calls += 1
+            call_no = self.calls
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            time.sleep(self.latency + self.per_text_latency * len(texts))
+            if self.rate_limit_every and call_no % self.rate_limit_every == 0:
+                raise RateLimitError(f"fake rate limit on call {call_no}")
+            with self._lock:
+                self.batch_sizes.append(len(texts))
+            return [hashed_vector(t, self.dim) for t in texts]
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+class FakeCrossEncoder(CrossEncoderBase):
+    """
+    Cross-encoder stand-in whose cost scales with padded batch size.
+
+    Each batch sleeps `latency + per_token_latency * rows * longest_row`
+    (whitespace tokens), so length bucketing and cascade sizes show up in
+    timings the way they would with a real model. Scores are query-term overlap.
+    """
+
+    def __init__(self, batch_size: int = 32, max_length: int = 512, latency: float = 0.002, per_token_latency: float = 2e-6):
+        super().__init__(batch_size, max_length)
+        self.latency = latency
+        self.per_token_latency = per_token_latency
+        self.padded_tokens = 0
+
+    def _encode(self, query: str, passages: Sequence[str]):
+        return query, list(passages), max(self.lengths(query, passages), default=0)
+
+    def _forward(self, batch) -> np.ndarray:
+        query, passages, longest = batch
+        self.padded_tokens += longest * len(passages)
+        time.sleep(self.latency + self.per_token_latency * longest * len(passages))
+        terms = set(query.lower().split())
+        return np.array([len(terms & set(p.lower().split())) / (1 + len(terms)) for p in passages], dtype=np.float32)
+
+
+_HOPS = re.compile(r"RELATES\*0\.\.(\d+)")
+_TERMS = re.compile(r"\w+")
+
+
+class FakeGraphStore:
+    """
+    In-memory Chunk/Entity graph that answers GraphRetriever's read queries,
+    so retrieval can be benchmarked and evaluated without a Neo4j server.
+
+    - `handler(cypher, params)` plugs into databases.neo4j_fakes.FakeDriver;
+      `client()` returns a Neo4jClient already wired to it
+    - Vector search is exact cosine over every chunk, reported as
+      (1 + cos) / 2 like Neo4j's cosine index; full-text scores are
+      idf-weighted query-term matches; expansion is a BFS over RELATES with
+      the semantics of `[:RELATES*0..hops]`
+    - Single, UNWIND-batched and single-round-trip variants are recognised
+      by their Cypher shape; `null AS text` projections are honoured and
+      anything unrecognised returns no rows
+    - AdjacencySnapshot's load queries are served too, so in-process
+      expansion can be measured against the same graph
+    - `per_row_latency` adds simulated server time per returned row
+    """
+
+    def __init__(self, per_row_latency: float = 0.0, version: int = 0):
+        self.per_row_latency = per_row_latency
+        self.version = version
+        self.texts: Dict[str, str] = {}
+        self.mentions: Dict[str, List[str]] = {}
+        self.chunks_of: Dict[str, List[str]] = defaultdict(list)
+        self.neighbours: Dict[str, set] = defaultdict(set)
+        self._embs: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+        self._built = False
+
+    # ---- Loading ----
+
+    def add_chunk(self, chunk_id: str, text: str, embedding: Sequence[float], entities: Iterable[str] = ()) -> None:
+        with self._lock:
+            self.texts[chunk_id] = text
+            self._embs[chunk_id] = list(embedding)
+            self.mentions[chunk_id] = list(dict.fromkeys(entities))
+            for e in self.mentions[chunk_id]:
+                self.chunks_of[e].append(chunk_id)
+            self._built = False
+
+    def add_relation(self, a: str, b: str) -> None:
+        with self._lock:
+            self.neighbours[a].add(b)
+            self.neighbours[b].add(a)
+
+    def _build(self) -> None:
+        with self._lock:
+            if self._built:
+                return
+            self._ids = list(self.texts)
+            self._pos = {cid: i for i, cid in enumerate(self._ids)}
+            m = np.asarray([self._embs[c] for c in self._ids], dtype=np.float32).reshape(len(self._ids), -1)
+            norms = np.linalg.norm(m, axis=1, keepdims=True)
+            self._matrix = m / np.where(norms == 0, 1.0, norms)
+            postings: Dict[str, List[int]] = defaultdict(list)
+            for i, cid in enumerate(self._ids):
+                for term in set(_TERMS.findall(self.texts[cid].lower())):
+                    postings[term].append(i)
+            n = len(self._ids)
+            self._postings = {t: np.asarray(p, dtype=np.int64) for t, p in postings.items()}
+            self._idf = {t: math.log(1.0 + n / len(p)) for t, p in postings.items()}
+            self._built = True
+
+    # ---- Search primitives ----
+
+    def _row(self, cid: str, score: float) -> Dict[str, Any]:
+        return {"id": cid, "text": self.texts[cid], "score": score}
+
+    def vector(self, q: Sequence[float], k: int) -> List[Dict[str, Any]]:
+        if not self._ids:
+            return []
+        qv = np.asarray(q, dtype=np.float32)
+        qv = qv / (np.linalg.norm(qv) or 1.0)
+        cos = self._matrix @ qv
+        k = min(k, cos.size)
+        top = np.argpartition(-cos, k - 1)[:k]
+        top = top[np.argsort(-cos[top], kind="stable")]
+        return [self._row(self._ids[i], float((1.0 + cos[i]) / 2.0)) for i in top]
+
+    def fulltext(self, q: str, k: int) -> List[Dict[str, Any]]:
+        scores = np.zeros(len(self._ids), dtype=np.float64)
+        for term in set(_TERMS.findall(q.lower())):
+            p = self._postings.get(term)
+            if p is not None:
+                scores[p] += self._idf[term]
+        hit = np.flatnonzero(scores)
+        top = hit[np.argsort(-scores[hit], kind="stable")][:k]
+        return [self._row(self._ids[i], float(scores[i])) for i in top]
+
+    def substring(self, q: str, k: int) -> List[Dict[str, Any]]:
+        out = []
+        for cid, text in self.texts.items():
+            if len(out) >= k:
+                break
+            if q in text:
+                out.append(self._row(cid, 1.0))
+        return out
+
+    def expand(self, seed_ids: Sequence[str], hops: int, k: int) -> List[str]:
+        seen = {e for c in seed_ids for e in self.mentions.get(c, ())}
+        order = list(seen)
+        frontier = set(seen)
+        for _ in range(hops):
+            frontier = {n for e in frontier for n in self.neighbours.get(e, ())} - seen
+            seen |= frontier
+            order.extend(frontier)
+        seeds = set(seed_ids)
+        out: Dict[str, None] = {}
+        for e in order:
+            for cid in self.chunks_of.get(e, ()):
+                if cid not in seeds:
+                    out[cid] = None
+                    if len(out) >= k:
+                        return list(out)
+        return list(out)
+
+    def _hybrid(self, cypher: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        k = params["k"]
+        vec = self._normalised(self.vector(params["q"], k))
+        ft = self._normalised(self.fulltext(params["qstr"], k))
+        ids = list(dict.fromkeys([*vec, *ft]))
+        hops = _HOPS.search(cypher)
+        if hops:
+            ids += self.expand(ids, int(hops.group(1)), k)
+        with_emb = "null AS emb" not in cypher
+        return [
+            {
+                "id": cid, "text": self.texts[cid],
+                "emb": self._embs[cid] if with_emb else None,
+                "v": vec.get(cid, 0.0), "f": ft.get(cid, 0.0),
+            }
+            for cid in ids
+        ]
+
+    @staticmethod
+    def _normalised(hits: List[Dict[str, Any]]) -> Dict[str, float]:
+        top = max((h["score"] for h in hits), default=0.0) or 1.0
+        return {h["id"]: h["score"] / top for h in hits}
+
+    # ---- Driver hook ----
+
+    def handler(self, cypher: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        self._build()
+        k = params.get("k", 0)
+        hops = _HOPS.search(cypher)
+        if "GraphMeta" in cypher:
+            rows = [{"version": self.version}]
+        elif "AS entities" in cypher:  # AdjacencySnapshot load; the fake never changes afterwards
+            rows = [{"chunk": c, "entities": es, "ts": 0} for c, es in self.mentions.items()] if params["wm"] < 0 else []
+        elif "[r:RELATES]" in cypher:
+            rows = [
+                {"a": a, "b": b, "ts": 0} for a, ns in self.neighbours.items() for b in ns if a < b
+            ] if params["wm"] < 0 else []
+        elif "size($qs)" in cypher:
+            search = (
+                (lambda q: self.vector(q, k)) if "vector.queryNodes" in cypher
+                else (lambda q: self.fulltext(q, k)) if "fulltext.queryNodes" in cypher
+                else (lambda q: self.substring(q, k))
+            )
+            rows = [{"qi": qi, **h} for qi, q in enumerate(params["qs"]) for h in search(q)]
+        elif "size($seeds)" in cypher:
+            rows = [
+                {"qi": qi, **self._row(cid, 0.0)}
+                for qi, seeds in enumerate(params["seeds"])
+                for cid in self.expand(seeds, int(hops.group(1)), k)
+            ]
+        elif "collect({id: node.id" in cypher:
+            rows = self._hybrid(cypher, params)
+        elif "vector.queryNodes" in cypher:
+            rows = self.vector(params["q"], k)
+        elif "fulltext.queryNodes" in cypher:
+            rows = self.fulltext(params["q"], k)
+        elif "CONTAINS $q" in cypher:
+            rows = self.substring(params["q"], k)
+        elif hops:
+            rows = [self._row(cid, 0.0) for cid in self.expand(params["ids"], int(hops.group(1)), k)]
+        elif "c.id IN $ids" in cypher:
+            rows = [{**self._row(cid, 0.0), "emb": self._embs[cid]} for cid in params["ids"] if cid in self.texts]
+        else:
+            rows = []
+        if "null AS text" in cypher:
+            rows = [{**r, "text": None} for r in rows]
+        if self.per_row_latency:
+            time.sleep(self.per_row_latency * len(rows))
+        return rows
+
+    def client(self, query_latency: float = 0.0) -> Neo4jClient:
+        driver = FakeDriver(self.handler, query_latency=query_latency)
+        return Neo4jClient(Neo4jConfig("bolt://fake", "u", "p", retry_backoff=0.0), driver=driver)
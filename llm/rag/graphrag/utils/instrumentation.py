@@ -0,0 +1,142 @@
+"""
+Per-stage timings and counters for the GraphRAG pipeline, exported in the
+Prometheus text format (mlops/monitoring/prometheus_metrics_exporter.py).
+
+Off unless GRAPHRAG_METRICS=1 or `enable()` / `configure()` turns it on;
+while off, an instrumented call costs one global flag check.
+
+    graphrag_stage_seconds{stage=...}        histogram, one observation per call
+    graphrag_stage_errors_total{stage=...}   calls that raised (cancellation is not an error)
+    graphrag_stage_items_total{stage=...}    texts embedded, rows returned, chunks written
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import inspect
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from mlops.monitoring.prometheus_metrics_exporter import MetricsRegistry, MultiProcessWriter, start_http_server
+
+
+REGISTRY = MetricsRegistry()
+STAGE_SECONDS = REGISTRY.histogram(
+    "graphrag_stage_seconds", "Wall time of one call of a GraphRAG pipeline stage.", ("stage",)
+)
+STAGE_ERRORS = REGISTRY.counter("graphrag_stage_errors_total", "Calls of a GraphRAG stage that raised.", ("stage",))
+STAGE_ITEMS = REGISTRY.counter(
+    "graphrag_stage_items_total", "Items handled by a GraphRAG stage (texts, rows, chunks).", ("stage",)
+)
+
+_enabled = os.getenv("GRAPHRAG_METRICS", "").lower() in ("1", "true", "yes", "on")
+
+ItemCount = Callable[[tuple, Any], int]
+
+
+def enable(on: bool = True) -> None:
+    global _enabled
+    _enabled = on
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def result_len(args: tuple, out: Any) -> int:
+    return len(out) if out is not None else 0
+
+
+def arg_len(i: int) -> ItemCount:
+    """Item count = len() of positional argument `i` (self is 0)."""
+    return lambda args, out: len(args[i]) if len(args) > i else 0
+
+
+def timed(stage: str, items: Optional[ItemCount] = None):
+    """
+    Decorator recording the wrapped call (sync or async) under `stage`.
+    `items(args, result)` adds to graphrag_stage_items_total.
+    """
+    seconds = STAGE_SECONDS.labels(stage)
+    errors = STAGE_ERRORS.labels(stage)
+    counted = STAGE_ITEMS.labels(stage)
+
+    def deco(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def awrapper(*args, **kwargs):
+                if not _enabled:
+                    return await fn(*args, **kwargs)
+                t0 = time.perf_counter()
+                try:
+                    out = await fn(*args, **kwargs)
+                except asyncio.CancelledError:
+                    raise  # a timeout or a caller going away, not a stage failure
+                except BaseException:
+                    errors.inc()
+                    raise
+                finally:
+                    seconds.observe(time.perf_counter() - t0)
+                if items is not None:
+                    counted.inc(items(args, out))
+                return out
+
+            return awrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                out = fn(*args, **kwargs)
+            except BaseException:
+                errors.inc()
+                raise
+            finally:
+                seconds.observe(time.perf_counter() - t0)
+            if items is not None:
+                counted.inc(items(args, out))
+            return out
+
+        return wrapper
+
+    return deco
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Context-manager form of `timed` for blocks that are not a whole function."""
+    if not _enabled:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    except asyncio.CancelledError:
+        raise
+    except BaseException:
+        STAGE_ERRORS.labels(name).inc()
+        raise
+    finally:
+        STAGE_SECONDS.labels(name).observe(time.perf_counter() - t0)
+
+
+def configure(cfg: Optional[Dict[str, Any]]) -> None:
+    """
+    Apply the `metrics` config section: `enabled` (default true when the
+    section exists), `port` / `addr` for the /metrics endpoint, and
+    `multiprocess_dir` (or PROMETHEUS_MULTIPROC_DIR) with `flush_s` for
+    multi-process mode.
+    """
+    if not cfg or not cfg.get("enabled", True):
+        return
+    enable()
+    mp_dir = cfg.get("multiprocess_dir") or os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if mp_dir:
+        MultiProcessWriter(REGISTRY, mp_dir, cfg.get("flush_s", 5.0)).start()
+    if cfg.get("port"):
+        # In multi-process mode this process's samples arrive through its own file.
+        start_http_server(cfg["port"], cfg.get("addr", ""), None if mp_dir else REGISTRY, mp_dir)
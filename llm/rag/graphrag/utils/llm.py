@@ -1,30 +1,81 @@
 from __future__ import annotations
-from typing import Dict, List
-import os
+from typing import Dict, List, Optional
+import asyncio
+
+from .aio import run_sync
+from .instrumentation import timed
 
 
 class LLM:
-def __init__(self, provider: str, model: str):
-self.provider = provider
-self.model = model
-
-
-def chat(self, messages: List[Dict[str, str]]) -> str:
-# Minimal pluggable shim – extend with real SDKs
-if self.provider == "ollama":
-# pip install ollama
-import ollama
-rsp = ollama.chat(model=self.model, messages=messages)
-return rsp["message"]["content"].strip()
-elif self.provider == "openai":
-from openai import OpenAI
-client = OpenAI()
-rsp = client.chat.completions.create(model=self.model, messages=messages)
-return rsp.choices[0].message.content.strip()
-elif self.provider == "azure":
-from openai import AzureOpenAI
-client = AzureOpenAI()
-rsp = client.chat.completions.create(model=self.model, messages=messages)
-return rsp.choices[0].message.content.strip()
-else:
-raise ValueError(f"Unsupported LLM provider: {self.provider}")
+    """
+    Blocking chat client: a thin wrapper that runs `AsyncLLM` on the shared
+    background loop (utils/aio.py), so both share one provider switch.
+    """
+
+    def __init__(self, provider: str, model: str, timeout: Optional[float] = None):
+        self.aio = AsyncLLM(provider, model, timeout)
+
+    @property
+    def provider(self) -> str:
+        return self.aio.provider
+
+    @property
+    def model(self) -> str:
+        return self.aio.model
+
+    def chat(self, messages: List[Dict[str, str]], timeout: Optional[float] = None) -> str:
+        return run_sync(self.aio.chat(messages, timeout))
+
+    def close(self) -> None:
+        run_sync(self.aio.aclose())
+
+
+class AsyncLLM:
+    """
+    asyncio chat client on pooled async SDK clients; `LLM` wraps it.
+
+    - Provider switch: ollama | openai | azure
+    - `timeout` (per instance or per call) bounds each request
+    - Cancelling the awaiting task cancels the upstream request
+    """
+
+    def __init__(self, provider: str, model: str, timeout: Optional[float] = None):
+        self.provider = provider
+        self.model = model
+        self.timeout = timeout
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            if self.provider == "ollama":
+                import ollama
+                self._client = ollama.AsyncClient()
+            elif self.provider == "openai":
+                from openai import AsyncOpenAI
+                self._client = AsyncOpenAI()
+            elif self.provider == "azure":
+                from openai import AsyncAzureOpenAI
+                self._client = AsyncAzureOpenAI()
+            else:
+                raise ValueError(f"Unsupported LLM provider: {self.provider}")
+        return self._client
+
+    async def _chat(self, messages: List[Dict[str, str]]) -> str:
+        if self.provider == "ollama":
+            rsp = await self.client.chat(model=self.model, messages=messages)
+            return rsp["message"]["content"].strip()
+        rsp = await self.client.chat.completions.create(model=self.model, messages=messages)
+        return rsp.choices[0].message.content.strip()
+
+    @timed("llm_chat")
+    async def chat(self, messages: List[Dict[str, str]], timeout: Optional[float] = None) -> str:
+        return await asyncio.wait_for(self._chat(messages), timeout or self.timeout)
+
+    async def aclose(self) -> None:
+        close = getattr(self._client, "close", None)
+        if close is not None:
+            res = close()
+            if asyncio.iscoroutine(res):
+                await res
+        self._client = None
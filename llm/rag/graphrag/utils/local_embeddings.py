@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+class HashingEmbedder:
+    """
+    Deterministic feature-hashing embedder (no model, no network).
+
+    Word unigrams and bigrams are hashed into `dim` signed buckets and the
+    counts L2-normalised, so texts sharing words get similar vectors. Meant
+    for tests and air-gapped smoke runs, not for retrieval quality.
+    """
+
+    def __init__(self, dim: int = 384, ngrams: int = 2):
+        self.dim = dim
+        self.ngrams = ngrams
+
+    def _bucket(self, feature: str):
+        h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+        return h % self.dim, 1.0 if (h >> 63) & 1 else -1.0
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = _TOKEN.findall(text.lower())
+            for n in range(1, self.ngrams + 1):
+                for i in range(len(words) - n + 1):
+                    col, sign = self._bucket(" ".join(words[i : i + n]))
+                    out[row, col] += sign
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        return (out / np.where(norms == 0, 1.0, norms)).tolist()
+
+
+class OnnxEmbedder:
+    """
+    Sentence-embedding model from a local directory on onnxruntime's CPU provider.
+
+    - `model_path` holds `model.onnx` plus the tokenizer files (build one with
+      `export_onnx()` on a connected machine and copy it over)
+    - Texts are tokenised once, sorted by length and cut into batches of at
+      most `batch_size` rows and `max_batch_tokens` padded tokens, so short
+      texts never pad to the longest one in the call
+    - `threads` sets onnxruntime's intra-op thread count
+    - `quantize=True` uses `model_int8.onnx`, creating it with dynamic int8
+      weight quantisation on first use
+    - Mean pooling over the attention mask, then L2 normalisation (the
+      sentence-transformers recipe for MiniLM / mpnet style models)
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        batch_size: int = 64,
+        max_length: int = 256,
+        max_batch_tokens: int = 16384,
+        threads: Optional[int] = None,
+        quantize: bool = False,
+        normalize: bool = True,
+    ):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self.model_path = model_path
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.max_batch_tokens = max_batch_tokens
+        self.normalize = normalize
+        onnx_file = os.path.join(model_path, "model.onnx")
+        if quantize:
+            onnx_file = self.quantize_int8(onnx_file, os.path.join(model_path, "model_int8.onnx"))
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            opts.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(onnx_file, opts, providers=["CPUExecutionProvider"])
+        self._inputs = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(model_path, local_files_only=True)
+        self._pad_id = self.tokenizer.pad_token_id or 0
+
+    # -------------------------------- Batching -------------------------------
+
+    def batches(self, lengths: Sequence[int]) -> List[List[int]]:
+        """Length-sorted batches capped by rows and by padded tokens."""
+        out: List[List[int]] = []
+        cur: List[int] = []
+        for i in np.argsort(lengths, kind="stable").tolist():
+            # Sorted ascending, so the newest item sets the padded width.
+            if cur and (len(cur) >= self.batch_size or (len(cur) + 1) * lengths[i] > self.max_batch_tokens):
+                out.append(cur)
+                cur = []
+            cur.append(i)
+        if cur:
+            out.append(cur)
+        return out
+
+    def _pad(self, encoded: List[List[int]]) -> Dict[str, np.ndarray]:
+        width = max(len(ids) for ids in encoded)
+        input_ids = np.full((len(encoded), width), self._pad_id, dtype=np.int64)
+        mask = np.zeros((len(encoded), width), dtype=np.int64)
+        for row, ids in enumerate(encoded):
+            input_ids[row, : len(ids)] = ids
+            mask[row, : len(ids)] = 1
+        feed = {"input_ids": input_ids, "attention_mask": mask}
+        if "token_type_ids" in self._inputs:
+            feed["token_type_ids"] = np.zeros_like(input_ids)
+        return {k: v for k, v in feed.items() if k in self._inputs}
+
+    def _forward(self, feed: Dict[str, np.ndarray]) -> np.ndarray:
+        out = self.session.run(None, feed)[0]
+        if out.ndim == 2:  # model already pools
+            return out
+        mask = feed["attention_mask"][:, :, None].astype(np.float32)
+        return (out * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        encoded = self.tokenizer(list(texts), truncation=True, max_length=self.max_length)["input_ids"]
+        vecs: Optional[np.ndarray] = None
+        for idx in self.batches([len(ids) for ids in encoded]):
+            pooled = self._forward(self._pad([encoded[i] for i in idx]))
+            if vecs is None:
+                vecs = np.zeros((len(texts), pooled.shape[1]), dtype=np.float32)
+            vecs[idx] = pooled
+        if self.normalize:
+            vecs /= np.maximum(np.linalg.norm(vecs, axis=1, keepdims=True), 1e-12)
+        return vecs.tolist()
+
+    # --------------------------------- Build ---------------------------------
+
+    @staticmethod
+    def export_onnx(model_name: str, out_dir: str, opset: int = 17) -> str:
+        """Export a Hugging Face encoder (e.g. all-MiniLM-L6-v2) plus tokenizer to `out_dir`."""
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+
+        os.makedirs(out_dir, exist_ok=True)
+        tok = AutoTokenizer.from_pretrained(model_name)
+        model = AutoModel.from_pretrained(model_name).eval()
+        sample = tok(["an example sentence"], return_tensors="pt")
+        names = list(sample.keys())
+        axes = {n: {0: "batch", 1: "seq"} for n in names}
+        axes["last_hidden_state"] = {0: "batch", 1: "seq"}
+        torch.onnx.export(
+            model, tuple(sample[n] for n in names), os.path.join(out_dir, "model.onnx"),
+            input_names=names, output_names=["last_hidden_state"], dynamic_axes=axes, opset_version=opset,
+        )
+        tok.save_pretrained(out_dir)
+        return out_dir
+
+    @staticmethod
+    def quantize_int8(src_path: str, dst_path: str) -> str:
+        if not os.path.exists(dst_path):
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            quantize_dynamic(src_path, dst_path, weight_type=QuantType.QInt8)
+        return dst_path
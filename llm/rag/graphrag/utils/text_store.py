@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import threading
+import zlib
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from databases.neo4j_client import Neo4jClient
+
+
+# (offset, length, crc32) of a chunk's UTF-8 text inside texts.bin
+Ref = Tuple[int, int, int]
+
+GRAPH_REFS_CYPHER = (
+    "MATCH (c:Chunk) "
+    "RETURN c.id AS id, c.text_offset AS offset, c.text_length AS length"
+)
+UPDATE_REFS_CYPHER = (
+    "UNWIND $rows AS row\n"
+    "MATCH (c:Chunk {id: row.id})\n"
+    "SET c.text_offset = row.offset, c.text_length = row.length"
+)
+
+
+def _fsync_dir(path: str) -> None:
+    # Persist a rename; not every platform can open a directory.
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class TextBlobStore:
+    """
+    Append-only, memory-mapped store of chunk text keyed by chunk id.
+
+    - `texts.bin` holds UTF-8 blobs back to back; `index.jsonl` logs
+      `[id, offset, length, crc32]` per write and `[id, null]` per delete,
+      replayed on open (last entry wins)
+    - `get_many()` slices the mmap, so reads cost no Bolt traffic and no
+      copies beyond the returned strings
+    - `compact()` rewrites only live blobs into a new generation
+      (`texts.<n>.bin` / `index.<n>.jsonl`) and then replaces the `CURRENT`
+      pointer, so a crash leaves either the old pair or the new one in use,
+      never a mix; pass `neo` to update the offsets kept on Chunk nodes
+    - `check(neo)` compares the store with the graph and verifies checksums
+    - One process writes, any number read: reads, writes and `check()`
+      first replay index lines other processes appended since (one stat()
+      when there are none), and reopen from `CURRENT` after another
+      process compacted
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self._pointer_path = os.path.join(path, "CURRENT")
+        self._lock = threading.RLock()
+        self._blob = self._index = None
+        self._map: Optional[mmap.mmap] = None
+        self._open(self._read_pointer())
+
+    def _read_pointer(self) -> int:
+        try:
+            with open(self._pointer_path, "r", encoding="utf-8") as f:
+                return int(f.read().strip())
+        except FileNotFoundError:
+            return 0
+
+    def _open(self, gen: int) -> None:
+        # (Re)load generation `gen` from disk, dropping whatever was open.
+        self._close_files()
+        self._gen = gen
+        self._blob_path, self._index_path = self._paths(gen)
+        self._refs: Dict[str, Ref] = {}
+        self._dead_bytes = 0
+        self._index_pos = 0
+        self._blob = open(self._blob_path, "ab")
+        self._index = open(self._index_path, "a", encoding="utf-8")
+        self._index_ino = os.fstat(self._index.fileno()).st_ino
+        self._size = self._blob.tell()
+        self._mapped = 0
+        self._catch_up()
+
+    def _catch_up(self) -> None:
+        """Replay index entries appended by other processes; reload after their compaction."""
+        try:
+            st = os.stat(self._index_path)
+        except FileNotFoundError:
+            st = None
+        if st is None or st.st_ino != self._index_ino:
+            self._open(self._read_pointer())
+            return
+        if st.st_size <= self._index_pos:
+            return
+        with open(self._index_path, "rb") as f:
+            f.seek(self._index_pos)
+            data = f.read()
+        end = data.rfind(b"\n") + 1  # a line still being written waits for the next call
+        for line in data[:end].splitlines():
+            self._replay(json.loads(line))
+        self._index_pos += end
+        # Index lines are flushed after their blobs, so those bytes are on disk.
+        self._size = max(self._size, os.fstat(self._blob.fileno()).st_size)
+
+    def _paths(self, gen: int) -> Tuple[str, str]:
+        # Generation 0 keeps the original names of stores never compacted.
+        if gen == 0:
+            return os.path.join(self.path, "texts.bin"), os.path.join(self.path, "index.jsonl")
+        return os.path.join(self.path, f"texts.{gen}.bin"), os.path.join(self.path, f"index.{gen}.jsonl")
+
+    def _replay(self, entry: List) -> None:
+        old = self._refs.pop(entry[0], None)
+        if old is not None:
+            self._dead_bytes += old[1]
+        if entry[1] is not None:
+            self._refs[entry[0]] = (entry[1], entry[2], entry[3])
+
+    def __len__(self) -> int:
+        return len(self._refs)
+
+    def __contains__(self, chunk_id: str) -> bool:
+        return chunk_id in self._refs
+
+    def ref(self, chunk_id: str) -> Optional[Ref]:
+        return self._refs.get(chunk_id)
+
+    # -------------------------------- Writes ---------------------------------
+
+    def put_many(self, items: Iterable[Tuple[str, str]]) -> Dict[str, Ref]:
+        out: Dict[str, Ref] = {}
+        with self._lock:
+            self._catch_up()
+            for chunk_id, text in items:
+                data = text.encode("utf-8")
+                ref = (self._size, len(data), zlib.crc32(data))
+                self._blob.write(data)
+                self._size += len(data)
+                self._log([chunk_id, *ref])
+                out[chunk_id] = ref
+            self._blob.flush()
+            self._index.flush()
+            self._index_pos = os.fstat(self._index.fileno()).st_size
+        return out
+
+    def delete_many(self, chunk_ids: Iterable[str]) -> None:
+        with self._lock:
+            self._catch_up()
+            for chunk_id in chunk_ids:
+                if chunk_id in self._refs:
+                    self._log([chunk_id, None])
+            self._index.flush()
+            self._index_pos = os.fstat(self._index.fileno()).st_size
+
+    def _log(self, entry: List) -> None:
+        self._index.write(json.dumps(entry) + "\n")
+        self._replay(entry)
+
+    # -------------------------------- Reads ----------------------------------
+
+    def _view(self) -> Optional[mmap.mmap]:
+        # Remap only after the file grew.
+        if self._size and (self._map is None or self._mapped != self._size):
+            if self._map is not None:
+                self._map.close()
+            with open(self._blob_path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mapped = self._size
+        return self._map
+
+    def get_many(self, chunk_ids: Sequence[str]) -> Dict[str, str]:
+        with self._lock:
+            self._catch_up()  # one stat() unless another process wrote
+            view = self._view()
+            out = {}
+            for chunk_id in chunk_ids:
+                ref = self._refs.get(chunk_id)
+                if ref is not None:
+                    out[chunk_id] = view[ref[0] : ref[0] + ref[1]].decode("utf-8") if ref[1] else ""
+            return out
+
+    def get(self, chunk_id: str) -> Optional[str]:
+        return self.get_many([chunk_id]).get(chunk_id)
+
+    # ------------------------------ Maintenance ------------------------------
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "chunks": len(self._refs),
+            "file_bytes": self._size,
+            "live_bytes": self._size - self._dead_bytes,
+            "dead_bytes": self._dead_bytes,
+        }
+
+    def compact(self, neo: Optional[Neo4jClient] = None, batch_size: int = 1000) -> Dict[str, int]:
+        """Drop overwritten/deleted blobs; returns bytes before/after."""
+        with self._lock:
+            self._catch_up()
+            before = self._size
+            view = self._view()
+            gen = self._gen + 1
+            new_blob, new_index = self._paths(gen)
+            refs: Dict[str, Ref] = {}
+            offset = 0
+            with open(new_blob, "wb") as b, open(new_index, "w", encoding="utf-8") as ix:
+                # Keep file order so sequential readers stay sequential.
+                for chunk_id, (off, length, crc) in sorted(self._refs.items(), key=lambda kv: kv[1][0]):
+                    if length:
+                        b.write(view[off : off + length])
+                    refs[chunk_id] = (offset, length, crc)
+                    ix.write(json.dumps([chunk_id, offset, length, crc]) + "\n")
+                    offset += length
+                b.flush()
+                os.fsync(b.fileno())
+                ix.flush()
+                os.fsync(ix.fileno())
+
+            # The pointer swap is the commit point: one atomic rename.
+            tmp = self._pointer_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(str(gen))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self._pointer_path)
+            _fsync_dir(self.path)
+
+            # Other processes keep their mappings of the old files and
+            # reload from CURRENT on their next read.
+            for old in (self._blob_path, self._index_path):
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass  # unreferenced now; a leftover only wastes space
+            self._open(gen)
+
+        if neo is not None:
+            rows = ({"id": cid, "offset": r[0], "length": r[1]} for cid, r in refs.items())
+            neo.write_batches(UPDATE_REFS_CYPHER, rows, batch_size)
+        return {"bytes_before": before, "bytes_after": offset, "chunks": len(refs)}
+
+    def check(self, neo: Optional[Neo4jClient] = None) -> Dict[str, List[str]]:
+        """
+        Consistency report (lists of chunk ids):
+        `corrupt` blobs failing their checksum; with `neo`, also chunks the
+        graph points at but the store lacks (`missing`), store entries with
+        no Chunk node (`orphaned`) and nodes whose offset/length disagree
+        with the index (`stale_refs`, fixed by `compact(neo)`).
+        """
+        report: Dict[str, List[str]] = {"corrupt": [], "missing": [], "orphaned": [], "stale_refs": []}
+        with self._lock:
+            self._catch_up()
+            view = self._view()
+            for chunk_id, (off, length, crc) in self._refs.items():
+                if zlib.crc32(view[off : off + length] if length else b"") != crc:
+                    report["corrupt"].append(chunk_id)
+            refs = dict(self._refs)
+        if neo is None:
+            return report
+
+        seen = set()
+        for row in neo.run(GRAPH_REFS_CYPHER):
+            chunk_id = row["id"]
+            seen.add(chunk_id)
+            ref = refs.get(chunk_id)
+            if ref is None:
+                if row.get("offset") is not None:
+                    report["missing"].append(chunk_id)
+            elif (row.get("offset"), row.get("length")) != (ref[0], ref[1]):
+                report["stale_refs"].append(chunk_id)
+        report["orphaned"] = [cid for cid in refs if cid not in seen]
+        return report
+
+    def _close_files(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        for f in (self._blob, self._index):
+            if f is not None:
+                f.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_files()
@@ -0,0 +1,65 @@
+from databases.neo4j_client import Neo4jClient, Neo4jConfig
+from databases.neo4j_fakes import FakeDriver
+from llm.rag.graphrag.graph_builders.graph_version import GraphVersion
+from llm.rag.graphrag.retrievers.adjacency import AdjacencySnapshot
+from llm.rag.graphrag.retrievers.graph_walk import GraphRetriever
+from llm.rag.graphrag.utils.embeddings import Embeddings
+
+
+class FakeGraph:
+    """Chunk mentions and relations with `updated_at` stamps, served to the adjacency queries."""
+
+    def __init__(self):
+        self.chunks = {}  # id -> (entities, ts)
+        self.relations = []  # (a, b, ts)
+        self.version = 1
+        self.reads = []
+
+    def handler(self, cypher, params):
+        if "GraphMeta" in cypher:
+            return [{"version": self.version}]
+        if "MATCH (c:Chunk) WHERE coalesce(c.updated_at, 0) >= $wm" in cypher:
+            self.reads.append(params["wm"])
+            return [
+                {"chunk": c, "entities": ents, "ts": ts}
+                for c, (ents, ts) in self.chunks.items() if ts >= params["wm"]
+            ]
+        if "RELATES" in cypher and "$wm" in cypher:
+            return [{"a": a, "b": b, "ts": ts} for a, b, ts in self.relations if ts >= params["wm"]]
+        return []
+
+    def client(self):
+        return Neo4jClient(Neo4jConfig("bolt://fake", "u", "p"), driver=FakeDriver(self.handler))
+
+
+def test_refresh_sees_writes_stamped_before_the_watermark():
+    g = FakeGraph()
+    g.chunks = {"c1": (["x"], 1_000), "c2": (["y"], 1_000)}
+    snap = AdjacencySnapshot(g.client(), lag_ms=100).load()
+    assert snap.watermark == 1_000 and snap.expand(["c1"], 1, 10) == []
+    # A transaction that started before the load committed after it.
+    g.chunks["c3"] = (["x"], 950)
+    g.relations.append(("x", "y", 960))
+    snap.refresh()
+    assert snap.expand(["c1"], 1, 10) == ["c3", "c2"]
+    snap.refresh()  # re-reading the lag window changes nothing
+    assert snap.memory()["relations"] == 1 and snap.memory()["mentions"] == 3
+
+
+def test_retriever_refreshes_the_snapshot_when_the_graph_version_moves():
+    g = FakeGraph()
+    g.chunks = {"c1": (["x"], 1_000)}
+    neo = g.client()
+    snap = AdjacencySnapshot(neo).load()
+    retriever = GraphRetriever(
+        neo, Embeddings("hashing", "hashing", dim=8), adjacency=snap,
+        graph_version=GraphVersion(neo, poll_interval=0.0),
+    )
+    retriever.retrieve("q")
+    retriever.retrieve("q")
+    assert len(g.reads) == 2  # load, then one refresh for version 1
+    g.chunks["c2"] = (["x"], 2_000)
+    g.version = 2
+    retriever.retrieve("q")
+    assert len(g.reads) == 3 and snap.version == 2
+    assert snap.expand(["c1"], 1, 10) == ["c2"]
@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from llm.rag.graphrag.utils.embeddings import AsyncEmbeddings, Embeddings
+from llm.rag.graphrag.utils.llm import LLM
+
+
+class SlowEmbeddings(AsyncEmbeddings):
+    def __init__(self, delay=0.05):
+        super().__init__("ollama", "m")  # upstream replaced below; no client is created
+        self.delay = delay
+        self.calls = 0
+
+    async def _embed_uncached(self, texts):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return [[float(len(t))] for t in texts]
+
+
+def test_sync_wrapper_matches_async_client():
+    sync = Embeddings("hashing", "hashing", dim=16)
+    expected = asyncio.run(AsyncEmbeddings("hashing", "hashing", dim=16).embed(["a b", "c"]))
+    assert sync.embed(["a b", "c"]) == expected
+    assert sync.embed([]) == []
+
+
+def test_sync_wrapper_inside_running_loop():
+    sync = Embeddings("hashing", "hashing", dim=4)
+
+    async def caller():
+        return sync.embed(["x"])
+
+    assert len(asyncio.run(caller())[0]) == 4
+
+
+def test_identical_requests_share_one_call():
+    emb = SlowEmbeddings()
+
+    async def main():
+        return await asyncio.gather(emb.embed(["a", "bb"]), emb.embed(["a", "bb"]), emb.embed(["c"]))
+
+    a, b, c = asyncio.run(main())
+    assert a == b == [[1.0], [2.0]] and c == [[1.0]]
+    assert emb.calls == 2 and emb.coalesced == 1
+
+
+def test_caller_after_cancellation_gets_fresh_call():
+    emb = SlowEmbeddings(delay=0.2)
+
+    async def main():
+        with pytest.raises(asyncio.TimeoutError):
+            await emb.embed(["a"], timeout=0.01)  # last waiter leaves: shared call is cancelled
+        return await emb.embed(["a"])  # must not join the cancelled task
+
+    assert asyncio.run(main()) == [[1.0]]
+    assert emb.calls == 2
+
+
+def test_unknown_provider_raises_through_wrapper():
+    with pytest.raises(ValueError):
+        LLM("nope", "m").chat([{"role": "user", "content": "hi"}])
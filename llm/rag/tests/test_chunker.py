@@ -0,0 +1,68 @@
+import pytest
+
+from llm.rag.graphrag.ingestion.chunker import StreamingChunker, chunk_spans
+from llm.rag.graphrag.ingestion.document_loader import chunk_document, iter_file_chunks
+
+WORDS = " ".join(f"w{i}" for i in range(40))
+
+
+def _texts(chunker, source):
+    return [text for _, text in chunker.chunks(source)]
+
+
+def test_sentences_pack_to_size_with_whole_sentence_overlap():
+    text = " ".join(f"s{i}a s{i}b s{i}c." for i in range(10))  # 3 tokens per sentence
+    spans = chunk_spans(text, size=9, overlap=3)
+    assert all(s.tokens <= 9 for s in spans)
+    chunks = [text[s.start:s.end] for s in spans]
+    assert chunks[0] == "s0a s0b s0c. s1a s1b s1c. s2a s2b s2c."
+    assert chunks[1].startswith("s2a s2b s2c.")  # last sentence carried over
+    assert chunks[-1].endswith("s9a s9b s9c.")
+
+
+def test_forced_word_splits_overlap():
+    chunker = StreamingChunker(size=10, overlap=3)
+    chunks = _texts(chunker, WORDS + ".")
+    assert all(len(c.split()) <= 10 for c in chunks)
+    for prev, nxt in zip(chunks, chunks[1:]):
+        assert prev.split()[-3:] == nxt.split()[:3]
+    assert chunks[-1].endswith("w39.")
+
+
+def test_short_sentence_is_merged_ahead_of_a_long_one():
+    chunker = StreamingChunker(size=10, overlap=2)
+    chunks = _texts(chunker, "Short one. " + WORDS[:80] + ".")
+    assert "Short one." not in chunks
+    assert chunks[0].startswith("Short one. w0")
+    assert all(len(c.split()) <= 10 for c in chunks)
+
+
+def test_short_sentence_is_merged_ahead_of_a_sentence_that_fits_alone():
+    chunker = StreamingChunker(size=10, overlap=0, min_tokens=3)
+    chunks = _texts(chunker, "Short one. " + " ".join(f"x{i}" for i in range(9)) + ".")
+    assert chunks[0].startswith("Short one. x0")
+
+
+def test_bytes_and_str_agree_and_offsets_index_the_source(tmp_path):
+    text = "Première phrase ici. Zweiter Satz über 東京。 " + WORDS + ".\n\nNew paragraph here"
+    chunker = StreamingChunker(size=12, overlap=4, block_size=64)
+    as_str = _texts(chunker, text)
+    raw = text.encode("utf-8")
+    as_bytes = _texts(chunker, raw)
+    assert as_str == as_bytes
+    path = tmp_path / "doc.txt"
+    path.write_bytes(raw)
+    from_file = list(iter_file_chunks(path, "doc.txt", chunker))
+    assert [c.text for c in from_file] == as_str
+    assert all(raw[c.start:c.end].decode("utf-8") == c.text for c in from_file)
+    assert [c.id for c in from_file] == [c.id for c in chunk_document("doc.txt", text, chunker=chunker)]
+
+
+def test_empty_inputs_and_bad_overlap(tmp_path):
+    chunker = StreamingChunker(size=5, overlap=1)
+    assert _texts(chunker, "") == [] and _texts(chunker, "   \n\n ") == []
+    empty = tmp_path / "empty.txt"
+    empty.write_bytes(b"")
+    assert list(chunker.file_chunks(str(empty))) == []
+    with pytest.raises(ValueError):
+        StreamingChunker(size=5, overlap=5)
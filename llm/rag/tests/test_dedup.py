@@ -0,0 +1,100 @@
+import yaml
+
+from databases.neo4j_client import Neo4jClient, Neo4jConfig
+from databases.neo4j_fakes import FakeDriver
+from llm.rag.graphrag.ingestion.dedup import ChunkDeduplicator, lsh_params
+from llm.rag.graphrag.ingestion.document_loader import Chunk, chunk_id
+from llm.rag.graphrag.pipelines import cli
+from llm.rag.graphrag.pipelines.manifest import IngestManifest
+
+BASE = " ".join(f"word{i}" for i in range(60))
+
+
+def _chunk(doc, order, text):
+    return Chunk(id=chunk_id(doc, order), doc_id=doc, text=text, order=order, start=0, end=len(text))
+
+
+def test_exact_and_near_duplicates_become_aliases():
+    dedup = ChunkDeduplicator(threshold=0.8)
+    a = _chunk("a", 0, BASE)
+    exact = _chunk("b", 0, BASE)
+    near = _chunk("c", 0, BASE + " tail")
+    other = _chunk("d", 0, " ".join(f"other{i}" for i in range(60)))
+    assert dedup.filter([a, exact, near, other]) == [a, other]
+    assert dedup.pop_aliases() == {a.id: [(exact.id, "b"), (near.id, "c")]}
+    assert dedup.stats()["exact_duplicates"] == 1 and dedup.stats()["near_duplicates"] == 1
+    assert dedup.pop_aliases() == {}
+
+
+def test_lsh_params_fit_the_permutation_budget():
+    bands, rows = lsh_params(0.85, 128)
+    assert bands * rows <= 128
+    assert 1 - (1 - 0.85**rows) ** bands > 0.5
+
+
+def test_changed_canonical_requeues_alias_document(tmp_path):
+    path = str(tmp_path / "manifest.json")
+    m = IngestManifest(path)
+    a, b = _chunk("a", 0, BASE), _chunk("b", 0, BASE)
+    m.diff_chunks("a", "ha", [a])
+    m.diff_chunks("b", "hb", [b])
+    m.add_aliases({a.id: [(b.id, "b")]})
+    m.save()
+
+    m = IngestManifest(path)
+    assert m.doc_unchanged("b", "hb")
+    changed, stale = m.diff_chunks("a", "ha2", [_chunk("a", 0, BASE + " edited")])
+    assert len(changed) == 1 and not stale
+    assert m.requeued() == ["b"]
+    # The alias chunk counts as new when b is read again.
+    assert not m.doc_unchanged("b", "hb")
+    changed, _ = m.diff_chunks("b", "hb", [b])
+    assert changed == [b] and m.requeued() == []
+
+
+def test_removed_canonical_document_requeues_alias_document(tmp_path):
+    m = IngestManifest(str(tmp_path / "manifest.json"))
+    a, b, b2 = _chunk("a", 0, BASE), _chunk("b", 0, BASE), _chunk("b", 1, "own text")
+    m.diff_chunks("a", "ha", [a])
+    m.diff_chunks("b", "hb", [b, b2])
+    m.add_aliases({a.id: [(b.id, "b")]})
+    m.doc_unchanged("b", "hb")  # only b is still in the corpus
+    assert list(m.removed_docs()) == ["a"]
+    assert m.requeued() == ["b"]
+    assert list(m.docs["b"]["chunks"]) == [b2.id]
+
+
+def test_ingest_reingests_alias_when_canonical_changes(tmp_path, monkeypatch):
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    (corpus / "a.txt").write_text(BASE, encoding="utf-8")
+    (corpus / "b.txt").write_text(BASE, encoding="utf-8")
+    cfg = {
+        "neo4j": {"uri": "bolt://fake", "user": "u", "password": "p"},
+        "embedding": {"provider": "hashing", "model": "hashing", "options": {"dim": 8}},
+        "llm": {"provider": "ollama", "model": "m"},
+        "chunking": {"size": 200, "overlap": 0},
+        "dedup": {"threshold": 0.8},
+        "paths": {"corpus_dir": str(corpus), "output_dir": str(tmp_path / "out")},
+    }
+    config = tmp_path / "config.yaml"
+    config.write_text(yaml.safe_dump(cfg), encoding="utf-8")
+
+    def handler(cypher, params):
+        return [{"populated": True}] if "count(n) > 0" in cypher else []
+
+    driver = FakeDriver(handler)
+    monkeypatch.setattr(cli, "_neo", lambda c: Neo4jClient(Neo4jConfig("bolt://fake", "u", "p"), driver=driver))
+
+    def upserted():
+        return {
+            row["id"] for q, p in driver.queries if "MERGE (c:Chunk" in q for row in p.get("rows", [])
+        }
+
+    cli.ingest(config=str(config), extract=False, full=False, mode="transactional")
+    assert upserted() == {chunk_id("a.txt", 0)}  # b.txt's only chunk is an alias
+
+    driver.queries.clear()
+    (corpus / "a.txt").write_text("something else entirely", encoding="utf-8")
+    cli.ingest(config=str(config), extract=False, full=False, mode="transactional")
+    assert upserted() == {chunk_id("a.txt", 0), chunk_id("b.txt", 0)}
@@ -0,0 +1,107 @@
+import threading
+
+from llm.rag.graphrag.pipelines import cli
+from llm.rag.graphrag.utils.embedding_cache import EmbeddingCache, text_hash
+
+
+def _cache(tmp_path, **kw):
+    return EmbeddingCache(str(tmp_path / "emb.sqlite"), **kw)
+
+
+def test_round_trip_and_counters(tmp_path):
+    cache = _cache(tmp_path)
+    cache.put_many("p", "m", ["a", "b"], [[1.0, 2.0], [3.0, 4.0]])
+    assert cache.get_many("p", "m", ["a", "c", "b"]) == [[1.0, 2.0], None, [3.0, 4.0]]
+    assert cache.get_many("p", "other", ["a"]) == [None]
+    s = cache.stats()
+    assert (s["hits"], s["misses"], s["entries"]) == (2, 2, 2)
+
+
+def test_row_count_tracks_replacements_and_duplicates(tmp_path):
+    cache = _cache(tmp_path)
+    cache.put_many("p", "m", ["a", "a", "b"], [[1.0], [1.0], [2.0]])
+    cache.put_many("p", "m", ["a", "c"], [[9.0], [3.0]])
+    assert len(cache) == 3
+    assert cache.get_many("p", "m", ["a"]) == [[9.0]]
+    cache.close()
+    assert len(_cache(tmp_path)) == 3
+
+
+def test_lru_eviction_keeps_recently_used(tmp_path):
+    cache = _cache(tmp_path, max_entries=2)
+    cache.put_many("p", "m", ["a"], [[1.0]])
+    cache.put_many("p", "m", ["b"], [[2.0]])
+    cache.get_many("p", "m", ["a"])  # a is now more recent than b
+    cache.put_many("p", "m", ["c"], [[3.0]])
+    assert len(cache) == 2
+    assert cache.stats()["evictions"] == 1
+    assert cache.get_many("p", "m", ["a", "b", "c"]) == [[1.0], None, [3.0]]
+
+
+def test_hot_hits_are_written_back_for_lru(tmp_path):
+    cache = _cache(tmp_path, max_entries=2)
+    cache.put_many("p", "m", ["a", "b"], [[1.0], [2.0]])
+    assert cache.warm(provider="p", model="m") == 2
+    del cache._hot[("p", "m", text_hash("b"))]
+    cache.get_many("p", "m", ["a"])  # served from memory, no SQLite write yet
+    cache.get_many("p", "m", ["b"])
+    cache.put_many("p", "m", ["c"], [[3.0]])  # flushes the hot touch of a before evicting
+    assert cache.get_many("p", "m", ["a", "c"]) == [[1.0], [3.0]]
+    assert len(cache) == 2
+
+
+def test_concurrent_counters(tmp_path):
+    cache = _cache(tmp_path)
+    cache.put_many("p", "m", ["a"], [[1.0]])
+    cache.warm()
+
+    def lookups():
+        for _ in range(500):
+            cache.get_many("p", "m", ["a", "missing"])
+
+    threads = [threading.Thread(target=lookups) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    s = cache.stats()
+    assert (s["hits"], s["misses"]) == (2000, 2000)
+
+
+
+def test_reinserting_keeps_hit_counts_for_warm(tmp_path):
+    cache = _cache(tmp_path)
+    cache.put_many("p", "m", ["a", "b"], [[1.0], [2.0]])
+    for _ in range(3):
+        cache.get_many("p", "m", ["a"])
+    cache.get_many("p", "m", ["b"])
+    cache.put_many("p", "m", ["a"], [[9.0]])  # e.g. two workers embedding the same text
+    assert len(cache) == 2
+    assert cache.warm(limit=1) == 1
+    assert list(cache._hot) == [("p", "m", text_hash("a"))]
+    assert cache.get_many("p", "m", ["a"]) == [[9.0]]
+
+
+def test_cli_builds_and_warms_the_cache_from_config(tmp_path):
+    cfg = {
+        "embedding": {"provider": "hashing", "model": "hashing", "options": {"dim": 8}},
+        "paths": {"output_dir": str(tmp_path)},
+    }
+    embed = cli._embeddings(cfg)
+    vec = embed.embed(["hello"])
+    embed.cache.close()
+    assert embed.cache.path == str(tmp_path / "embedding_cache.sqlite")
+
+    cfg["embedding"]["cache"] = {"path": str(tmp_path / "emb.sqlite"), "max_entries": 5, "warm": 0}
+    embed = cli._embeddings(cfg)
+    assert embed.cache.max_entries == 5 and embed.cache.stats()["hot_entries"] == 0
+    embed.cache.close()
+
+    cfg["embedding"]["cache"] = {"path": str(tmp_path / "embedding_cache.sqlite")}
+    embed = cli._embeddings(cfg)
+    assert embed.cache.stats()["hot_entries"] == 1
+    assert embed.embed(["hello"]) == vec and embed.cache.stats()["hits"] == 1
+    embed.cache.close()
+
+    cfg["embedding"]["cache"] = {"path": None}
+    assert cli._embeddings(cfg).cache is None
@@ -0,0 +1,116 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import yaml
+
+from databases.neo4j_client import Neo4jClient, Neo4jConfig
+from databases.neo4j_fakes import FakeDriver
+from llm.rag.graphrag.ingestion.document_loader import Chunk
+from llm.rag.graphrag.ingestion.extraction_stage import LLMResponseCache, ParallelExtractor
+from llm.rag.graphrag.pipelines import cli
+
+PAYLOAD = {"entities": [{"name": "Ada", "type": "Person"}], "relations": []}
+
+
+class FlakyLLM:
+    """Fails the first `fail` calls per chunk text, then answers."""
+
+    model = "fake"
+
+    def __init__(self, fail=0):
+        self.fail = fail
+        self.calls = {}
+
+    def chat(self, messages):
+        text = messages[-1]["content"]
+        self.calls[text] = self.calls.get(text, 0) + 1
+        if self.calls[text] <= self.fail:
+            raise RuntimeError("429 rate limited")
+        return json.dumps(PAYLOAD)
+
+
+def _chunks(n):
+    return [Chunk(id=f"c{i}", doc_id="d", text=f"text {i}", order=i) for i in range(n)]
+
+
+def test_retries_back_off_then_succeed(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr("llm.rag.graphrag.ingestion.extraction_stage.time.sleep", sleeps.append)
+    ex = ParallelExtractor(FlakyLLM(fail=2), max_attempts=3, backoff_s=1.0, max_backoff_s=1.5)
+    assert ex.extract(_chunks(1)[0]) is not None
+    assert len(sleeps) == 2
+    assert 0.0 <= sleeps[0] <= 1.0 and 0.0 <= sleeps[1] <= 1.5
+    assert ex.stats["done"] == 1 and ex.stats["retried"] == 2
+
+
+def test_exhausted_retries_are_recorded(monkeypatch):
+    monkeypatch.setattr("llm.rag.graphrag.ingestion.extraction_stage.time.sleep", lambda s: None)
+    ex = ParallelExtractor(FlakyLLM(fail=5), max_attempts=2)
+    assert ex.extract(_chunks(1)[0]) is None
+    assert [f.chunk_id for f in ex.failures] == ["c0"]
+    assert ex.stats["failed"] == 1
+
+
+def test_run_yields_every_chunk_and_reports_progress():
+    seen = []
+    ex = ParallelExtractor(FlakyLLM(), concurrency=4, progress_every=5, on_progress=seen.append)
+    out = list(ex.run(_chunks(20)))
+    assert sorted(c.id for c, _ in out) == sorted(c.id for c in _chunks(20))
+    assert ex.stats["done"] == 20
+    assert [s["done"] for s in seen] == [5, 10, 15, 20, 20]
+
+
+def test_response_cache_is_durable(tmp_path):
+    llm = FlakyLLM()
+    first = ParallelExtractor(llm, cache=LLMResponseCache(str(tmp_path / "c.sqlite")))
+    list(first.run(_chunks(3)))
+    first.cache.close()
+    again = ParallelExtractor(llm, cache=LLMResponseCache(str(tmp_path / "c.sqlite")))
+    assert len(list(again.run(_chunks(3)))) == 3
+    assert again.stats["cached"] == 3
+    assert all(n == 1 for n in llm.calls.values())
+
+
+def test_token_limiter_charges_estimated_prompt_size(monkeypatch):
+    charged = []
+    ex = ParallelExtractor(FlakyLLM(), tokens_per_min=60_000)
+    monkeypatch.setattr(ex.token_limiter, "acquire", charged.append)
+    ex.extract(_chunks(1)[0])
+    assert len(charged) == 1 and charged[0] > 1
+
+
+def test_failed_chunks_are_extracted_again_on_the_next_run(tmp_path, monkeypatch):
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    (corpus / "a.txt").write_text("Ada wrote notes. Babbage built engines.", encoding="utf-8")
+    cfg = {
+        "neo4j": {"uri": "bolt://fake", "user": "u", "password": "p"},
+        "embedding": {"provider": "hashing", "model": "hashing", "options": {"dim": 8}},
+        "llm": {"provider": "ollama", "model": "m"},
+        "extraction": {"max_attempts": 1},
+        "chunking": {"size": 50, "overlap": 5},
+        "paths": {"corpus_dir": str(corpus), "output_dir": str(tmp_path / "out")},
+    }
+    config = tmp_path / "config.yaml"
+    config.write_text(yaml.safe_dump(cfg), encoding="utf-8")
+    driver = FakeDriver(lambda cypher, params: [{"populated": True}] if "count(n) > 0" in cypher else [])
+    monkeypatch.setattr(cli, "_neo", lambda c: Neo4jClient(Neo4jConfig("bolt://fake", "u", "p"), driver=driver))
+    llm = FlakyLLM(fail=1)  # the LLM is down for the whole first run
+    monkeypatch.setattr(cli, "LLM", lambda provider, model: llm)
+
+    cli.ingest(config=str(config), extract=True, full=False, mode="transactional")
+    assert list(llm.calls.values()) == [1]
+
+    cli.ingest(config=str(config), extract=True, full=False, mode="transactional")
+    assert list(llm.calls.values()) == [2]  # asked again, and answered this time
+
+    cli.ingest(config=str(config), extract=True, full=False, mode="transactional")
+    assert list(llm.calls.values()) == [2]  # now recorded as done
+
+
+def test_response_cache_counts_every_lookup_across_threads(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "c.sqlite"))
+    cache.put("m", "p", "hit", PAYLOAD)
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda i: cache.get("m", "p", "hit" if i % 2 else "miss"), range(2000)))
+    assert (cache.hits, cache.misses) == (1000, 1000)
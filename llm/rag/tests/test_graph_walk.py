@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+from neo4j.exceptions import Neo4jError, ServiceUnavailable
+
+from databases.neo4j_client import AsyncNeo4jClient, Neo4jClient, Neo4jConfig
+from databases.neo4j_fakes import FakeAsyncDriver, FakeDriver
+from llm.rag.graphrag.eval.retrieval_bench import synthetic_store
+from llm.rag.graphrag.retrievers.graph_walk import PROCEDURE_NOT_FOUND, GraphRetriever
+from llm.rag.graphrag.utils.embeddings import Embeddings
+
+
+def _no_procedure():
+    return Neo4jError._hydrate_neo4j(
+        code=PROCEDURE_NOT_FOUND, message="There is no procedure with the name `db.index.vector.queryNodes`"
+    )
+
+
+def _store(error):
+    embed = Embeddings("hashing", "hashing", dim=16)
+    store, gold = synthetic_store(embed, 40, 2)
+    hybrid_calls = []
+
+    def handler(cypher, params):
+        if "$vector_index" in cypher:
+            hybrid_calls.append(cypher)
+            raise error()
+        return store.handler(cypher, params)
+
+    return embed, handler, hybrid_calls, gold[0].query
+
+
+@pytest.mark.parametrize("error, retried", [(_no_procedure, False), (lambda: ServiceUnavailable("down"), True)])
+def test_missing_procedure_turns_off_single_round_trip(error, retried):
+    embed, handler, hybrid_calls, query = _store(error)
+    retriever = GraphRetriever(Neo4jClient(Neo4jConfig("bolt://fake", "u", "p"), driver=FakeDriver(handler)), embed)
+    assert retriever.retrieve(query)  # served by the multi-query fallback
+    retriever.retrieve(query)
+    assert retriever.single_round_trip is retried
+    assert len(hybrid_calls) == (2 if retried else 1)
+
+
+def test_async_path_remembers_missing_procedure():
+    embed, handler, hybrid_calls, query = _store(_no_procedure)
+    cfg = Neo4jConfig("bolt://fake", "u", "p")
+    retriever = GraphRetriever(
+        Neo4jClient(cfg, driver=FakeDriver(handler)), embed,
+        async_neo=AsyncNeo4jClient(cfg, driver=FakeAsyncDriver(handler)),
+    )
+
+    async def twice():
+        return [await retriever.aretrieve(query) for _ in range(2)]
+
+    assert all(asyncio.run(twice()))
+    assert retriever.single_round_trip is False and len(hybrid_calls) == 1
@@ -0,0 +1,68 @@
+import json
+import os
+
+import pytest
+import typer
+import yaml
+
+from databases.neo4j_client import Neo4jClient, Neo4jConfig
+from databases.neo4j_fakes import FakeDriver
+from llm.rag.graphrag.pipelines import cli
+from llm.rag.graphrag.pipelines.manifest import IngestManifest
+
+
+def _setup(tmp_path, monkeypatch, node_count):
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    (corpus / "a.txt").write_text("Alpha beta gamma. Delta epsilon.", encoding="utf-8")
+    cfg = {
+        "neo4j": {"uri": "bolt://fake", "user": "u", "password": "p"},
+        "embedding": {"provider": "hashing", "model": "hashing", "options": {"dim": 8}},
+        "llm": {"provider": "ollama", "model": "m"},
+        "chunking": {"size": 50, "overlap": 5},
+        "paths": {"corpus_dir": str(corpus), "output_dir": str(tmp_path / "out")},
+    }
+    path = tmp_path / "config.yaml"
+    path.write_text(yaml.safe_dump(cfg), encoding="utf-8")
+
+    def handler(cypher, params):
+        if "count(n) > 0" in cypher:
+            return [{"populated": node_count[0] > 0}]
+        return []
+
+    driver = FakeDriver(handler)
+    monkeypatch.setattr(cli, "_neo", lambda c: Neo4jClient(Neo4jConfig("bolt://fake", "u", "p"), driver=driver))
+    manifest = str(tmp_path / "out" / "ingest_manifest.json")
+    return str(path), manifest, driver
+
+
+def test_cold_load_keeps_manifest_pending_until_import(tmp_path, monkeypatch):
+    nodes = [0]
+    config, manifest, driver = _setup(tmp_path, monkeypatch, nodes)
+    cli.ingest(config=config, extract=False, full=False, mode="auto")
+    assert not os.path.exists(manifest)
+    assert os.path.exists(IngestManifest.pending_path(manifest))
+    assert os.path.exists(tmp_path / "out" / "import" / "chunks-00001.csv")
+    assert not any("MERGE" in q for q, _ in driver.queries)
+
+    # Import never happened: the next run exports again instead of skipping everything.
+    cli.ingest(config=config, extract=False, full=False, mode="auto")
+    assert not os.path.exists(manifest)
+
+    # Import done: the pending manifest is adopted and the run is incremental.
+    nodes[0] = 10
+    cli.ingest(config=config, extract=False, full=False, mode="auto")
+    with open(manifest, encoding="utf-8") as f:
+        assert list(json.load(f)) == ["a.txt"]
+    assert not os.path.exists(IngestManifest.pending_path(manifest))
+    assert not any("MERGE (c:Chunk" in q for q, _ in driver.queries)  # a.txt is unchanged
+
+
+def test_lost_manifest_on_populated_graph_does_not_bulk_export(tmp_path, monkeypatch):
+    config, manifest, driver = _setup(tmp_path, monkeypatch, [10])
+    cli.ingest(config=config, extract=False, full=False, mode="auto")
+    assert os.path.exists(manifest)
+    assert not os.path.exists(tmp_path / "out" / "import")
+    assert any("MERGE (c:Chunk" in q for q, _ in driver.queries)
+    with pytest.raises(typer.BadParameter):
+        cli.ingest(config=config, extract=False, full=False, mode="bulk-export")
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from llm.rag.graphrag.eval.retrieval_bench import synthetic_store
+from llm.rag.graphrag.retrievers.graph_walk import GraphRetriever
+from llm.rag.graphrag.utils import instrumentation
+from llm.rag.graphrag.utils.embeddings import Embeddings
+from mlops.monitoring.prometheus_metrics_exporter import MetricsRegistry, merge_snapshots, render_text
+
+
+@pytest.fixture
+def metrics_on():
+    instrumentation.enable(True)
+    yield
+    instrumentation.enable(False)
+
+
+def _observed(stage):
+    samples = instrumentation.REGISTRY.snapshot()["graphrag_stage_seconds"]["samples"]
+    return sum(sum(counts) for labels, (counts, _) in samples if labels == [stage])
+
+
+@pytest.mark.parametrize("single_round_trip", [True, False])
+def test_merge_rerank_recorded_on_every_path(metrics_on, single_round_trip):
+    embed = Embeddings("hashing", "hashing", dim=32)
+    store, gold = synthetic_store(embed, 80, 4)
+    retriever = GraphRetriever(store.client(), embed, single_round_trip=single_round_trip)
+    queries = [g.query for g in gold]
+
+    before = _observed("merge_rerank")
+    retriever.retrieve(queries[0])
+    assert _observed("merge_rerank") == before + 1
+    retriever.retrieve_many(queries)
+    assert _observed("merge_rerank") == before + 1 + len(queries)
+    asyncio.run(retriever.aretrieve(queries[0]))
+    assert _observed("merge_rerank") == before + 2 + len(queries)
+
+
+def test_async_hybrid_search_is_timed(metrics_on):
+    embed = Embeddings("hashing", "hashing", dim=32)
+    store, gold = synthetic_store(embed, 40, 2)
+    retriever = GraphRetriever(store.client(), embed)
+    before = _observed("hybrid_search")
+    retriever.retrieve(gold[0].query)
+    asyncio.run(retriever.aretrieve(gold[0].query))
+    assert _observed("hybrid_search") == before + 2
+
+
+def _errors(stage):
+    samples = instrumentation.REGISTRY.snapshot()["graphrag_stage_errors_total"]["samples"]
+    return sum(v for labels, v in samples if labels == [stage])
+
+
+def test_cancellation_is_timed_but_not_an_error(metrics_on):
+    @instrumentation.timed("test_cancel")
+    async def slow():
+        await asyncio.sleep(10)
+
+    @instrumentation.timed("test_cancel")
+    async def broken():
+        raise ValueError("boom")
+
+    async def main():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(slow(), 0.01)
+        with pytest.raises(ValueError):
+            await broken()
+
+    asyncio.run(main())
+    assert _observed("test_cancel") == 2
+    assert _errors("test_cancel") == 1
+
+
+def test_disabled_metrics_record_nothing():
+    instrumentation.enable(False)
+    calls = []
+    fn = instrumentation.timed("test_disabled")(lambda: calls.append(1))
+    fn()
+    assert calls == [1] and _observed("test_disabled") == 0
+
+
+def test_render_and_merge_histograms():
+    reg = MetricsRegistry()
+    h = reg.histogram("t_seconds", "Latency.", ("stage",), buckets=(0.1, 1.0))
+    h.labels("a").observe(0.05)
+    h.labels("a").observe(0.5)
+    reg.counter("t_total", "Calls.", ("stage",)).labels('q"x').inc(2)
+
+    text = render_text(merge_snapshots([reg.snapshot(), reg.snapshot()]))
+    assert 't_seconds_bucket{stage="a",le="0.1"} 2' in text
+    assert 't_seconds_bucket{stage="a",le="+Inf"} 4' in text
+    assert 't_seconds_count{stage="a"} 4' in text
+    assert 't_total{stage="q\\"x"} 4.0' in text
+    assert "# TYPE t_seconds histogram" in text
@@ -0,0 +1,107 @@
+import json
+import os
+import time
+
+import pytest
+import yaml
+
+from databases.neo4j_client import Neo4jClient, Neo4jConfig
+from databases.neo4j_fakes import FakeDriver
+from llm.rag.graphrag.ingestion import parse_pool
+from llm.rag.graphrag.ingestion.document_loader import iter_chunks
+from llm.rag.graphrag.ingestion.parse_pool import DocumentParserPool, ParseReport, parse_in_process
+from llm.rag.graphrag.pipelines import cli
+
+fork_only = pytest.mark.skipif(not hasattr(os, "fork"), reason="patches the parser in forked workers")
+
+
+def _slow_or_failing(path):
+    if "slow" in path.name:
+        time.sleep(30)
+    if "bad" in path.name:
+        raise ValueError("corrupt file")
+    return f"parsed {path.name}"
+
+
+@fork_only
+def test_pool_reports_timeouts_and_failures_in_order(tmp_path, monkeypatch):
+    monkeypatch.setattr(parse_pool, "parse_document", _slow_or_failing)
+    names = ["a.pdf", "slow.pdf", "bad.pdf", "b.pdf", "c.txt"]
+    for n in names:
+        (tmp_path / n).write_text("x", encoding="utf-8")
+    report = ParseReport()
+    pool = DocumentParserPool(workers=2, timeout_s=0.5, report=report, mp_context="fork")
+    t0 = time.monotonic()
+    docs = list(pool.parse([tmp_path / n for n in names]))
+    assert time.monotonic() - t0 < 10
+    assert [d.path.name for d in docs] == names
+    assert docs[0].text == "parsed a.pdf" and docs[3].text == "parsed b.pdf"
+    assert "timed out" in docs[1].error and "corrupt file" in docs[2].error
+    assert docs[4].text is None and docs[4].error is None  # plain text is read by the caller
+    assert report.timeouts == [str(tmp_path / "slow.pdf")]
+    assert set(report.failures) == {str(tmp_path / "slow.pdf"), str(tmp_path / "bad.pdf")}
+    assert str(tmp_path / "c.txt") not in report.latencies
+
+
+@fork_only
+def test_opened_pool_keeps_its_workers(tmp_path, monkeypatch):
+    monkeypatch.setattr(parse_pool, "parse_document", _slow_or_failing)
+    paths = [tmp_path / f"{i}.pdf" for i in range(4)]
+    with DocumentParserPool(workers=2, timeout_s=5, mp_context="fork") as pool:
+        pids = [s.proc.pid for s in pool._slots]
+        assert [d.text for d in pool.parse(paths[:2])] == ["parsed 0.pdf", "parsed 1.pdf"]
+        assert [d.text for d in pool.parse(paths[2:])] == ["parsed 2.pdf", "parsed 3.pdf"]
+        assert [s.proc.pid for s in pool._slots] == pids
+    assert pool._slots is None
+
+
+def test_plain_text_latency_is_measured(tmp_path):
+    (tmp_path / "doc.txt").write_text("One sentence. Another one.", encoding="utf-8")
+    (tmp_path / "broken.pdf").write_bytes(b"not a pdf")
+    report = ParseReport()
+    chunks = list(iter_chunks(str(tmp_path), size=20, overlap=2, report=report))
+    assert [c.doc_id for c in chunks] == ["doc.txt"]
+    assert report.latencies[str(tmp_path / "doc.txt")] > 0
+    assert list(report.failures) == [str(tmp_path / "broken.pdf")]
+    assert report.summary()["failed"] == 1
+
+    in_process = list(parse_in_process([tmp_path / "broken.pdf"]))
+    assert in_process[0].error is not None
+
+
+def test_ingest_skips_unreadable_documents_and_writes_report(tmp_path, monkeypatch):
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    (corpus / "a.txt").write_text("Alpha beta gamma. Delta epsilon.", encoding="utf-8")
+    (corpus / "broken.pdf").write_bytes(b"not a pdf")
+    cfg = {
+        "neo4j": {"uri": "bolt://fake", "user": "u", "password": "p"},
+        "embedding": {"provider": "hashing", "model": "hashing", "options": {"dim": 8}},
+        "llm": {"provider": "ollama", "model": "m"},
+        "chunking": {"size": 50, "overlap": 5},
+        "paths": {"corpus_dir": str(corpus), "output_dir": str(tmp_path / "out")},
+    }
+    config = tmp_path / "config.yaml"
+    config.write_text(yaml.safe_dump(cfg), encoding="utf-8")
+    driver = FakeDriver(lambda cypher, params: [{"populated": True}] if "count(n) > 0" in cypher else [])
+    monkeypatch.setattr(cli, "_neo", lambda c: Neo4jClient(Neo4jConfig("bolt://fake", "u", "p"), driver=driver))
+
+    cli.ingest(config=str(config), extract=False, full=False, mode="transactional")
+    with open(tmp_path / "out" / "ingest_manifest.json", encoding="utf-8") as f:
+        assert list(json.load(f)) == ["a.txt"]  # retried next run instead of recorded as empty
+    with open(tmp_path / "out" / "parse_report.json", encoding="utf-8") as f:
+        report = json.load(f)
+    assert list(report["failures"]) == [str(corpus / "broken.pdf")]
+    assert report["latencies"][str(corpus / "a.txt")] > 0
+
+
+def test_default_pool_does_not_fork_the_caller(tmp_path):
+    (tmp_path / "broken.pdf").write_bytes(b"not a pdf")
+    (tmp_path / "notes.docx").write_bytes(b"x")
+    report = ParseReport()
+    pool = DocumentParserPool(workers=1, timeout_s=30, report=report)
+    assert pool._ctx.get_start_method() in ("forkserver", "spawn")
+    docs = list(pool.parse([tmp_path / "broken.pdf", tmp_path / "notes.docx"]))
+    assert all(d.error for d in docs)
+    assert "unsupported document type" in docs[1].error
+    assert len(report.failures) == 2
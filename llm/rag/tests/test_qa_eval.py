@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from llm.rag.graphrag.benchmarks.qa_eval_bench import loop_scores, synthetic
+from llm.rag.graphrag.eval import qa_eval
+from llm.rag.graphrag.eval.qa_eval import BulkScorer, bootstrap_ci, bulk_scores
+
+
+def test_bulk_scorer_matches_per_pair_loop():
+    runs, golds = synthetic(400, 12, 2, seed=3)
+    golds[5] = []  # no gold answers scores 0
+    golds[6] = ["  The Answer "]
+    runs[0][6] = "the answer"
+    scorer = BulkScorer(golds)
+    for run in runs:
+        em, f = loop_scores(run, [gs or [""] for gs in golds])
+        em[5] = f[5] = 0.0
+        got = scorer.score(run)
+        assert np.allclose(got.em, em) and np.allclose(got.f1, f)
+    assert scorer.score(runs[0]).em[6] == 1.0
+
+
+def test_chunked_scorer_agrees_with_loop():
+    runs, golds = synthetic(600, 12, 3, seed=1)
+    scorer = BulkScorer(golds, chunk_size=250)
+    for run in runs:
+        em, f = loop_scores(run, golds)
+        for got in (scorer.score(run), bulk_scores(run, golds, chunk_size=250)):
+            assert np.allclose(got.em, em) and np.allclose(got.f1, f)
+    with pytest.raises(ValueError):
+        bulk_scores(runs[0][:-1], golds)
+
+
+def test_worker_pool_is_kept_across_runs():
+    runs, golds = synthetic(300, 8, 2, seed=2)
+    with BulkScorer(golds, chunk_size=100, workers=2) as scorer:
+        pool = scorer._pool
+        for run in runs:
+            em, f = loop_scores(run, golds)
+            got = scorer.score(run)
+            assert np.allclose(got.em, em) and np.allclose(got.f1, f)
+            assert scorer._pool is pool
+    assert scorer._pool is None
+
+
+def test_worker_encodes_each_chunk_once(monkeypatch):
+    runs, golds = synthetic(300, 8, 2, seed=2)
+    built = []
+    gold_chunk = qa_eval._GoldChunk
+    monkeypatch.setattr(qa_eval, "_worker_chunks", {})
+    monkeypatch.setattr(qa_eval, "_worker_golds", [])
+    monkeypatch.setattr(qa_eval, "_GoldChunk", lambda g: built.append(len(g)) or gold_chunk(g))
+    qa_eval._init_worker(golds, 100)
+    for run in runs:
+        for i in range(3):
+            qa_eval._score_in_worker(i, run[i * 100:(i + 1) * 100])
+    assert built == [100, 100, 100]
+
+
+def test_bootstrap_ci_brackets_the_mean():
+    scores = np.r_[np.ones(300), np.zeros(700)]
+    mean, lo, hi = bootstrap_ci(scores, n_boot=500)
+    assert mean == pytest.approx(0.3) and lo < mean < hi
+    assert bootstrap_ci([]) == (0.0, 0.0, 0.0)
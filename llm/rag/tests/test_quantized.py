@@ -0,0 +1,49 @@
+import numpy as np
+
+from llm.rag.graphrag.retrievers.quantized import MmapQuantizedStore, dequantize, quantize
+
+DIM = 16
+
+
+def _vectors(n, seed):
+    return np.random.default_rng(seed).standard_normal((n, DIM)).astype(np.float32)
+
+
+def _same_direction(store, cid, vec):
+    m = store.get([cid])
+    return m.ids == [cid] and m.score(vec)[0] > 0.99
+
+
+def test_int8_and_binary_round_trip_keep_direction():
+    x = _vectors(50, 0)
+    for kind in ("int8", "binary"):
+        codes, scales = quantize(x, kind)
+        y = dequantize(codes, scales, kind, DIM)
+        cos = (x * y).sum(1) / np.linalg.norm(x, axis=1) / np.linalg.norm(y, axis=1)
+        assert cos.min() > (0.99 if kind == "int8" else 0.6)
+
+
+def test_open_cuts_rows_left_by_a_crashed_put(tmp_path):
+    path = str(tmp_path)
+    x = _vectors(4, 1)
+    store = MmapQuantizedStore(path, DIM)
+    store.put(["a", "b"], x[:2])
+    store.close()
+    # Crash after the codes and scales of "c" were flushed, before its id.
+    codes, scales = quantize(x[2:3])
+    with open(tmp_path / "codes.bin", "ab") as f:
+        f.write(codes.tobytes())
+    with open(tmp_path / "scales.bin", "ab") as f:
+        f.write(scales.tobytes())
+    with open(tmp_path / "ids.jsonl", "a", encoding="utf-8") as f:
+        f.write('"c')  # and half of its id line
+
+    store = MmapQuantizedStore(path, DIM)
+    assert "c" not in store._rows and store.nbytes == 2 * (DIM + 4)
+    store.put(["d"], x[3:4])
+    store.close()
+
+    store = MmapQuantizedStore(path, DIM)
+    assert _same_direction(store, "a", x[0]) and _same_direction(store, "b", x[1])
+    assert _same_direction(store, "d", x[3])
+    assert store.get(["c"]).ids == []
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from llm.rag.graphrag.eval.retrieval_bench import synthetic_store
+from llm.rag.graphrag.retrievers.graph_walk import GraphRetriever, _cosine
+from llm.rag.graphrag.retrievers.rerank import EmbeddingMatrix
+from llm.rag.graphrag.utils.embeddings import Embeddings
+
+
+def _vectors(n, dim=24, seed=0):
+    rng = np.random.default_rng(seed)
+    vecs = rng.normal(size=(n, dim)).tolist()
+    vecs[3] = [0.0] * dim  # a zero vector scores 0, as with _cosine
+    return [f"c{i}" for i in range(n)], vecs
+
+
+def test_matrix_scores_match_pairwise_cosine():
+    ids, vecs = _vectors(40)
+    queries = np.random.default_rng(1).normal(size=(5, 24)).tolist()
+    m = EmbeddingMatrix(ids, vecs)
+    ref = np.array([[_cosine(q, v) for v in vecs] for q in queries])
+    assert np.allclose(m.score(queries[0]), ref[0], atol=1e-5)
+    assert np.allclose(m.score_many(queries), ref, atol=1e-5)
+    qi, ci = np.repeat(np.arange(5), 40), np.tile(np.arange(40), 5)
+    assert np.allclose(m.score_pairs(queries, qi, ci, block=7), ref.reshape(-1), atol=1e-5)
+    assert m.score_dict(queries[0])["c3"] == 0.0
+
+
+def test_matrix_edge_cases():
+    empty = EmbeddingMatrix.from_mapping({"a": None})
+    assert len(empty) == 0 and empty.score([1.0, 0.0]).size == 0
+    assert empty.score_many([[1.0, 0.0]]).shape == (1, 0)
+    with pytest.raises(ValueError):
+        EmbeddingMatrix(["a"], [[1.0], [2.0]])
+    with pytest.raises(ValueError):
+        EmbeddingMatrix(["a", "b"], [[1.0, 0.0], [1.0]])
+
+
+def test_fuse_ranks_like_the_scalar_formula():
+    embed = Embeddings("hashing", "hashing", dim=16)
+    store, _ = synthetic_store(embed, 10, 1)
+    retriever = GraphRetriever(store.client(), embed, alpha=0.7)
+    ids, vecs = _vectors(30, dim=16)
+    qvec = vecs[0]
+    f_norm = {cid: (i % 5) / 4 for i, cid in enumerate(ids)}
+    merged = retriever._fuse(qvec, ids, {}, {}, f_norm, dict(zip(ids, vecs)))
+    ref = {cid: 0.7 * _cosine(qvec, v) + 0.3 * f_norm[cid] for cid, v in zip(ids, vecs)}
+    assert [h["id"] for h in merged] == sorted(ids, key=ref.get, reverse=True)
+    assert all(h["score"] == pytest.approx(ref[h["id"]], abs=1e-5) for h in merged)
+
+
+def test_retrieve_many_matches_one_query_at_a_time():
+    embed = Embeddings("hashing", "hashing", dim=32)
+    store, gold = synthetic_store(embed, 120, 6)
+    retriever = GraphRetriever(store.client(), embed, single_round_trip=False)
+    queries = [g.query for g in gold]
+    batched = retriever.retrieve_many(queries, batch_size=4)
+    for q, hits in zip(queries, batched):
+        one = retriever.retrieve(q)
+        assert [h["id"] for h in hits] == [h["id"] for h in one]
+        assert np.allclose([h["score"] for h in hits], [h["score"] for h in one], atol=1e-5)
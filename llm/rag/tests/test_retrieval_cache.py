@@ -0,0 +1,180 @@
+import asyncio
+import itertools
+import time
+
+import pytest
+
+from databases.neo4j_client import AsyncNeo4jClient, Neo4jClient, Neo4jConfig
+from databases.neo4j_fakes import FakeAsyncDriver, FakeDriver
+from llm.rag.graphrag.eval.retrieval_bench import synthetic_store
+from llm.rag.graphrag.graph_builders.graph_version import GraphVersion
+from llm.rag.graphrag.retrievers.graph_walk import GraphRetriever
+from llm.rag.graphrag.retrievers.quantized import MmapQuantizedStore
+from llm.rag.graphrag.retrievers.ranker import Reranker
+from llm.rag.graphrag.retrievers.retrieval_cache import LRUCache, RetrievalCache, SqliteKV
+from llm.rag.graphrag.utils.embeddings import Embeddings
+from llm.rag.graphrag.utils.fakes import FakeCrossEncoder
+from llm.rag.graphrag.utils.text_store import TextBlobStore
+
+
+class RecordingKV:
+    def __init__(self):
+        self.data = {}
+        self.ex = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+        self.ex[key] = ex
+
+
+def _version_client():
+    state = {"version": 0, "bumps": 0}
+
+    def handler(cypher, params):
+        if "SET m.version" in cypher:
+            state["version"] += 1
+            state["bumps"] += 1
+        if "GraphMeta" in cypher:
+            return [{"version": state["version"]}]
+        return []
+
+    return Neo4jClient(Neo4jConfig("bolt://fake", "u", "p"), driver=FakeDriver(handler)), state
+
+
+def test_lru_evicts_oldest_and_expires():
+    lru = LRUCache(2, ttl_s=0.05)
+    lru.put("a", 1)
+    lru.put("b", 2)
+    assert lru.get("a") == 1  # "b" is now the oldest
+    lru.put("c", 3)
+    assert lru.get("b") is None and lru.evictions == 1
+    time.sleep(0.06)
+    assert lru.get("a") is None and lru.expired == 1
+
+
+def test_results_dropped_when_graph_version_moves():
+    cache = RetrievalCache()
+    key = RetrievalCache.result_key("Q", 5, 1, 0.5)
+    cache.put_results(key, 1, [{"id": "c1"}])
+    assert cache.get_results(key, 1) == [{"id": "c1"}]
+    assert cache.get_results(key, 2) is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_puts_from_an_older_version_are_ignored():
+    kv = RecordingKV()
+    cache = RetrievalCache(shared=kv, ttl_s=0.5)
+    key = RetrievalCache.result_key("q", 5, 1, 0.5)
+    cache.put_results(key, 2, [{"id": "new"}])
+    cache.put_results(key, 1, [{"id": "old"}])  # a writer that read the version before the bump
+    assert cache.get_results(key, 2) == [{"id": "new"}]
+    assert cache.stats()["graph_version"] == 2 and cache.stats()["invalidations"] == 0
+    assert list(kv.ex.values()) == [1]  # rounded up, not truncated to "never expires"
+
+
+def test_result_key_covers_every_ranking_setting(tmp_path):
+    embed = Embeddings("hashing", "hashing", dim=32)
+    store, gold = synthetic_store(embed, 60, 3)
+    cache = RetrievalCache()
+    base = GraphRetriever(store.client(), embed, cache=cache)
+    variants = [
+        GraphRetriever(store.client(), embed, cache=cache, fusion="rrf"),
+        GraphRetriever(store.client(), embed, cache=cache, fusion="rrf", rrf_k=10),
+        GraphRetriever(store.client(), embed, cache=cache, reranker=Reranker(top_n=3)),
+        GraphRetriever(store.client(), embed, cache=cache, vector_index="other_idx"),
+        GraphRetriever(store.client(), embed, cache=cache, fulltext_index="other_fts"),
+        GraphRetriever(store.client(), embed, cache=cache, quantized=MmapQuantizedStore(str(tmp_path / "q"), 32)),
+        GraphRetriever(store.client(), embed, cache=cache, text_store=TextBlobStore(str(tmp_path / "t"))),
+    ]
+    keys = {r._result_key(gold[0].query) for r in [base] + variants}
+    assert len(keys) == 8
+    assert base._result_key("  Some QUERY ") == base._result_key("some query")
+
+
+def test_shared_vectors_and_results_expire(tmp_path):
+    kv = RecordingKV()
+    cache = RetrievalCache(shared=kv, ttl_s=60, vector_ttl_s=3600)
+    cache.put_vector("ns", "q", [0.5, 1.0])
+    cache.put_results(("q",), 1, [{"id": "c1"}])
+    assert sorted(kv.ex.values()) == [60, 3600]
+
+    sqlite = SqliteKV(str(tmp_path / "kv.sqlite"))
+    sqlite.set("k", b"v", ex=0.01)
+    time.sleep(0.02)
+    assert sqlite.get("k") is None
+    sqlite.close()
+
+
+def test_graph_version_coalesces_bumps():
+    neo, state = _version_client()
+    version = GraphVersion(neo, poll_interval=0.0, bump_interval=60.0)
+    for _ in range(50):
+        version.touch()
+    assert state["bumps"] == 1  # first write publishes, the rest wait for the interval
+    version.flush()
+    assert state["bumps"] == 2
+    version.flush()
+    assert state["bumps"] == 2
+    assert version.current() == 2
+
+
+def test_graph_version_publishes_the_last_write_of_a_burst():
+    neo, state = _version_client()
+    version = GraphVersion(neo, poll_interval=0.0, bump_interval=0.1)
+    version.touch()
+    version.touch()  # inside the interval: pending, no close() follows
+    assert state["bumps"] == 1
+    deadline = time.monotonic() + 5
+    while state["bumps"] < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert state["bumps"] == 2
+    time.sleep(0.2)
+    assert state["bumps"] == 2  # nothing left pending
+
+
+def test_aretrieve_reads_version_on_async_client():
+    embed = Embeddings("hashing", "hashing", dim=32)
+    store, gold = synthetic_store(embed, 60, 3)
+    sync_driver = FakeDriver(store.handler)
+    async_driver = FakeAsyncDriver(store.handler)
+    retriever = GraphRetriever(
+        Neo4jClient(Neo4jConfig("bolt://fake", "u", "p"), driver=sync_driver),
+        embed,
+        async_neo=AsyncNeo4jClient(Neo4jConfig("bolt://fake", "u", "p"), driver=async_driver),
+        cache=RetrievalCache(),
+    )
+    first = asyncio.run(retriever.aretrieve(gold[0].query))
+    assert asyncio.run(retriever.aretrieve(gold[0].query)) == first
+    assert any("GraphMeta" in q for q, _ in async_driver.queries)
+    assert not any("GraphMeta" in q for q, _ in sync_driver.queries)
+
+
+@pytest.mark.parametrize("budget_ms, cached", [(None, True), (15.0, False)])
+def test_results_cut_short_by_the_rerank_budget_are_not_cached(budget_ms, cached):
+    embed = Embeddings("hashing", "hashing", dim=32)
+    store, gold = synthetic_store(embed, 60, 3)
+    ticks = itertools.count()
+    reranker = Reranker(
+        FakeCrossEncoder(batch_size=2, latency=0.0), top_n=12, budget_ms=budget_ms,
+        clock=lambda: next(ticks) * 0.01,  # every clock read is 10 ms later
+    )
+    retriever = GraphRetriever(store.client(), embed, reranker=reranker, cache=RetrievalCache())
+    queries = [g.query for g in gold]
+    retriever.retrieve(queries[0])
+    retriever.retrieve(queries[0])
+    retriever.retrieve_many(queries)
+    asyncio.run(retriever.aretrieve(queries[1]))
+    assert retriever.cache.results.stats()["hits"] == (3 if cached else 0)
+
+
+def test_rerank_stats_are_per_call():
+    reranker = Reranker(FakeCrossEncoder(batch_size=2, latency=0.0), top_n=4, budget_ms=0.001)
+    hits = [{"id": str(i), "text": f"t{i}", "score": 1.0 / (i + 1)} for i in range(6)]
+    _, cut = reranker.rerank_with_stats("q", hits)
+    _, plain = Reranker(top_n=4).rerank_with_stats("q", hits)
+    assert cut["truncated"] and cut["scored"] == 2
+    assert not plain["truncated"] and plain["scored"] == 0
+    assert reranker.timings.summary()["total"]["n"] == 1
@@ -0,0 +1,60 @@
+import pytest
+
+from databases.neo4j_client import Neo4jClient, Neo4jConfig
+from databases.neo4j_fakes import FakeDriver
+from llm.rag.graphrag.graph_builders.neo4j_builder import GraphBuilder
+from llm.rag.graphrag.ingestion.document_loader import iter_documents
+from llm.rag.graphrag.pipelines.streaming import Stage, StreamingPipeline, build_ingest_pipeline
+from llm.rag.graphrag.utils.fakes import FakeEmbeddingProvider
+
+
+def _corpus(tmp_path, docs=6, words=400):
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    for d in range(docs):
+        (corpus / f"d{d}.txt").write_text(" ".join(f"w{d}_{i}" for i in range(words)), encoding="utf-8")
+    return str(corpus)
+
+
+def _builder(embed):
+    return GraphBuilder(Neo4jClient(Neo4jConfig("bolt://fake", "u", "p"), driver=FakeDriver(lambda c, p: [])), embed)
+
+
+def test_embed_stage_batches_by_tokens_and_bounds_requests_in_flight(tmp_path):
+    corpus = _corpus(tmp_path)
+    fake = FakeEmbeddingProvider(dim=8, latency=0.01, rate_limit_every=4)
+    pipe = build_ingest_pipeline(
+        _builder(fake), None, corpus, chunk_size=50, overlap=0,
+        embed_batch=16, embed_workers=3, embed_in_flight=2, embed_batch_tokens=300,
+    )
+    stats = pipe.run(iter_documents(corpus))
+    chunks = stats["chunk"].items_out
+    assert stats["upsert_chunks"].items_in == chunks == 48
+    assert fake.peak_in_flight <= 2
+    # ~100 estimated tokens per 50-word chunk: three chunks per request.
+    assert max(fake.batch_sizes) <= 3
+    # Every fourth call was rate-limited and retried, none dropped.
+    assert sum(fake.batch_sizes) == chunks and fake.calls > len(fake.batch_sizes)
+
+
+def test_stage_teardown_runs_when_a_later_stage_fails():
+    calls = []
+
+    def boom(batch):
+        raise RuntimeError("upsert failed")
+
+    pipe = StreamingPipeline([
+        Stage("parse", lambda b: b, workers=2, on_finish=lambda: calls.append("finish"),
+              on_close=lambda: calls.append("close")),
+        Stage("upsert", boom),
+    ])
+    with pytest.raises(RuntimeError, match="upsert failed"):
+        pipe.run(range(100))
+    assert calls == ["close"]
+
+
+def test_each_run_reports_its_own_stats():
+    pipe = StreamingPipeline([Stage("double", lambda b: [x * 2 for x in b], batch_size=4)])
+    first = pipe.run(range(10))
+    second = pipe.run(range(3))
+    assert (first["double"].items_in, second["double"].items_in) == (10, 3)
@@ -0,0 +1,86 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from databases.neo4j_client import Neo4jClient, Neo4jConfig
+from databases.neo4j_fakes import FakeDriver
+from llm.rag.graphrag.graph_builders.neo4j_builder import GraphBuilder
+from llm.rag.graphrag.ingestion.document_loader import Chunk
+from llm.rag.graphrag.utils.embeddings import Embeddings
+from llm.rag.graphrag.utils.text_store import TextBlobStore
+
+
+def test_empty_texts_round_trip(tmp_path):
+    store = TextBlobStore(str(tmp_path))
+    store.put_many([("empty", "")])
+    assert store.get("empty") == ""  # nothing mapped yet
+    store.put_many([("a", "alpha"), ("also_empty", "")])
+    assert store.get_many(["empty", "a", "also_empty"]) == {"empty": "", "a": "alpha", "also_empty": ""}
+    assert store.check()["corrupt"] == []
+    store.compact()
+    assert store.get_many(["empty", "a"]) == {"empty": "", "a": "alpha"}
+
+
+def test_compact_swaps_one_pointer(tmp_path):
+    store = TextBlobStore(str(tmp_path))
+    store.put_many([("a", "alpha"), ("b", "beta")])
+    store.put_many([("a", "alpha two")])
+    store.delete_many(["b"])
+    assert store.compact() == {"bytes_before": 18, "bytes_after": 9, "chunks": 1}
+    assert sorted(os.listdir(tmp_path)) == ["CURRENT", "index.1.jsonl", "texts.1.bin"]
+    store.put_many([("c", "gamma")])
+    store.close()
+
+    reopened = TextBlobStore(str(tmp_path))
+    assert reopened.get_many(["a", "b", "c"]) == {"a": "alpha two", "c": "gamma"}
+    assert reopened.stats()["dead_bytes"] == 0
+
+
+def test_interrupted_compaction_keeps_the_old_generation(tmp_path):
+    store = TextBlobStore(str(tmp_path))
+    store.put_many([("a", "alpha")])
+    store.close()
+    # A compaction that died before the pointer swap left a half-written pair.
+    (tmp_path / "texts.1.bin").write_bytes(b"xx")
+    (tmp_path / "index.1.jsonl").write_text('["a", 0, 2, 0]\n', encoding="utf-8")
+
+    reopened = TextBlobStore(str(tmp_path))
+    assert reopened.get("a") == "alpha"
+    reopened.compact()  # overwrites the leftovers
+    assert TextBlobStore(str(tmp_path)).get("a") == "alpha"
+
+
+def test_builder_keeps_node_text_for_full_text_search(tmp_path):
+    driver = FakeDriver(lambda cypher, params: [])
+    neo = Neo4jClient(Neo4jConfig("bolt://fake", "u", "p"), driver=driver)
+    chunk = Chunk(id="c1", doc_id="d", text="some text", order=0, start=0, end=9)
+
+    GraphBuilder(neo, Embeddings("hashing", "hashing", dim=8), text_store=TextBlobStore(str(tmp_path / "a"))).upsert_chunks([chunk])
+    GraphBuilder(
+        neo, Embeddings("hashing", "hashing", dim=8), text_store=TextBlobStore(str(tmp_path / "b")), keep_node_text=False
+    ).upsert_chunks([chunk])
+    texts = [row["text"] for q, p in driver.queries if "MERGE (c:Chunk" in q for row in p["rows"]]
+    assert texts == ["some text", None]
+
+
+def _in_other_process(store_dir, code):
+    script = f"from llm.rag.graphrag.utils.text_store import TextBlobStore\ns = TextBlobStore({store_dir!r})\n{code}\ns.close()\n"
+    root = str(Path(__file__).resolve().parents[3])
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([root, os.environ.get("PYTHONPATH", "")])}
+    subprocess.run([sys.executable, "-c", script], check=True, env=env, cwd=root)
+
+
+def test_reader_sees_writes_and_compaction_of_another_process(tmp_path):
+    path = str(tmp_path)
+    writer = TextBlobStore(path)
+    writer.put_many([("a", "alpha"), ("b", "beta")])
+    reader = TextBlobStore(path)
+    assert reader.get("a") == "alpha"
+
+    _in_other_process(path, "s.put_many([('c', 'gamma'), ('a', 'alpha two')]); s.delete_many(['b'])")
+    assert reader.get_many(["a", "b", "c"]) == {"a": "alpha two", "c": "gamma"}
+
+    _in_other_process(path, "s.compact(); s.put_many([('d', 'delta')])")
+    assert reader.get_many(["a", "c", "d"]) == {"a": "alpha two", "c": "gamma", "d": "delta"}
+    assert reader.stats()["dead_bytes"] == 0
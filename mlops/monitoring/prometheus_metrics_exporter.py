@@ -0,0 +1,335 @@
+"""
+Dependency-free Prometheus metrics: counters and histograms, the text
+exposition format (0.0.4) and a /metrics HTTP endpoint.
+
+    registry = MetricsRegistry()
+    latency = registry.histogram("app_request_seconds", "Request latency.", ("route",))
+    latency.labels("/ask").observe(0.12)
+    start_http_server(9464, registry=registry)
+
+Multi-process mode (several worker processes behind one scrape target):
+every process runs a MultiProcessWriter that dumps its registry to
+`<dir>/metrics-<pid>.json`, and one exporter serves the sum of all files:
+
+    MultiProcessWriter(registry, "/tmp/metrics").start()     # in each worker
+    start_http_server(9464, multiprocess_dir="/tmp/metrics")  # in one process
+
+Counters and histograms only ever grow, so files of exited processes keep
+counting towards the totals, as with prometheus_client's multiprocess mode;
+clear the directory when the whole service restarts.
+"""
+from __future__ import annotations
+
+import atexit
+import glob
+import json
+import os
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+
+# ---- Metrics ----
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class _HistogramChild:
+    __slots__ = ("_upper", "counts", "sum", "_lock")
+
+    def __init__(self, upper: Tuple[float, ...]):
+        self._upper = upper
+        self.counts = [0] * (len(upper) + 1)  # per bucket, last one is +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect_left(self._upper, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """Child for one label combination; resolve it once and keep it on hot paths."""
+        key = tuple(str(v) for v in values)
+        if len(key) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _snapshot(self) -> Dict:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def _snapshot(self) -> Dict:
+        return {"samples": [[list(k), c.value] for k, c in list(self._children.items())]}
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _snapshot(self) -> Dict:
+        samples = []
+        for k, c in list(self._children.items()):
+            with c._lock:
+                samples.append([list(k), [list(c.counts), c.sum]])
+        return {"buckets": list(self.buckets), "samples": samples}
+
+
+class MetricsRegistry:
+    """
+    Named counters and histograms of one process.
+
+    - `counter()` / `histogram()` return the existing metric when the name
+      is registered already (a different type under the same name raises)
+    - `snapshot()` is a JSON-able copy used for rendering and for the
+      multi-process files; `render()` is the Prometheus text format
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name: str, *args) -> _Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"{name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def histogram(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {
+            m.name: {"type": m.kind, "help": m.documentation, "labelnames": list(m.labelnames), **m._snapshot()}
+            for m in metrics
+        }
+
+    def render(self) -> str:
+        return render_text(self.snapshot())
+
+
+# ---- Exposition ----
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt(value: float) -> str:
+    return "+Inf" if value == float("inf") else repr(float(value))
+
+
+def render_text(snapshot: Dict[str, Dict]) -> str:
+    """Prometheus text exposition (format 0.0.4) of a registry snapshot."""
+    lines: List[str] = []
+    for name in sorted(snapshot):
+        m = snapshot[name]
+        doc = m["help"].replace("\\", "\\\\").replace("\n", "\\n")
+        lines += [f"# HELP {name} {doc}", f"# TYPE {name} {m['type']}"]
+        names = m["labelnames"]
+        for values, data in sorted(m["samples"], key=lambda s: s[0]):
+            if m["type"] == "counter":
+                lines.append(f"{name}{_labels(names, values)} {_fmt(data)}")
+                continue
+            counts, total = data
+            running = 0
+            for upper, n in zip([*m["buckets"], float("inf")], counts):
+                running += n
+                le = 'le="%s"' % _fmt(upper)
+                lines.append(f"{name}_bucket{_labels(names, values, le)} {running}")
+            lines.append(f"{name}_sum{_labels(names, values)} {_fmt(total)}")
+            lines.append(f"{name}_count{_labels(names, values)} {running}")
+    return "\n".join(lines) + "\n"
+
+
+def merge_snapshots(snapshots: Iterable[Dict[str, Dict]]) -> Dict[str, Dict]:
+    """Sum counters and histogram buckets across processes (matched by name and labels)."""
+    out: Dict[str, Dict] = {}
+    for snap in snapshots:
+        for name, m in snap.items():
+            acc = out.setdefault(name, {**m, "samples": {}})
+            if acc["type"] != m["type"] or acc.get("buckets") != m.get("buckets"):
+                continue  # incompatible redefinition in another process; first one wins
+            for values, data in m["samples"]:
+                key = tuple(values)
+                prev = acc["samples"].get(key)
+                if m["type"] == "counter":
+                    acc["samples"][key] = (prev or 0.0) + data
+                elif prev is None:
+                    acc["samples"][key] = [list(data[0]), data[1]]
+                else:
+                    prev[0] = [a + b for a, b in zip(prev[0], data[0])]
+                    prev[1] += data[1]
+    for m in out.values():
+        m["samples"] = [[list(k), v] for k, v in m["samples"].items()]
+    return out
+
+
+# ---- Multi-process mode ----
+
+class MultiProcessWriter:
+    """
+    Dumps one process's registry to `<directory>/metrics-<pid>.json` every
+    `interval` seconds (write to a temp file, then rename) and once more at
+    interpreter exit.
+    """
+
+    def __init__(self, registry: MetricsRegistry, directory: str, interval: float = 5.0):
+        self.registry = registry
+        self.directory = directory
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.directory, f"metrics-{os.getpid()}.json")
+
+    def flush(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.registry.snapshot(), f)
+        os.replace(tmp, path)
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def start(self) -> "MultiProcessWriter":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="metrics-writer", daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self.flush()
+
+
+def collect_directory(directory: str) -> Dict[str, Dict]:
+    snaps = []
+    for path in glob.glob(os.path.join(directory, "metrics-*.json")):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                snaps.append(json.load(f))
+        except (OSError, ValueError):
+            continue  # being replaced right now; picked up on the next scrape
+    return merge_snapshots(snaps)
+
+
+# ---- HTTP ----
+
+def start_http_server(
+    port: int,
+    addr: str = "",
+    registry: Optional[MetricsRegistry] = None,
+    multiprocess_dir: Optional[str] = None,
+) -> ThreadingHTTPServer:
+    """
+    Serve /metrics from a daemon thread: `registry` alone, or the merged
+    files of `multiprocess_dir` (plus `registry`, when given, if this
+    process does not also write into that directory).
+    """
+    if registry is None and multiprocess_dir is None:
+        raise ValueError("need a registry or a multiprocess directory")
+
+    def body() -> bytes:
+        snaps = []
+        if multiprocess_dir is not None:
+            snaps.append(collect_directory(multiprocess_dir))
+        if registry is not None:
+            snaps.append(registry.snapshot())
+        return render_text(merge_snapshots(snaps)).encode("utf-8")
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            data = body()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((addr, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server